@@ -6,6 +6,7 @@ import os
 import platform
 import sys
 import threading
+import multiprocessing
 import subprocess # Kept for main app's potential direct use, though most subprocess moved
 import ctypes   # Kept for main app's potential direct use
 import json     # Kept for main app's potential direct use (e.g. cache)
@@ -57,6 +58,8 @@ class Application(tb.Window):
 
         # Initialize core components
         self.policy_manager = get_policy_manager() # Must be initialized before tabs that use it
+        if self.policy_manager:
+            self.policy_manager.prewarm() # Start the registry worker in the background before the first read
         self.license_manager = LicenseManager(self) # Needs self for callbacks like log, deactivate_pro_features
         self.user_data_path = get_chrome_user_data_path()
         self.cache = self.load_cache() # For extension name caching
@@ -67,8 +70,8 @@ class Application(tb.Window):
             messagebox.showerror("Initialization Error", "Failed to initialize Windows Policy Manager. Ensure you have necessary permissions or try running as administrator if not already.")
             self.destroy()
             return
-        elif platform.system() != "Windows":
-             messagebox.showerror("Unsupported OS", "This application currently only supports Windows for full functionality.")
+        elif not self.policy_manager:
+             messagebox.showerror("Unsupported OS", "Chrome policy management is only supported on Windows and Linux.")
              # Allow to run but some features might be disabled by the tabs themselves or policy_manager being None
 
         self.after(100, self.initial_load) # Delay initial load slightly
@@ -105,6 +108,8 @@ class Application(tb.Window):
         self.run_task_in_thread(self._check_activation_logic)
         if hasattr(self, 'url_blocker_tab_instance'):
             self.url_blocker_tab_instance.load_initial_data()
+        if self.policy_manager:
+            self.policy_manager.start_watching() # Pushes outside policy changes (GPO refresh, other tools) to the tabs
         self.log("Application initialized.")
 
 
@@ -277,6 +282,9 @@ class Application(tb.Window):
 
 
 if __name__ == "__main__":
+    # Profile scans parse large Preferences files in worker processes; needed for frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+
     # Ensure admin rights on Windows before creating the app window
     if platform.system() == "Windows":
         if not is_admin():
@@ -0,0 +1,80 @@
+import json
+import os
+import platform
+import tempfile
+import time
+from collections import namedtuple
+
+WriteResult = namedtuple("WriteResult", "path written bytes_written seconds") # written is False when the content was unchanged
+REPLACE_ATTEMPTS = 5 # On Windows a scanner or indexer briefly holding the target makes os.replace fail
+
+
+def dumps_compact(document):
+    """The document as Chrome writes its JSON files: one line, no spaces, UTF-8 (not \\u escapes)."""
+    try:
+        return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    except UnicodeEncodeError: # Lone surrogates from "\ud800"-style escapes only survive as escapes
+        return json.dumps(document, separators=(',', ':')).encode('ascii')
+
+
+def _unchanged(path, data):
+    try:
+        if os.path.getsize(path) != len(data): return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _fsync_directory(directory):
+    if platform.system() == "Windows": return # Directories cannot be opened for fsync there; NTFS journals the rename
+    fd = os.open(directory, os.O_RDONLY)
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+
+def write_bytes_atomic(path, data, mode=None):
+    """Replaces `path` with `data` so readers see either the old or the new file, never a partial one.
+
+    The data goes to a temporary file in the same directory, is fsynced and moved over `path`
+    with os.replace; a failure leaves the original untouched. Nothing is written when the file
+    already holds exactly `data`. The file keeps its permissions unless `mode` is given
+    (new files get `mode`, or 0600). Returns a WriteResult.
+    """
+    start = time.perf_counter()
+    if _unchanged(path, data):
+        return WriteResult(path, False, 0, time.perf_counter() - start)
+    directory = os.path.dirname(os.path.abspath(path))
+    if mode is None:
+        try: mode = os.stat(path).st_mode & 0o7777
+        except OSError: pass
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None: os.chmod(tmp_path, mode)
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                if platform.system() != "Windows" or attempt == REPLACE_ATTEMPTS - 1: raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+    try: _fsync_directory(directory) # Makes the rename itself durable
+    except OSError: pass
+    return WriteResult(path, True, len(data), time.perf_counter() - start)
+
+
+def write_json_atomic(path, document, indent=None, sort_keys=False, mode=None):
+    """Serializes `document` (compact, Chrome's format, unless `indent` is given) and writes it with write_bytes_atomic."""
+    if indent is None and not sort_keys:
+        data = dumps_compact(document)
+    else:
+        data = json.dumps(document, indent=indent, sort_keys=sort_keys).encode('utf-8')
+    return write_bytes_atomic(path, data, mode)
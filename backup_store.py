@@ -0,0 +1,182 @@
+import hashlib
+import json
+import lzma
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+import config
+from atomic_writer import write_bytes_atomic
+
+BackupEntry = namedtuple("BackupEntry", "backup_id time profile name hash size stored_size reason")
+_COMPRESSORS = { # Suffix of the stored object -> (compress, decompress)
+    "zz": (lambda data: zlib.compress(data, 1), zlib.decompress), # Fast enough to run before every change
+    "xz": (lambda data: lzma.compress(data, preset=6), lzma.decompress), # About half the size, several times slower
+}
+
+
+class BackupStore:
+    """Content-addressed, compressed backups of profile files (Preferences) for one user data dir.
+
+    Each distinct file content is stored once, compressed, under its SHA-256; the append-only
+    manifest.jsonl records when, for which profile and why each backup was taken. Taking a
+    backup of unchanged content only appends a manifest line, so repeated operations cost
+    disk space per distinct version, not per click. Retention keeps the newest `keep_last`
+    backups of each profile file and drops any older than `max_age_days`; objects no longer
+    referenced are deleted.
+    """
+    def __init__(self, root, compression="zz", keep_last=config.BACKUP_KEEP_LAST, max_age_days=config.BACKUP_MAX_AGE_DAYS):
+        if compression not in _COMPRESSORS: raise ValueError(f"Unknown compression '{compression}'.")
+        self.root = root
+        self.compression = compression
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self._entries = None # Loaded on first use, oldest first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def root_for(user_data_path):
+        """Store directory of a user data dir, under config.BACKUP_STORE_DIR."""
+        key = hashlib.sha256(os.path.normcase(os.path.abspath(user_data_path)).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(config.BACKUP_STORE_DIR, key)
+
+    # --- Manifest ---
+    def _load(self):
+        if self._entries is not None: return
+        entries = []
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try: entries.append(BackupEntry(**json.loads(line)))
+                    except (ValueError, TypeError): continue # A torn last line after a crash
+        except FileNotFoundError:
+            pass
+        self._entries = entries
+
+    def _object_path(self, digest, suffix):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{suffix}")
+
+    def _find_object(self, digest):
+        for suffix in _COMPRESSORS:
+            path = self._object_path(digest, suffix)
+            if os.path.exists(path): return path, suffix
+        return None, None
+
+    # --- Backup ---
+    def backup_file(self, path, profile, reason):
+        """Backs up the file at `path` (e.g. a profile's Preferences). Returns the new BackupEntry."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return self.backup_bytes(data, profile, os.path.basename(path), reason)
+
+    def backup_bytes(self, data, profile, name, reason):
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._load()
+            object_path, _ = self._find_object(digest)
+            if object_path is None:
+                object_path = self._object_path(digest, self.compression)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                write_bytes_atomic(object_path, _COMPRESSORS[self.compression][0](data))
+            stored_size = os.path.getsize(object_path)
+            backup_id = self._entries[-1].backup_id + 1 if self._entries else 1
+            entry = BackupEntry(backup_id, time.time(), profile, name, digest, len(data), stored_size, reason)
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry._asdict(), separators=(',', ':')) + "\n")
+            self._entries.append(entry)
+            if self._over_retention(profile, name):
+                self._prune()
+            return entry
+
+    # --- Listing and restore ---
+    def list(self, profile=None, name=None):
+        """Backups, newest first, optionally only those of one profile and/or file name."""
+        with self._lock:
+            self._load()
+            return [e for e in reversed(self._entries) if (profile is None or e.profile == profile) and (name is None or e.name == name)]
+
+    def entry_at(self, profile, name, when):
+        """The newest backup of a profile file taken at or before `when` (epoch seconds), or None."""
+        return next((e for e in self.list(profile, name) if e.time <= when), None)
+
+    def read(self, entry):
+        """Original bytes of a backup; raises ValueError if the stored object is missing or damaged."""
+        object_path, suffix = self._find_object(entry.hash)
+        if object_path is None: raise ValueError(f"Backup {entry.backup_id} is missing from the store.")
+        with open(object_path, 'rb') as f:
+            data = _COMPRESSORS[suffix][1](f.read())
+        if hashlib.sha256(data).hexdigest() != entry.hash:
+            raise ValueError(f"Backup {entry.backup_id} is damaged (checksum mismatch).")
+        return data
+
+    def restore(self, entry, target_path):
+        """Writes a backup over `target_path` atomically. Returns the atomic_writer WriteResult."""
+        return write_bytes_atomic(target_path, self.read(entry))
+
+    def disk_usage(self):
+        """(bytes of the stored objects, bytes the backups would take uncompressed and undeduplicated)."""
+        with self._lock:
+            self._load()
+            stored = {e.hash: e.stored_size for e in self._entries}
+            return sum(stored.values()), sum(e.size for e in self._entries)
+
+    # --- Retention ---
+    def _over_retention(self, profile, name):
+        mine = [e for e in self._entries if e.profile == profile and e.name == name]
+        return len(mine) > self.keep_last or (self.max_age_days and mine[0].time < time.time() - self.max_age_days * 86400)
+
+    def prune(self):
+        """Applies the retention policy to every profile file. Returns the number of backups dropped."""
+        with self._lock:
+            self._load()
+            return self._prune()
+
+    def _prune(self):
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+        kept, counts = [], {}
+        for entry in reversed(self._entries): # Newest first, so the newest keep_last of each file survive
+            key = (entry.profile, entry.name)
+            counts[key] = counts.get(key, 0) + 1
+            if counts[key] <= self.keep_last and (cutoff is None or entry.time >= cutoff or counts[key] == 1):
+                kept.append(entry) # The newest backup of a file is kept whatever its age
+        kept.reverse()
+        dropped = len(self._entries) - len(kept)
+        if not dropped: return 0
+        manifest = "".join(json.dumps(e._asdict(), separators=(',', ':')) + "\n" for e in kept)
+        write_bytes_atomic(self.manifest_path, manifest.encode('utf-8'))
+        referenced = {e.hash for e in kept}
+        for entry in self._entries:
+            if entry.hash not in referenced:
+                object_path, _ = self._find_object(entry.hash)
+                if object_path:
+                    try: os.remove(object_path)
+                    except OSError: pass
+                referenced.add(entry.hash) # Only try once per object
+        self._entries = kept
+        return dropped
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def backup_store_for(user_data_path):
+    """The shared BackupStore of a user data dir (one instance per dir, so threads share its lock)."""
+    root = BackupStore.root_for(user_data_path)
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = BackupStore(root)
+        return _stores[root]
+
+
+def backup_profile_file(profile_path, reason, name="Preferences", data=None):
+    """Backs up a profile's file into the store of its user data dir. Returns the BackupEntry.
+
+    `data` is the file's current content when the caller has already read it.
+    """
+    profile_path = os.path.abspath(profile_path)
+    store = backup_store_for(os.path.dirname(profile_path))
+    if data is not None: return store.backup_bytes(data, os.path.basename(profile_path), name, reason)
+    return store.backup_file(os.path.join(profile_path, name), os.path.basename(profile_path), reason)
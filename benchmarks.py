@@ -0,0 +1,290 @@
+"""Micro-benchmarks for the performance-sensitive paths.
+
+Run all of them with `python benchmarks.py`, or a subset with `python benchmarks.py registry_worker`.
+They work on Linux too: Windows-only pieces are replaced by stubs where noted.
+"""
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_registry_worker(calls=50):
+    """Per-call latency of the persistent registry worker vs. one process per call."""
+    from registry_worker import RegistryWorker, PosixShellFraming
+    if platform.system() == "Windows":
+        command = r'reg query "HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Windows NT\CurrentVersion" /v ProductName'
+        worker = RegistryWorker()
+        spawn = lambda: subprocess.run(['powershell', '-Command', command], capture_output=True)
+    else: # Stub `reg` so the protocol and process lifecycle are exercised on Linux
+        stub = "reg() { echo \"HKEY_LOCAL_MACHINE\\\\STUB\"; echo \"    $3    REG_DWORD    0x1\"; }"
+        command = 'reg query "HKEY_LOCAL_MACHINE\\STUB" /v Value'
+        worker = RegistryWorker(PosixShellFraming([stub]))
+        spawn = lambda: subprocess.run(['sh', '-c', f"{stub}; {command}"], capture_output=True)
+
+    start = time.perf_counter()
+    worker.start()
+    worker.run(command)
+    warmup = time.perf_counter() - start
+    per_call_worker = _timeit(lambda: worker.run(command), calls)
+    per_call_spawn = _timeit(spawn, calls)
+    worker.close()
+    print(f"registry_worker: startup+first call {warmup * 1000:.1f} ms")
+    print(f"registry_worker: worker {per_call_worker * 1000:.2f} ms/call, spawn-per-call {per_call_spawn * 1000:.2f} ms/call "
+          f"({per_call_spawn / per_call_worker:.1f}x)")
+    if platform.system() != "Windows":
+        print("registry_worker: (stub `sh` worker; the framing forks helpers, so only the Windows/PowerShell numbers are representative)")
+
+
+def bench_url_matcher(patterns=10000, urls=1000000):
+    """Batch URL evaluation throughput against a large compiled blocklist."""
+    import random
+    from url_matcher import UrlMatcher
+    rng = random.Random(1)
+    words = [f"w{i}" for i in range(5000)]
+    blocklist = [f"{rng.choice(words)}{i}.{rng.choice(['com', 'net', 'org'])}" + rng.choice(["", "/ads", ""]) for i in range(patterns)]
+    hosts = [p.split("/")[0] for p in rng.sample(blocklist, 2000)] + [f"site{i}.example.com" for i in range(20000)]
+    lines = [f"https://{rng.choice(['', 'www.', 'cdn.'])}{rng.choice(hosts)}/{rng.choice(['', 'ads/x', 'index.html'])}?q={i}\n" for i in range(urls)]
+
+    start = time.perf_counter()
+    matcher = UrlMatcher(blocklist)
+    compile_time = time.perf_counter() - start
+    stats = matcher.evaluate_lines(lines)
+    naive_urls = lines[:2000]
+    start = time.perf_counter()
+    for line in naive_urls:
+        url = line.strip()
+        any(f.host in url for f in matcher.filters)
+    naive_rate = len(naive_urls) / (time.perf_counter() - start)
+    print(f"url_matcher: compiled {len(matcher)} patterns in {compile_time * 1000:.0f} ms")
+    print(f"url_matcher: {stats['checked']} URLs in {stats['seconds']:.2f} s = {stats['checked'] / stats['seconds']:,.0f} URLs/s "
+          f"({stats['blocked']} blocked); linear scan of all patterns: {naive_rate:,.0f} URLs/s")
+
+
+def _make_user_data_dir(profiles, prefs_kb, extensions=30):
+    """Synthetic Chrome user data dir: `profiles` profiles with ~prefs_kb KB Preferences and a Local State."""
+    root = tempfile.mkdtemp(prefix="chrome_bench_")
+    info_cache = {}
+    filler = {f"https://site{i}.example.com:443,*": {"last_modified": "13300000000000000", "setting": {"lastEngagementTime": 1.3e16, "rawScore": 4.2}}
+              for i in range(prefs_kb * 1024 // 110)}
+    for p in range(profiles):
+        folder = "Default" if p == 0 else f"Profile {p}"
+        os.makedirs(os.path.join(root, folder))
+        settings = {f"{chr(97 + p % 16)}{chr(97 + e % 16)}{chr(97 + e // 16 % 16)}{'abcdefghijklmnop'[p % 16] * 29}": {
+            "state": 1, "path": f"ext{e}", "manifest": {"name": f"Extension {e}", "version": "1.0", "permissions": ["tabs", "storage"]}}
+            for e in range(extensions)}
+        prefs = {"profile": {"name": f"Person {p}", "content_settings": {"exceptions": {"site_engagement": filler}}},
+                 "extensions": {"settings": settings}}
+        with open(os.path.join(root, folder, "Preferences"), 'w', encoding='utf-8') as f:
+            json.dump(prefs, f, separators=(',', ':'))
+        info_cache[folder] = {"name": f"Person {p}", "avatar_icon": "chrome://theme/IDR_PROFILE_AVATAR_26", "active_time": 1.7e9 + p}
+    with open(os.path.join(root, "Local State"), 'w', encoding='utf-8') as f:
+        json.dump({"profile": {"info_cache": info_cache, "last_used": "Default"}}, f)
+    return root
+
+
+def bench_profile_discovery(profiles=100, prefs_kb=1024):
+    """Profile discovery from Local State vs. opening every Preferences file."""
+    from profile_utils import get_profile_details
+    root = _make_user_data_dir(profiles, prefs_kb)
+    try:
+        quiet = lambda msg: None
+        with_local_state = _timeit(lambda: get_profile_details(root, quiet), 5)
+        os.rename(os.path.join(root, "Local State"), os.path.join(root, "Local State.off"))
+        per_profile = _timeit(lambda: get_profile_details(root, quiet), 3)
+        print(f"profile_discovery: {profiles} profiles, ~{prefs_kb} KB Preferences each")
+        print(f"profile_discovery: Local State {with_local_state * 1000:.1f} ms, every Preferences {per_profile * 1000:.1f} ms "
+              f"({per_profile / with_local_state:.0f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_profile_scan(profiles=16, prefs_kb=4096):
+    """Extension scan of every profile: scan_profiles (parallel where it pays off) vs. one profile after another."""
+    from profile_utils import scan_profiles, get_profile_info, get_extensions_for_profile
+    root = _make_user_data_dir(profiles, prefs_kb)
+    try:
+        quiet = lambda msg: None
+        start = time.perf_counter()
+        first = None
+        for _ in scan_profiles(root, quiet):
+            first = first or time.perf_counter() - start
+        parallel = time.perf_counter() - start
+        start = time.perf_counter()
+        for profile in get_profile_info(root, quiet):
+            get_extensions_for_profile(profile['path'], quiet)
+        serial = time.perf_counter() - start
+        print(f"profile_scan: {profiles} profiles, ~{prefs_kb} KB Preferences each, {os.cpu_count()} CPU(s)")
+        print(f"profile_scan: scan_profiles {parallel * 1000:.0f} ms (first profile after {first * 1000:.0f} ms), serial {serial * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_preferences_extract(prefs_mb=20, repeat=3):
+    """Extraction of profile.name and extensions.settings vs. json.loads (correctness: tests/test_preferences_extract.py)."""
+    import tracemalloc
+    from profile_utils import extract_json_paths, PREFERENCES_PATHS
+    filler = {f"https://site{i}.example.com:443,*": {"last_modified": "13300000000000000", "setting": {"lastEngagementTime": 1.3e16, "rawScore": 4.2}}
+              for i in range(prefs_mb * 1024 * 1024 // 110)}
+    settings = {f"{'abcdefghijklmnop'[e % 16] * 31}{'abcdefghijklmnop'[e // 16 % 16]}": {"state": 1, "manifest": {"name": f"Extension {e}"}} for e in range(100)}
+    raw = json.dumps({"profile": {"name": "Person", "content_settings": {"exceptions": {"site_engagement": filler}}},
+                      "extensions": {"settings": settings}}, separators=(',', ':')).encode()
+    del filler
+    full_parse = _timeit(lambda: json.loads(raw), repeat)
+    extract = _timeit(lambda: extract_json_paths(raw, PREFERENCES_PATHS), repeat)
+    peaks = []
+    for func in (lambda: json.loads(raw), lambda: extract_json_paths(raw, PREFERENCES_PATHS)):
+        tracemalloc.start()
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    print(f"preferences_extract: {len(raw) / 1048576:.1f} MB Preferences")
+    print(f"preferences_extract: json.loads {full_parse * 1000:.0f} ms (peak {peaks[0] / 1048576:.0f} MB), "
+          f"extract {extract * 1000:.0f} ms (peak {peaks[1] / 1048576:.0f} MB of Python objects), {full_parse / extract:.1f}x")
+
+
+def bench_extension_states(extensions=60, prefs_kb=4096):
+    """Disabling many extensions: one set_extension_state_for_profile call each vs. one batch (correctness: tests/test_extension_states.py)."""
+    from profile_utils import set_extension_state_for_profile, set_extension_states_for_profile
+    import config
+    root = _make_user_data_dir(1, prefs_kb, extensions)
+    config.BACKUP_STORE_DIR = os.path.join(root, "backups") # Keep the benchmark's backups out of the real store
+    try:
+        quiet = lambda msg: None
+        profile_path = os.path.join(root, "Default")
+        with open(os.path.join(profile_path, "Preferences"), encoding='utf-8') as f:
+            ext_ids = list(json.load(f)["extensions"]["settings"])
+        start = time.perf_counter()
+        for ext_id in ext_ids:
+            set_extension_state_for_profile(profile_path, ext_id, 0, quiet)
+        one_by_one = time.perf_counter() - start
+        start = time.perf_counter()
+        set_extension_states_for_profile(profile_path, [(ext_id, 1) for ext_id in ext_ids], quiet)
+        batch = time.perf_counter() - start
+        print(f"extension_states: {len(ext_ids)} extensions, ~{prefs_kb} KB Preferences")
+        print(f"extension_states: one by one {one_by_one * 1000:.0f} ms, batch {batch * 1000:.0f} ms ({one_by_one / batch:.0f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_preferences_patch(prefs_mb=20, repeat=3):
+    """Extension state changes: in-place byte patch vs. decode and full rewrite (correctness: tests/test_preferences_patch.py)."""
+    from atomic_writer import write_json_atomic
+    from preferences_patch import patch_extension_states
+    root = tempfile.mkdtemp(prefix="chrome_bench_")
+    try:
+        path = os.path.join(root, "Preferences")
+        def write_raw(data):
+            with open(path, 'wb') as f: f.write(data)
+        def expected_after(document, states):
+            settings = document["extensions"]["settings"]
+            for ext_id, state in states.items():
+                if isinstance(settings.get(ext_id), dict): settings[ext_id]["state"] = state
+            return document
+
+        ids = [f"{'abcdefghijklmnop'[e % 16] * 31}{'abcdefghijklmnop'[e // 16]}" for e in range(40)]
+        filler = {f"https://site{i}.example.com:443,*": {"last_modified": "13300000000000000", "setting": {"lastEngagementTime": 1.3e16, "rawScore": 4.2}}
+                  for i in range(prefs_mb * 1024 * 1024 // 110)}
+        document = {"extensions": {"settings": {ext_id: {"state": 1, "manifest": {"name": ext_id}} for ext_id in ids}},
+                    "profile": {"content_settings": {"exceptions": {"site_engagement": filler}}}}
+        del filler
+        for label, dump in (("sorted keys, as Chrome writes", lambda d: json.dumps(d, separators=(',', ':'), sort_keys=True)),
+                            ("extensions after the large blob", lambda d: json.dumps({"profile": d["profile"], "extensions": d["extensions"]}, separators=(',', ':')))):
+            raw = dump(document).encode()
+            flips = [{ext_id: r % 2 for ext_id in ids} for r in range(repeat)]
+            write_raw(raw)
+            start = time.perf_counter()
+            for change in flips:
+                patch_extension_states(path, change)
+            patched = (time.perf_counter() - start) / repeat
+            write_raw(raw)
+            start = time.perf_counter()
+            for change in flips:
+                with open(path, 'rb') as f:
+                    parsed = json.loads(f.read())
+                write_json_atomic(path, expected_after(parsed, change))
+            rewrite = (time.perf_counter() - start) / repeat
+            print(f"preferences_patch: {len(raw) / 1048576:.1f} MB, {label}: patch {patched * 1000:.0f} ms, "
+                  f"full rewrite {rewrite * 1000:.0f} ms ({rewrite / patched:.1f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def bench_backup_store(prefs_kb=20480, operations=20):
+    """Backups taken before repeated toggles: BackupStore vs. one plain copy per operation."""
+    from backup_store import BackupStore
+    from preferences_patch import patch_extension_states # Not the batch API: that would back up into the real store
+    root = _make_user_data_dir(1, prefs_kb)
+    store_root = tempfile.mkdtemp(prefix="chrome_bench_store_")
+    try:
+        profile_path = os.path.join(root, "Default")
+        prefs_path = os.path.join(profile_path, "Preferences")
+        with open(prefs_path, encoding='utf-8') as f:
+            ext_ids = list(json.load(f)["extensions"]["settings"])[:4]
+        for compression in ("zz", "xz"):
+            store = BackupStore(os.path.join(store_root, compression), compression=compression)
+            backup_time = copy_time = 0.0
+            for op in range(operations): # Toggle a few extensions back and forth: few distinct versions
+                start = time.perf_counter()
+                store.backup_file(prefs_path, "Default", f"operation {op}")
+                backup_time += time.perf_counter() - start
+                start = time.perf_counter()
+                shutil.copyfile(prefs_path, os.path.join(store_root, f"copy{op}.bak"))
+                copy_time += time.perf_counter() - start
+                patch_extension_states(prefs_path, {ext_ids[op % len(ext_ids)]: op // len(ext_ids) % 2})
+            start = time.perf_counter()
+            listing = store.list("Default", "Preferences")
+            list_time = time.perf_counter() - start
+            start = time.perf_counter()
+            store.restore(listing[-1], os.path.join(store_root, "restored"))
+            restore_time = time.perf_counter() - start
+            stored, original = store.disk_usage()
+            print(f"backup_store [{compression}]: {operations} backups of {os.path.getsize(prefs_path) / 1048576:.1f} MB, "
+                  f"{len({e.hash for e in listing})} distinct: {stored / 1048576:.2f} MB on disk vs {original / 1048576:.0f} MB as copies")
+            print(f"backup_store [{compression}]: backup {backup_time / operations * 1000:.0f} ms/op (copy {copy_time / operations * 1000:.0f} ms), "
+                  f"list {list_time * 1000:.2f} ms, restore {restore_time * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(store_root, ignore_errors=True)
+
+
+def bench_bulk_profiles(profiles=12, prefs_kb=4096):
+    """Panic across every profile: bulk_extension_action with its default worker count vs. one worker."""
+    import config
+    from profile_utils import bulk_extension_action, panic_changes
+    root = _make_user_data_dir(profiles, prefs_kb)
+    config.BACKUP_STORE_DIR = os.path.join(root, "backups") # Keep the benchmark's backups out of the real store
+    try:
+        quiet = lambda msg: None
+        enable_all = lambda extensions: [(ext['id'], 1) for ext in extensions.values()]
+        timings = {}
+        for workers in (1, None):
+            bulk_extension_action(root, enable_all, quiet, max_workers=workers)
+            summary = bulk_extension_action(root, panic_changes, quiet, max_workers=workers)
+            assert all(o["success"] and o["applied"] for o in summary["profiles"]), summary
+            timings[workers] = summary
+        serial, parallel = timings[1], timings[None]
+        print(f"bulk_profiles: {profiles} profiles, ~{prefs_kb} KB Preferences each, {os.cpu_count()} CPU(s)")
+        print(f"bulk_profiles: one worker {serial['seconds'] * 1000:.0f} ms, default {parallel['seconds'] * 1000:.0f} ms "
+              f"(slowest profile {parallel['slowest'] * 1000:.0f} ms, sum of profiles {sum(o['seconds'] for o in serial['profiles']) * 1000:.0f} ms)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+BENCHMARKS = {name[len("bench_"):]: func for name, func in sorted(globals().items()) if name.startswith("bench_")}
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
@@ -0,0 +1,92 @@
+import time
+
+from blocklist_import import normalize_blocklist_entry
+from url_matcher import UrlMatcher, filter_identity, filter_rank, parse_filter
+
+
+def _broadness(url_filter):
+    """Sort key under which every filter comes after all the filters that cover it."""
+    return (url_filter.host.count(".") + bool(url_filter.host), not url_filter.match_subdomains, bool(url_filter.scheme),
+            url_filter.port is not None, len(url_filter.path), len(url_filter.query))
+
+
+def _may_overlap(a, b):
+    """False only when no URL can match both filters (different scheme, port or path branch)."""
+    if a.scheme and b.scheme and a.scheme != b.scheme: return False
+    if a.port is not None and b.port is not None and a.port != b.port: return False
+    return a.path.startswith(b.path) or b.path.startswith(a.path)
+
+
+def plan_compaction(entries, allow_entries=()):
+    """Works out the compacted form of a URLBlocklist.
+
+    `entries` is {index_str: url}. Returns (survivors, duplicates, covered): the normalized
+    entries to keep in index order, and the entries dropped because they repeat another one
+    (case, trailing slash, "*." spelling, query order) or because a broader entry that is
+    kept already blocks everything they block ("a.example.com" under "*.example.com"). An
+    entry is kept if an allowlist entry ranks between it and the broader one on a URL they
+    both match: without the entry, that allow entry would win.
+    """
+    unique, duplicates, seen = [], [], set()
+    for index in sorted(entries, key=int):
+        entry = normalize_blocklist_entry(str(entries[index]))
+        url_filter = parse_filter(entry)
+        if url_filter is None:
+            duplicates.append(entries[index]) # Empty entries
+            continue
+        identity = filter_identity(url_filter)
+        if identity in seen:
+            duplicates.append(entries[index])
+            continue
+        seen.add(identity)
+        unique.append((entry, url_filter))
+
+    matcher = UrlMatcher(entry for entry, _ in unique)
+    allow_matcher = UrlMatcher((), allow_entries)
+    kept, dropped = set(), set()
+    for entry, url_filter in sorted(unique, key=lambda item: _broadness(item[1])): # Covering entries are decided first
+        identity = filter_identity(url_filter)
+        broader = [filter_rank(depth, f) for depth, f in matcher.covering(url_filter) if filter_identity(f) in kept]
+        if broader:
+            floor, rank = max(broader), filter_rank(url_filter.host.count(".") + bool(url_filter.host), url_filter)
+            if not any(floor <= filter_rank(depth, allow) < rank and _may_overlap(allow, url_filter)
+                       for depth, allow in allow_matcher.host_filters(url_filter.host)):
+                dropped.add(identity)
+                continue
+        kept.add(identity)
+    survivors = [entry for entry, url_filter in unique if filter_identity(url_filter) in kept]
+    covered = [entry for entry, url_filter in unique if filter_identity(url_filter) in dropped]
+    return survivors, duplicates, covered
+
+
+def compact_blocklist(backend, dry_run=False, log_callback=print):
+    """Removes redundant URLBlocklist entries and renumbers the rest 1..n in one transaction.
+
+    Returns a stats dict: {"before", "after", "duplicates", "covered", "writes", "success", "message", "seconds"}.
+    """
+    start = time.perf_counter()
+    snapshot = backend.get_policy_snapshot()
+    if snapshot.error:
+        return {"success": False, "message": f"Could not read the blocklist ({snapshot.error})."}
+    entries, indices = snapshot.get_list("URLBlocklist")
+    allow_entries, _ = snapshot.get_list("URLAllowlist")
+    survivors, duplicates, covered = plan_compaction(entries, allow_entries.values())
+
+    transaction = backend.transaction(snapshot) # Entries already in place are not rewritten
+    for position, entry in enumerate(survivors, 1):
+        transaction.set("URLBlocklist", str(position), entry, "REG_SZ")
+    for index in indices:
+        if index > len(survivors): transaction.remove("URLBlocklist", str(index))
+    stats = {"before": len(entries), "after": len(survivors), "duplicates": len(duplicates), "covered": len(covered),
+             "writes": len(transaction), "success": True}
+    for entry in covered[:20]:
+        log_callback(f"Blocklist compaction: '{entry}' is already covered by a broader entry.")
+    if dry_run or not stats["writes"]:
+        stats["message"] = f"{len(entries) - len(survivors)} of {len(entries)} entries can be removed ({len(duplicates)} duplicate(s), {len(covered)} covered), {stats['writes']} write(s)."
+    else:
+        result = transaction.commit()
+        stats["success"] = result.success
+        stats["message"] = (f"Removed {len(entries) - len(survivors)} of {len(entries)} entries ({len(duplicates)} duplicate(s), "
+                            f"{len(covered)} covered); {len(survivors)} renumbered 1-{len(survivors)}." if result.success else result.summary())
+    stats["seconds"] = time.perf_counter() - start
+    return stats
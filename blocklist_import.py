@@ -0,0 +1,122 @@
+import ipaddress
+import os
+import time
+
+# Names every hosts file contains
+_LOCAL_NAMES = {"localhost", "localhost.localdomain", "local", "broadcasthost", "ip6-localhost", "ip6-loopback",
+                "ip6-localnet", "ip6-mcastprefix", "ip6-allnodes", "ip6-allrouters", "0.0.0.0"}
+
+
+def _is_hosts_address(field):
+    """True for the address column of a hosts line: any IPv4/IPv6 literal (or the "0" shorthand)."""
+    if field == "0": return True
+    try:
+        ipaddress.ip_address(field)
+        return True
+    except ValueError:
+        return False
+
+
+def normalize_blocklist_entry(entry):
+    """Canonical form of a URLBlocklist entry, used to compare entries.
+
+    Lowercases the scheme and host, drops a trailing dot on the host and a lone "/" path,
+    so "HTTP://Example.COM./" and "http://example.com" count as the same entry.
+    """
+    entry = entry.strip()
+    if not entry: return ""
+    scheme_end = entry.find("://")
+    scheme = entry[:scheme_end + 3].lower() if scheme_end > 0 else ""
+    rest = entry[len(scheme):]
+    end = len(rest)
+    for sep in "/?":
+        i = rest.find(sep)
+        if i != -1 and i < end: end = i
+    host, tail = rest[:end].lower(), rest[end:]
+    if host.endswith(".") and host != ".": host = host.rstrip(".")
+    if tail == "/": tail = ""
+    return scheme + host + tail
+
+
+def parse_blocklist_line(line):
+    """Entries on one line of a hosts file ("0.0.0.0 ads.example.com") or a domain list.
+
+    Comments (#, !), local names and adblock-style "||example.com^" markers are handled.
+    """
+    hash_pos = line.find("#")
+    if hash_pos != -1: line = line[:hash_pos]
+    line = line.strip()
+    if not line or line.startswith(("!", "[")): return []
+    parts = line.split()
+    if len(parts) > 1 and _is_hosts_address(parts[0]):
+        parts = parts[1:]
+    elif len(parts) > 1: # Not a hosts line: "domain  comment" style lists only name the first field
+        parts = parts[:1]
+    entries = []
+    for part in parts:
+        if part.startswith("||"): part = part[2:].rstrip("^")
+        entry = normalize_blocklist_entry(part)
+        if entry and entry not in _LOCAL_NAMES:
+            entries.append(entry)
+    return entries
+
+
+def bulk_import_blocklist(backend, filepath, batch_size=2000, progress_callback=None, cancel_event=None, log_callback=print):
+    """Streams a hosts file or domain list into URLBlocklist.
+
+    The current list is read once; new entries are deduped against it (and each other) in
+    memory, take consecutive indices after the highest existing one and are committed in
+    transactions of `batch_size` entries. progress_callback(fraction, added) is called after
+    every batch; setting cancel_event stops the import (already committed batches stay).
+    Returns a stats dict: {"lines", "added", "duplicates", "batches", "failed", "cancelled", "seconds"}.
+    """
+    start = time.perf_counter()
+    stats = {"lines": 0, "added": 0, "duplicates": 0, "batches": 0, "failed": 0, "cancelled": False, "seconds": 0.0}
+    snapshot = backend.get_policy_snapshot()
+    if snapshot.error:
+        raise OSError(f"Could not read the current blocklist ({snapshot.error}).")
+    current, indices = snapshot.get_list("URLBlocklist")
+    seen = {normalize_blocklist_entry(str(url)) for url in current.values()}
+    next_index = max(indices) + 1 if indices else 1
+    total_bytes = os.path.getsize(filepath) or 1
+
+    pending = []
+    def _commit(read_bytes):
+        nonlocal pending
+        transaction = backend.transaction()
+        for index, entry in pending:
+            transaction.set("URLBlocklist", str(index), entry, "REG_SZ")
+        result = transaction.commit()
+        stats["batches"] += 1
+        if result.success:
+            stats["added"] += len(pending)
+        else:
+            stats["failed"] += len(result.failures)
+            stats["added"] += len(pending) - len(result.failures)
+            log_callback(f"Blocklist import: batch {stats['batches']} failed: {result.summary()}")
+        pending = []
+        if progress_callback: progress_callback(read_bytes / total_bytes, stats["added"])
+
+    read_bytes = 0
+    with open(filepath, 'rb') as f: # Binary, so progress can follow the bytes read
+        for raw_line in f:
+            read_bytes += len(raw_line)
+            stats["lines"] += 1
+            for entry in parse_blocklist_line(raw_line.decode('utf-8', errors='replace')):
+                if entry in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(entry)
+                pending.append((next_index, entry))
+                next_index += 1
+            if len(pending) >= batch_size:
+                _commit(read_bytes)
+            if cancel_event is not None and stats["lines"] % 1000 == 0 and cancel_event.is_set():
+                stats["cancelled"] = True # Entries of the unfinished batch are dropped
+                break
+    if pending and not stats["cancelled"]:
+        _commit(read_bytes)
+    elif progress_callback and not stats["cancelled"]:
+        progress_callback(1.0, stats["added"])
+    stats["seconds"] = time.perf_counter() - start
+    return stats
@@ -4,3 +4,8 @@ CURRENT_VERSION = "12.0"
 LICENSE_FILE = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "ChromeManagerLicense.dat")
 CACHE_FILE = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "ChromeManagerCache.json")
 ACTIVATION_URL = "https://script.google.com/macros/s/AKfycbzuN6kjcuHIsnWo0XlFIlyoIH-m3O89eDOCnuo5FdpFmftT1YnubR_EynkP1AtAauq-XQ/exec" # USER'S URL PASTED
+POLICY_TEMPLATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policy_templates.json") # Chrome's policy_templates.json, optional
+CATALOG_CACHE_FILE = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "ChromeManagerPolicyCatalog.cache")
+BACKUP_STORE_DIR = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "ChromeManagerBackups") # Preferences backups, one store per user data dir
+BACKUP_KEEP_LAST = 50 # Backups kept per profile file
+BACKUP_MAX_AGE_DAYS = 90 # Older backups are dropped (the newest one of each profile file is always kept)
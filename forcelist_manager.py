@@ -0,0 +1,118 @@
+import csv
+import io
+import re
+import threading
+
+FORCELIST_KEY = "ExtensionInstallForcelist"
+DEFAULT_UPDATE_URL = "https://clients2.google.com/service/update2/crx" # Chrome Web Store
+EXTENSION_ID_RE = re.compile(r'^[a-p]{32}$') # Extension IDs are 32 characters from a-p
+_HEADER_WORDS = {"id", "extension_id", "extension", "update_url", "url"}
+
+
+def parse_extension_entries(text):
+    """Reads extension IDs from free text or CSV.
+
+    IDs may be separated by whitespace or commas. An update URL can follow its ID as
+    "id;update_url" (the policy's own format) or as the next CSV field; a header row
+    is ignored. Returns ([(ext_id, update_url or None), ...], [invalid tokens]).
+    """
+    entries, invalid = [], []
+    for row in csv.reader(io.StringIO(text)):
+        for token in (t for field in row for t in field.split()):
+            ext_id, _, update_url = token.partition(";")
+            if "://" in ext_id: # URL column of an "id,update_url" row
+                if entries and entries[-1][1] is None: entries[-1] = (entries[-1][0], ext_id)
+                continue
+            ext_id = ext_id.lower()
+            if EXTENSION_ID_RE.match(ext_id):
+                entries.append((ext_id, update_url or None))
+            elif ext_id not in _HEADER_WORDS:
+                invalid.append(token)
+    return entries, invalid
+
+
+class ForcelistManager:
+    """ID <-> index view of the ExtensionInstallForcelist policy for bulk changes.
+
+    The map is rebuilt only when the backend hands out a new snapshot (with PolicyCache that
+    means only after the store changed), so repeated adds do not re-read and re-parse the
+    list. Adds are validated, deduped and written as one transaction.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self._snapshot = None
+        self._by_id = {} # ext_id -> (index, update_url)
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        snapshot = self.backend.get_policy_snapshot()
+        with self._lock:
+            if snapshot is not self._snapshot:
+                entries, _ = snapshot.get_list(FORCELIST_KEY)
+                by_id = {}
+                for index, value in entries.items():
+                    ext_id, _, update_url = str(value).partition(";")
+                    by_id[ext_id.strip()] = (int(index), update_url.strip())
+                self._snapshot, self._by_id = snapshot, by_id
+            return snapshot
+
+    def entries(self):
+        """[(index, ext_id, update_url), ...] sorted by index."""
+        self.refresh()
+        return sorted((index, ext_id, url) for ext_id, (index, url) in self._by_id.items())
+
+    def index_of(self, ext_id):
+        self.refresh()
+        entry = self._by_id.get(ext_id)
+        return entry[0] if entry else None
+
+    def add_extensions(self, entries, default_update_url=DEFAULT_UPDATE_URL, log_callback=print):
+        """Force-installs many extensions with one write.
+
+        `entries` are (ext_id, update_url or None) pairs or bare IDs. IDs that are invalid
+        or already in the list are skipped. Returns a dict: {"added", "skipped", "invalid",
+        "success", "message"}.
+        """
+        snapshot = self.refresh()
+        if snapshot.error:
+            return {"added": [], "skipped": [], "invalid": [], "success": False, "message": f"Could not read the policy ({snapshot.error})."}
+        added, skipped, invalid, adding = [], [], [], set()
+        used = {index for index, _ in self._by_id.values()}
+        next_index = max(used) + 1 if used else 1
+        transaction = self.backend.transaction()
+        for entry in entries:
+            ext_id, update_url = (entry, None) if isinstance(entry, str) else entry
+            ext_id = ext_id.strip().lower()
+            if not EXTENSION_ID_RE.match(ext_id):
+                invalid.append(ext_id)
+                continue
+            if ext_id in self._by_id or ext_id in adding:
+                skipped.append(ext_id)
+                continue
+            transaction.set(FORCELIST_KEY, str(next_index), f"{ext_id};{update_url or default_update_url}", "REG_SZ")
+            added.append((ext_id, next_index))
+            adding.add(ext_id)
+            next_index += 1
+        for ext_id in skipped:
+            log_callback(f"Forcelist: {ext_id} is already in the policy list (index {self._by_id[ext_id][0] if ext_id in self._by_id else '?'}).")
+        for ext_id in invalid:
+            log_callback(f"Forcelist: '{ext_id}' is not a valid extension ID.")
+        if not added:
+            return {"added": [], "skipped": skipped, "invalid": invalid, "success": True, "message": "No new extensions to add."}
+        result = transaction.commit()
+        if not result.success:
+            return {"added": [], "skipped": skipped, "invalid": invalid, "success": False, "message": result.summary()}
+        return {"added": added, "skipped": skipped, "invalid": invalid, "success": True,
+                "message": f"{len(added)} extension(s) added, {len(skipped)} already present, {len(invalid)} invalid."}
+
+    def remove_extensions(self, ext_ids):
+        """Removes extensions by ID in one write. Returns (success, message)."""
+        self.refresh()
+        indices = [self._by_id[ext_id][0] for ext_id in ext_ids if ext_id in self._by_id]
+        if not indices:
+            return True, "None of the extensions are in the policy list."
+        transaction = self.backend.transaction()
+        for index in indices:
+            transaction.remove(FORCELIST_KEY, str(index))
+        result = transaction.commit()
+        return result.success, result.summary()
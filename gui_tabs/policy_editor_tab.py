@@ -1,22 +1,53 @@
 import tkinter as tk
-from tkinter import simpledialog, messagebox
+from tkinter import simpledialog, messagebox, filedialog
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-import json # For handling policy data in tags
+import time
 
-# Assuming policy_definitions.py is accessible
-import policy_definitions
+from policy_catalog import load_catalog
+from policy_state import save_policy_state, import_policy_state
+from policy_reconcile import load_spec, reconcile
 
 class PolicyEditorTab(tb.Frame):
+    REFRESH_DEBOUNCE_MS = 400 # Refresh requests arriving within this window collapse into one re-read
+    RENDER_BUDGET_MS = 12 # Longest the UI thread may spend on tree updates before yielding to the event loop
+
     def __init__(self, master, app_instance, **kwargs):
         super().__init__(master, padding=10, **kwargs)
         self.app = app_instance # Reference to the main Application instance
+        self.policy_snapshot = None # Last PolicySnapshot read from the policy manager
+        self._policy_rows = {} # (key, value_name) -> (policy id / tree item id, policy item), for in-place row updates
+        self._refresh_after_id = None
+        self._refresh_running = False
+        self._refresh_pending = False
+        self._render_generation = 0
+        self.catalog = None # PolicyCatalog, loaded on the first refresh (off the UI thread)
+        self._policy_model = [] # [(category, [policy id, ...]), ...] of the last load
+        self._row_values = {} # policy id -> (status, display value), formatted lazily for visible rows
+        self._value_overrides = {} # (key, value_name) -> value reported by change notifications since the snapshot
+        self._categories = {} # category tree iid -> [policy id, ...]
+        self._loaded_categories = set() # Category iids whose rows have all been inserted
+        self._longest_ui_block = 0.0
+        self._search_after_id = None
         self._create_widgets()
+        if self.app.policy_manager and hasattr(self.app.policy_manager, 'add_listener'):
+            self.app.policy_manager.add_listener(self._on_policy_changes)
 
     def _create_widgets(self):
         header = tb.Frame(self)
         header.pack(fill=X, pady=5)
         tb.Label(header, text="Apply system-wide Chrome settings. Changes affect ALL users on this computer and require a browser restart.", bootstyle='info').pack(side=LEFT)
+        tb.Button(header, text="Refresh", bootstyle="secondary-outline", command=self.request_refresh).pack(side=RIGHT)
+        tb.Button(header, text="Reconcile...", bootstyle="secondary-outline", command=self.reconcile_spec_ui).pack(side=RIGHT, padx=(5, 0))
+        tb.Button(header, text="Import...", bootstyle="secondary-outline", command=self.import_policy_state_ui).pack(side=RIGHT, padx=5)
+        tb.Button(header, text="Export...", bootstyle="secondary-outline", command=self.export_policy_state_ui).pack(side=RIGHT)
+
+        search_frame = tb.Frame(self)
+        search_frame.pack(fill=X, pady=5)
+        tb.Label(search_frame, text="Search policies:").pack(side=LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', self._on_search_changed)
+        tb.Entry(search_frame, textvariable=self.search_var).pack(side=LEFT, fill=X, expand=True)
 
         tree_frame = tb.Frame(self)
         tree_frame.pack(fill=BOTH, expand=True, pady=5)
@@ -36,83 +67,275 @@ class PolicyEditorTab(tb.Frame):
         scrollbar.pack(side=RIGHT, fill=Y)
 
         self.policy_tree.bind("<Double-1>", self.on_policy_edit_ui)
+        self.policy_tree.bind("<<TreeviewOpen>>", self._on_tree_open)
 
     def load_initial_data(self):
         self.app.log("Policy Editor: Loading policies...")
-        # Run populate_policy_editor_ui in a thread as it involves registry access
-        self.app.run_task_in_thread(self.populate_policy_editor_ui)
+        # populate_policy_editor_ui runs in a thread as it involves registry access
+        self.request_refresh(0)
+
+    def request_refresh(self, delay_ms=None):
+        """Requests a full re-read of the policy tree. Safe to call from any thread.
+
+        Requests are debounced: a burst of them results in a single refresh, and a request
+        made while a refresh is running queues exactly one follow-up refresh.
+        """
+        self.app.after(0, self._schedule_refresh, self.REFRESH_DEBOUNCE_MS if delay_ms is None else delay_ms)
+
+    def _schedule_refresh(self, delay_ms):
+        if self._refresh_after_id is not None:
+            self.after_cancel(self._refresh_after_id)
+        self._refresh_after_id = self.after(delay_ms, self._start_refresh)
+
+    def _start_refresh(self):
+        self._refresh_after_id = None
+        if self._refresh_running:
+            self._refresh_pending = True
+            return
+        self._refresh_running = True
+        self.app.run_task_in_thread(self._refresh_task)
 
-    def populate_policy_editor_ui(self):
-        # This method will run in a thread, so UI updates must be scheduled with self.app.after
+    def _refresh_task(self):
+        try:
+            self.populate_policy_editor_ui()
+        finally:
+            self.app.after(0, self._refresh_done)
 
-        # Clear treeview (must be done in main thread)
-        def _clear_tree():
-            if not self.winfo_exists(): return
-            for item in self.policy_tree.get_children():
-                self.policy_tree.delete(item)
-        self.app.after(0, _clear_tree)
+    def _refresh_done(self):
+        self._refresh_running = False
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self._start_refresh()
 
+    def populate_policy_editor_ui(self):
+        """Worker-thread loader: reads one snapshot (and the catalog on first use), then posts
+        them to the UI thread in a single call. No policy store access happens on the UI thread."""
         if not self.app.policy_manager:
             self.app.log("Policy Editor Error: Policy Manager not available.")
             return
 
-        for category, policies in policy_definitions.POLICIES.items():
-            # Insert category (must be done in main thread)
-            def _insert_category(cat, pol_list):
-                if not self.winfo_exists(): return
-                category_id = self.policy_tree.insert("", "end", text=cat, open=True, tags=('category',))
-                for policy_item in pol_list:
-                    current_value = self.app.policy_manager.get_policy_value(policy_item['key'], policy_item['value_name'])
-                    status = "🟢 Set" if current_value is not None else "⚪ Not Configured"
-                    display_value = current_value if current_value is not None else "N/A"
-
-                    if current_value is not None and policy_item['type'] == 'REG_DWORD':
-                        try:
-                            current_int_value = int(current_value) # Registry usually returns decimal for DWORD via query
-                            # If it's hex from reg.exe output, int(current_value, 16)
-                            # For simplicity, assuming get_policy_value standardizes or we handle it here
-                            for option_name, option_val in policy_item['options'].items():
-                                if option_val == current_int_value:
-                                    display_value = option_name
-                                    break
-                        except (ValueError, TypeError) as e:
-                            self.app.log(f"Policy Editor: Error parsing DWORD value '{current_value}' for {policy_item['name']}: {e}")
-
-                    # Policy item data stored as JSON in tags for easy retrieval
-                    self.policy_tree.insert(category_id, "end", text=policy_item['name'], values=(status, display_value), tags=(json.dumps(policy_item),))
-
-            self.app.after(0, _insert_category, category, policies)
-        self.app.log("Policy Editor: Policies populated.")
+        # One read of the whole policy tree; every row is resolved from this snapshot
+        snapshot = self.app.policy_manager.get_policy_snapshot()
+        if snapshot.error:
+            self.app.log(f"Policy Editor: Could not read policies ({snapshot.error}).")
+
+        if self.catalog is None:
+            self._load_catalog() # Compiled/cached once, then reused
+            self.app.log(f"Policy Editor: Catalog of {len(self.catalog)} policies loaded ({self.catalog.source}).")
+        self.app.after(0, self._set_policy_model, self.catalog.categories, snapshot)
+
+    def _load_catalog(self):
+        self.catalog = load_catalog(log_callback=self.app.log)
+        self.app.policy_manager.use_catalog(self.catalog) # The JSON backend needs the catalog's boolean policies
+
+    def _set_policy_model(self, model, snapshot):
+        """UI thread: shows the categories of a freshly loaded model. Their rows are only
+        inserted (and their values only formatted) when a category is expanded."""
+        if not self.winfo_exists(): return
+        start = time.perf_counter()
+        self._longest_ui_block = 0.0 # Measured per load
+        self._render_generation += 1
+        self._policy_model, self.policy_snapshot = model, snapshot
+        self._value_overrides, self._row_values = {}, {}
+        self._policy_rows = {(item['key'], item['value_name']): (pid, item) for pid, item in self.catalog.policies.items()}
+        for item in self.policy_tree.get_children():
+            self.policy_tree.delete(item)
+        self._categories, self._loaded_categories = {}, set()
+        for position, (category, ids) in enumerate(model):
+            category_iid = f"category:{position}"
+            self._categories[category_iid] = ids
+            self.policy_tree.insert("", "end", iid=category_iid, text=f"{category} ({len(ids)})", open=False, tags=('category',))
+            self.policy_tree.insert(category_iid, "end", iid=f"{category_iid}:placeholder", text="Loading...", tags=('category',))
+        self._note_ui_block(start)
+        if self.search_var.get().strip() and model:
+            self._apply_search(on_done=self._log_model_ready) # The load ends with the last filter slice
+        else:
+            self._log_model_ready()
+
+    def _log_model_ready(self):
+        self.app.log(f"Policy Editor: {len(self.catalog)} policies in {len(self._policy_model)} categories ready "
+                     f"(longest UI block {self._longest_ui_block * 1000:.1f} ms).")
+
+    def _note_ui_block(self, start):
+        self._longest_ui_block = max(self._longest_ui_block, time.perf_counter() - start)
+
+    def _run_in_slices(self, steps, on_done=None):
+        """Runs the callables in `steps` on the UI thread, yielding to the event loop whenever a
+        slice has taken RENDER_BUDGET_MS. Abandoned when a newer model or filter is rendered."""
+        generation = self._render_generation
+        def _slice():
+            if generation != self._render_generation or not self.winfo_exists(): return
+            start = time.perf_counter()
+            deadline = start + self.RENDER_BUDGET_MS / 1000
+            for step in steps:
+                step()
+                if time.perf_counter() >= deadline:
+                    self._note_ui_block(start)
+                    self.after(1, _slice)
+                    return
+            self._note_ui_block(start)
+            if on_done: on_done()
+        _slice()
+
+    def _current_value(self, policy_item):
+        key = (policy_item['key'], policy_item['value_name'])
+        if key in self._value_overrides: return self._value_overrides[key] # Newer than the snapshot
+        return self.policy_snapshot.get(*key) if self.policy_snapshot else None
+
+    def _values_for(self, pid):
+        """(status, display value) of a row, formatted the first time the row becomes visible."""
+        if pid not in self._row_values:
+            self._row_values[pid] = self._format_policy_value(self.catalog.get(pid), self._current_value(self.catalog.get(pid)))
+        return self._row_values[pid]
+
+    def _place_row(self, category_iid, pid, index):
+        """Inserts a policy row at `index`, or moves it there (re-attaching it) if it exists already."""
+        if self.policy_tree.exists(pid):
+            self.policy_tree.move(pid, category_iid, index)
+        else:
+            self.policy_tree.insert(category_iid, index, iid=pid, text=self.catalog.get(pid)['name'], values=self._values_for(pid), tags=('policy',))
+
+    def _load_category(self, category_iid):
+        """Materializes all rows of a category (on first expand)."""
+        if category_iid in self._loaded_categories or category_iid not in self._categories: return
+        if self.search_var.get().strip(): return # The filter decides which rows are shown
+        placeholder = f"{category_iid}:placeholder"
+        if self.policy_tree.exists(placeholder):
+            self.policy_tree.delete(placeholder)
+        ids = self._categories[category_iid]
+        steps = (lambda i=i, pid=pid: self._place_row(category_iid, pid, i) for i, pid in enumerate(ids))
+        self._run_in_slices(steps, on_done=lambda: self._loaded_categories.add(category_iid))
+
+    def _on_tree_open(self, event=None):
+        category_iid = self.policy_tree.focus()
+        if category_iid in self._categories:
+            self._load_category(category_iid)
+
+    def _format_policy_value(self, policy_item, current_value):
+        """Returns the (status, display value) columns for a policy row."""
+        status = "🟢 Set" if current_value is not None else "⚪ Not Configured"
+        display_value = current_value if current_value is not None else "N/A"
+
+        if current_value is not None and "text" not in policy_item['options']:
+            try:
+                # Snapshot already decodes 0x.. DWORDs to int; string-enum options compare as strings
+                comparable = int(current_value) if policy_item['type'] == 'REG_DWORD' else str(current_value)
+                for option_name, option_val in policy_item['options'].items():
+                    if option_val == comparable:
+                        display_value = option_name
+                        break
+            except (ValueError, TypeError) as e:
+                self.app.log(f"Policy Editor: Error parsing DWORD value '{current_value}' for {policy_item['name']}: {e}")
+        return status, display_value
+
+    def _on_search_changed(self, *args):
+        """Filters as the user types; keystrokes within 150 ms are handled as one."""
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(150, self._apply_search)
+
+    def _apply_search(self, on_done=None):
+        """Shows only matching rows by detaching/re-attaching tree items; nothing is rebuilt.
+
+        Categories that were never expanded only get their matching rows inserted; clearing
+        the search collapses them back to their placeholder. `on_done` runs after the last slice.
+        """
+        self._search_after_id = None
+        if not self._policy_model: return
+        self._render_generation += 1 # Supersedes a filter or category load still running in slices
+        query = self.search_var.get().strip()
+        matches = set(self.catalog.search(query)) if query else None
+        steps = []
+        visible_categories = 0
+        for category_iid, ids in self._categories.items():
+            shown = ids if matches is None else [pid for pid in ids if pid in matches]
+            if not shown:
+                steps.append(lambda c=category_iid: self.policy_tree.detach(c))
+                continue
+            steps.append(lambda c=category_iid, pos=visible_categories: self.policy_tree.move(c, "", pos))
+            visible_categories += 1
+            if matches is None and category_iid not in self._loaded_categories:
+                steps.append(lambda c=category_iid: self._collapse_to_placeholder(c))
+                continue
+            for i, pid in enumerate(shown):
+                steps.append(lambda c=category_iid, pid=pid, i=i: self._place_row(c, pid, i))
+            steps.append(lambda c=category_iid, keep=set(shown), is_search=matches is not None: self._detach_rows_except(c, keep, is_search))
+        self._run_in_slices(iter(steps), on_done)
+
+    def _detach_rows_except(self, category_iid, keep, is_search):
+        for child in self.policy_tree.get_children(category_iid):
+            if child not in keep:
+                self.policy_tree.detach(child)
+        if is_search:
+            self.policy_tree.item(category_iid, open=True)
+
+    def _collapse_to_placeholder(self, category_iid):
+        children = self.policy_tree.get_children(category_iid)
+        if children: self.policy_tree.detach(*children)
+        placeholder = f"{category_iid}:placeholder"
+        if self.policy_tree.exists(placeholder): self.policy_tree.move(placeholder, category_iid, 0)
+        else: self.policy_tree.insert(category_iid, 0, iid=placeholder, text="Loading...", tags=('category',))
+        self.policy_tree.item(category_iid, open=False)
+
+    def _on_policy_changes(self, changes, source):
+        """PolicyCache listener (background thread): hand the changed values to the UI thread."""
+        self.app.after(0, self._update_policy_rows, changes, source)
+
+    def _update_policy_rows(self, changes, source):
+        """Updates only the rows whose values changed, instead of rebuilding the tree."""
+        if not self.winfo_exists(): return
+        updated = 0
+        for (key_name, value_name), (_, new_value) in changes.items():
+            row = self._policy_rows.get((key_name, value_name))
+            if not row: continue
+            self._value_overrides[(key_name, value_name)] = new_value
+            self._row_values.pop(row[0], None) # Reformatted when the row is (next) shown
+            if not self.policy_tree.exists(row[0]): continue # Not materialized yet
+            self.policy_tree.item(row[0], values=self._values_for(row[0]))
+            updated += 1
+        if updated and source == "external":
+            self.app.log(f"Policy Editor: {updated} policy value(s) changed outside this app; rows updated.")
+
+    def _refresh_policy_row(self, policy):
+        """Re-reads one policy (from the cached snapshot) and updates just its row. Runs in a thread."""
+        current_value = self.app.policy_manager.get_policy_snapshot().get(policy['key'], policy['value_name'])
+        self.app.after(0, self._update_policy_rows, {(policy['key'], policy['value_name']): (None, current_value)}, "local")
+
+    def _get_current_value(self, policy):
+        """Current value of a policy: last snapshot plus the changes reported since."""
+        return self._current_value(policy)
 
     def on_policy_edit_ui(self, event):
         item_id = self.policy_tree.focus()
         if not item_id: return
 
-        item = self.policy_tree.item(item_id)
-        tags = item.get('tags')
-
+        tags = self.policy_tree.item(item_id).get('tags')
         if not tags or 'category' in tags : return # Clicked on category row or no tags
 
-        try:
-            policy_data_str = tags[0] # First tag should be the JSON string
-            policy = json.loads(policy_data_str)
-        except (IndexError, json.JSONDecodeError) as e:
-            self.app.log(f"Policy Editor Error: Could not decode policy data from Treeview tag: {e}. Tag: {tags}")
+        policy = self.catalog.get(item_id) if self.catalog else None # Row IDs are policy IDs
+        if policy is None:
+            self.app.log(f"Policy Editor Error: No policy definition found for row '{item_id}'.")
             messagebox.showerror("Error", "Could not load policy details.", parent=self)
             return
 
-        if "text" in policy['options']: # REG_SZ type with free text input
-            current_full_value = self.app.policy_manager.get_policy_value(policy['key'], policy['value_name'])
+        if "text" in policy['options']: # Free text input (strings, numbers, JSON)
+            current_full_value = self._get_current_value(policy)
             new_value = simpledialog.askstring(
                 "Set Policy",
                 f"Enter value for:\n{policy['name']}\n\nHelp: {policy['help']}",
                 initialvalue=current_full_value if current_full_value is not None else "",
                 parent=self # Ensure dialog is child of this tab or app window
             )
+            if new_value is not None and policy['type'] == 'REG_DWORD': # Numeric policies ('int' in the catalog)
+                try:
+                    new_value = int(new_value.strip(), 0)
+                except ValueError:
+                    messagebox.showerror("Invalid Value", f"'{new_value}' is not a number.", parent=self)
+                    return
             if new_value is not None: # User provided a value (could be empty string)
                 self.app.run_task_in_thread(self._apply_single_policy_task, None, policy, new_value)
 
-        else: # REG_DWORD type with predefined options
+        else: # Predefined options (DWORD or string enums)
             dialog = tb.Toplevel(title=f"Set Policy: {policy['name']}", parent=self.app) # Parent to app for modality
             dialog.transient(self.app) # Make it transient to the main app window
             dialog.grab_set() # Make modal
@@ -121,39 +344,45 @@ class PolicyEditorTab(tb.Frame):
 
             tb.Label(dialog, text=f"{policy['name']}\n\nHelp: {policy['help']}", wraplength=380, justify="left").pack(padx=10, pady=(10,5))
 
-            var = tk.IntVar()
-            current_policy_val_str = self.app.policy_manager.get_policy_value(policy['key'], policy['value_name'])
+            # The radio variable holds the option's position, so int and string option values work alike
+            option_values = list(policy['options'].values())
+            var = tk.IntVar(value=-1) # -1 as unselected
+            current_policy_val = self._get_current_value(policy)
 
             # Set initial radio button selection
             initial_selection_done = False
-            if current_policy_val_str is not None:
+            if current_policy_val is not None:
                 try:
-                    current_val_int = int(current_policy_val_str) # Assuming decimal from get_policy_value
-                    var.set(current_val_int)
-                    initial_selection_done = True
+                    comparable = int(current_policy_val) if policy['type'] == 'REG_DWORD' else str(current_policy_val)
+                    if comparable in option_values:
+                        var.set(option_values.index(comparable))
+                        initial_selection_done = True
                 except ValueError:
-                     self.app.log(f"Policy Editor: Could not parse current value '{current_policy_val_str}' for {policy['name']} as int.")
+                     self.app.log(f"Policy Editor: Could not parse current value '{current_policy_val}' for {policy['name']} as int.")
 
             if not initial_selection_done:
                  # Try to find a "Default" option if current value is not set or not parseable
-                default_option_val = policy['options'].get("Default Enabled", policy['options'].get("Default", -2)) # -2 as unselected
-                var.set(default_option_val)
+                for default_name in ("Default Enabled", "Default"):
+                    if default_name in policy['options']:
+                        var.set(list(policy['options']).index(default_name))
+                        break
 
 
             options_frame = tb.Frame(dialog, padding=10)
             options_frame.pack(fill=X, expand=True)
 
-            for text, val in policy['options'].items():
-                rb = tb.Radiobutton(options_frame, text=text, variable=var, value=val)
+            for position, text in enumerate(policy['options']):
+                rb = tb.Radiobutton(options_frame, text=text, variable=var, value=position)
                 rb.pack(anchor='w', pady=2)
-                if val == var.get(): # Ensure the correct one is selected if var was set
-                    rb.invoke()
 
             btn_frame = tb.Frame(dialog, padding=(0,10))
             btn_frame.pack(fill=X)
 
             def on_ok():
-                selected_value = var.get()
+                if var.get() < 0: # Nothing selected
+                    dialog.destroy()
+                    return
+                selected_value = option_values[var.get()]
                 dialog.destroy()
                 self.app.run_task_in_thread(self._apply_single_policy_task, None, policy, selected_value)
 
@@ -189,9 +418,9 @@ class PolicyEditorTab(tb.Frame):
         else:
             self.app.log(f"Policy Editor: Failed to apply policy '{policy['name']}': {msg}")
             self.app.after(0, lambda: messagebox.showerror("Policy Error", f"Failed to apply policy '{policy['name']}':\n{msg}", parent=self.app))
+            self.request_refresh() # Resync everything after a failed write
 
-        # Refresh the entire policy editor UI (could be optimized to update one row)
-        self.app.run_task_in_thread(self.populate_policy_editor_ui)
+        self._refresh_policy_row(policy)
 
     def _remove_single_policy_task(self, policy):
         self.app.log(f"Policy Editor: Resetting policy '{policy['name']}' to default...")
@@ -208,15 +437,111 @@ class PolicyEditorTab(tb.Frame):
             # Only show error if it's not a "not found" type of message, which is fine for a reset
             if "was not found" not in msg and "ERROR:" in msg :
                  self.app.after(0, lambda: messagebox.showerror("Policy Error", f"Failed to reset policy '{policy['name']}':\n{msg}", parent=self.app))
-
-        self.app.run_task_in_thread(self.populate_policy_editor_ui)
+            self.request_refresh()
+
+        self._refresh_policy_row(policy)
+
+    def export_policy_state_ui(self):
+        if not self.app.policy_manager: return
+        filepath = filedialog.asksaveasfilename(
+            title="Export Chrome Policies",
+            defaultextension=".json",
+            filetypes=[("Policy State Files", "*.json"), ("All files", "*.*")],
+            initialfile=f"chrome_policies_{time.strftime('%Y%m%d_%H%M%S')}.json",
+            parent=self
+        )
+        if filepath:
+            self.app.run_task_in_thread(self._export_policy_state_task, None, filepath)
+
+    def _export_policy_state_task(self, filepath):
+        snapshot = self.app.policy_manager.get_policy_snapshot()
+        if snapshot.error:
+            self.app.log(f"Policy Export failed: could not read policies ({snapshot.error}).")
+            self.app.after(0, lambda: messagebox.showerror("Export Failed", f"Could not read the current policies ({snapshot.error}).", parent=self.app))
+            return
+        try:
+            count = save_policy_state(snapshot, filepath)
+        except OSError as e:
+            self.app.log(f"Policy Export failed: {e}")
+            self.app.after(0, lambda: messagebox.showerror("Export Failed", f"Could not write the export file.\nError: {e}", parent=self.app))
+            return
+        self.app.log(f"Policy Export: {count} policy value(s) saved to {filepath}")
+        self.app.after(0, lambda: messagebox.showinfo("Export Complete", f"Exported {count} policy value(s) to:\n{filepath}", parent=self.app))
+
+    def import_policy_state_ui(self):
+        if not self.app.policy_manager: return
+        filepath = filedialog.askopenfilename(
+            title="Import Chrome Policies",
+            filetypes=[("Policy State Files", "*.json"), ("All files", "*.*")],
+            parent=self
+        )
+        if not filepath: return
+        prune = messagebox.askyesnocancel("Import Policies",
+                                          "Also reset policies that are not in the file?\n\n"
+                                          "Yes: make this computer match the file exactly.\n"
+                                          "No: only set the values from the file.", parent=self)
+        if prune is None: return
+        self.app.run_task_in_thread(self._import_policy_state_task, None, filepath, prune)
+
+    def _import_policy_state_task(self, filepath, prune):
+        start = time.perf_counter()
+        success, msg, ops = import_policy_state(self.app.policy_manager, filepath, prune=prune, log_callback=self.app.log)
+        self.app.log(f"Policy Import: {msg} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        if success:
+            self.app.after(0, lambda: messagebox.showinfo("Import Complete", msg, parent=self.app))
+        else:
+            self.app.after(0, lambda: messagebox.showerror("Import Failed", msg, parent=self.app))
+        if ops and not success:
+            self.request_refresh()
+
+    def reconcile_spec_ui(self):
+        if not self.app.policy_manager: return
+        filepath = filedialog.askopenfilename(
+            title="Select Policy Spec",
+            filetypes=[("Policy Spec Files", "*.json"), ("All files", "*.*")],
+            parent=self
+        )
+        if filepath:
+            self.app.run_task_in_thread(self._reconcile_plan_task, None, filepath)
+
+    def _reconcile_plan_task(self, filepath):
+        """Dry run: plans the drift in a thread, then asks on the UI thread whether to apply it."""
+        try:
+            spec = load_spec(filepath)
+        except (OSError, ValueError) as e:
+            self.app.log(f"Reconcile: could not read spec {filepath}: {e}")
+            self.app.after(0, lambda: messagebox.showerror("Reconcile Failed", f"Could not read the spec file.\nError: {e}", parent=self.app))
+            return
+        if self.catalog is None:
+            self._load_catalog()
+        report = reconcile(self.app.policy_manager, spec, self.catalog, dry_run=True, log_callback=self.app.log)
+        self.app.after(0, self._confirm_reconcile, spec, report)
+
+    def _confirm_reconcile(self, spec, report):
+        if not report.ops:
+            messagebox.showinfo("Reconcile", report.summary(), parent=self.app)
+            return
+        problems = "\n\nSpec problems (skipped):\n" + "\n".join(report.problems[:5]) if report.problems else ""
+        if messagebox.askyesno("Reconcile", f"{len(report.ops)} change(s) are needed:\n\n{report.describe_plan()}{problems}\n\nApply them now?", parent=self.app):
+            self.app.run_task_in_thread(self._reconcile_apply_task, None, spec)
+
+    def _reconcile_apply_task(self, spec):
+        report = reconcile(self.app.policy_manager, spec, self.catalog, dry_run=False, log_callback=self.app.log)
+        if report.result is not None and not report.result.success:
+            self.app.after(0, lambda: messagebox.showerror("Reconcile Failed", report.summary(), parent=self.app))
+            self.request_refresh()
+        else:
+            self.app.after(0, lambda: messagebox.showinfo("Reconcile Complete", report.summary(), parent=self.app))
 
     def clear_data(self):
         """Clears data from the policy tree."""
+        self._render_generation += 1 # Stops a render that is still in progress
         if hasattr(self, 'policy_tree'):
             for item in self.policy_tree.get_children():
                 try:
                     self.policy_tree.delete(item)
                 except tk.TclError: # Item might already be deleted if called rapidly
                     pass
+        self._policy_rows = {}
+        self._categories, self._loaded_categories = {}, set()
         self.app.log("Policy Editor: Data cleared.")
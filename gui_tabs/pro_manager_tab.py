@@ -5,10 +5,13 @@ from ttkbootstrap.constants import *
 import os
 import json # For backup/restore logic
 import time # For backup logic
-import shutil # For backup/restore logic
+import bisect
 
 # Assuming profile_utils.py is in the parent directory or accessible in PYTHONPATH
-from profile_utils import get_profile_details, get_extensions_for_profile, set_extension_state_for_profile
+from profile_utils import get_extensions_for_profile, set_extension_state_for_profile, set_extension_states_for_profile, scan_profiles, load_preferences, preferences_cache, preferences_write_lock, panic_changes, bulk_extension_action
+from atomic_writer import write_json_atomic
+from backup_store import backup_store_for, backup_profile_file
+from forcelist_manager import ForcelistManager, parse_extension_entries, DEFAULT_UPDATE_URL
 
 class ProManagerTab(tb.Frame):
     def __init__(self, master, app_instance, **kwargs):
@@ -17,6 +20,9 @@ class ProManagerTab(tb.Frame):
         self.current_pro_profile_path = None
         self.pro_profile_map = {}
         self.pro_extensions_map = {}
+        self._scanned_extensions = {} # profile path -> (Preferences (mtime_ns, size), extensions) from the background scan
+        self._scan_generation = 0
+        self.forcelist = ForcelistManager(self.app.policy_manager) if self.app.policy_manager else None
         self._create_widgets()
 
     def _create_widgets(self):
@@ -40,6 +46,7 @@ class ProManagerTab(tb.Frame):
         backup_frame.pack(fill=X, pady=5)
         tb.Button(backup_frame, text="Backup Profile", bootstyle="info-outline", command=self.backup_profile_extensions).pack(side=LEFT, expand=True, fill=X, padx=2)
         tb.Button(backup_frame, text="Restore Profile", bootstyle="info-outline", command=self.restore_profile_extensions).pack(side=LEFT, expand=True, fill=X, padx=2)
+        tb.Button(backup_frame, text="History...", bootstyle="info-outline", command=self.backup_history_ui).pack(side=LEFT, expand=True, fill=X, padx=2)
 
         # Right Panel: Extensions List & Actions
         right_panel = tb.Frame(top_frame)
@@ -56,21 +63,53 @@ class ProManagerTab(tb.Frame):
         tb.Button(pro_actions_frame, text="Disable", bootstyle="warning-outline", command=lambda: self.toggle_extension_state_ui(0)).pack(side=LEFT, expand=True, fill=X, padx=2)
         tb.Button(pro_actions_frame, text="Details", bootstyle="secondary-outline", command=self.show_extension_details).pack(side=LEFT, expand=True, fill=X, padx=2)
         tb.Button(pro_actions_frame, text="Panic Button", bootstyle="danger", command=self.panic_button_ui).pack(side=LEFT, expand=True, fill=X, padx=2)
+        tb.Button(pro_actions_frame, text="All Profiles...", bootstyle="danger-outline", command=self.bulk_action_ui).pack(side=LEFT, expand=True, fill=X, padx=2)
+        tb.Button(pro_actions_frame, text="Force Install...", bootstyle="primary-outline", command=self.force_install_ui).pack(side=LEFT, expand=True, fill=X, padx=2)
 
     def load_initial_data(self):
         self.app.log("PRO Manager: Loading profile list...")
-        # Call get_profile_details via app's run_task_in_thread
-        self.app.run_task_in_thread(get_profile_details, self._populate_pro_profiles_ui, self.app.user_data_path, self.app.log)
-
-    def _populate_pro_profiles_ui(self, profile_map):
-        self.pro_profile_map = profile_map
+        self._scan_generation += 1
+        self.pro_profile_map = {}
+        self._scanned_extensions = {}
         self.pro_profiles_list.delete(0, END)
-        if not profile_map:
+        self.app.run_task_in_thread(self._scan_profiles_task, None, self._scan_generation)
+
+    def _scan_profiles_task(self, generation):
+        """Scans all profiles in parallel; each one is added to the list as soon as it is parsed."""
+        start = time.perf_counter()
+        count = 0
+        for profile in scan_profiles(self.app.user_data_path, self.app.log):
+            count += 1
+            self.app.after(0, self._add_scanned_profile, profile, generation)
+        self.app.after(0, self._scan_finished, count, time.perf_counter() - start, generation)
+
+    @staticmethod
+    def _preferences_signature(profile_path):
+        try:
+            st = os.stat(os.path.join(profile_path, 'Preferences'))
+        except OSError:
+            return None
+        try: secure = os.stat(os.path.join(profile_path, 'Secure Preferences'))
+        except OSError: secure = None # Optional; extension state read from it is merged in
+        return st.st_mtime_ns, st.st_size, secure and (secure.st_mtime_ns, secure.st_size)
+
+    def _add_scanned_profile(self, profile, generation):
+        if generation != self._scan_generation or not self.winfo_exists(): return
+        name, counter = profile['name'], 2
+        while name in self.pro_profile_map: # Ensure unique profile names in our map
+            name = f"{profile['name']} ({counter})"
+            counter += 1
+        self.pro_profile_map[name] = profile['path']
+        self._scanned_extensions[profile['path']] = (self._preferences_signature(profile['path']), profile['extensions'])
+        position = bisect.bisect_left(list(self.pro_profiles_list.get(0, END)), name) # Keep the list sorted by name
+        self.pro_profiles_list.insert(position, name)
+
+    def _scan_finished(self, count, seconds, generation):
+        if generation != self._scan_generation: return
+        if not count:
             self.app.log("PRO Manager Error: No profiles were found.")
-            return
-        for name in self.pro_profile_map.keys():
-            self.pro_profiles_list.insert(END, name)
-        self.app.log(f"PRO Manager: Loaded {len(profile_map)} profiles.")
+        else:
+            self.app.log(f"PRO Manager: Loaded {count} profiles in {seconds:.2f} s.")
 
     def on_pro_profile_select(self, event=None):
         if not self.pro_profiles_list.curselection():
@@ -78,6 +117,10 @@ class ProManagerTab(tb.Frame):
         name = self.pro_profiles_list.get(self.pro_profiles_list.curselection()[0])
         self.current_pro_profile_path = self.pro_profile_map.get(name)
         if self.current_pro_profile_path:
+            scanned = self._scanned_extensions.pop(self.current_pro_profile_path, None) # Used once; later reads go to the file
+            if scanned and scanned[0] is not None and scanned[0] == self._preferences_signature(self.current_pro_profile_path):
+                self._populate_pro_extensions_ui(scanned[1]) # Unchanged since the background scan parsed it
+                return
             self.app.log(f"PRO Manager: Loading extensions for '{name}'...")
             self.app.run_task_in_thread(get_extensions_for_profile, self._populate_pro_extensions_ui, self.current_pro_profile_path, self.app.log)
         else:
@@ -92,6 +135,7 @@ class ProManagerTab(tb.Frame):
             return
         for name, details in self.pro_extensions_map.items():
             status = "🟢 Enabled" if details['state'] == 1 else "🔴 Disabled"
+            if details.get('read_only'): status += ", Secure Preferences" # Shown, but not changeable here
             self.pro_extensions_list.insert(END, f"{name}  [{status}]")
         self.app.log(f"PRO Manager: Loaded {len(extensions_map)} extensions for {os.path.basename(self.current_pro_profile_path)}.")
 
@@ -110,6 +154,10 @@ class ProManagerTab(tb.Frame):
         if not self.current_pro_profile_path:
             messagebox.showerror("Error", "No profile selected or profile path is invalid.", parent=self)
             return
+        if details.get('read_only'):
+            messagebox.showwarning("Read-Only Extension", "The state of this extension is kept in Secure Preferences, "
+                                   "which this tool does not modify. Change it in Chrome instead.", parent=self)
+            return
 
         self.app.log(f"PRO Manager: Attempting to {'enable' if new_state==1 else 'disable'} extension {details['id']}...")
         # The callback for set_extension_state_for_profile will refresh the extension list
@@ -128,7 +176,8 @@ class ProManagerTab(tb.Frame):
         info = (f"Name: {display_name}\n"
                 f"ID: {details['id']}\n"
                 f"Version: {details['version']}\n"
-                f"Status: {'Enabled' if details['state'] == 1 else 'Disabled'}\n\n"
+                f"Status: {'Enabled' if details['state'] == 1 else 'Disabled'}"
+                f"{' (kept in Secure Preferences, read-only here)' if details.get('read_only') else ''}\n\n"
                 f"Path: {details['path']}\n\n"
                 f"Permissions:\n- " + ('\n- '.join(details['permissions']) if details['permissions'] else "None"))
         messagebox.showinfo("Extension Details", info, parent=self)
@@ -142,17 +191,13 @@ class ProManagerTab(tb.Frame):
 
     def _panic_logic_task(self, profile_path):
         self.app.log("PRO Manager PANIC: Disabling all non-default enabled extensions...")
-        disabled_count = 0
-        # Iterate over a copy of values if modifying the underlying map through set_extension_state_for_profile
-        # or ensure the map is refreshed before this loop if state changes are reflected immediately.
-        # For simplicity, assuming pro_extensions_map is reasonably up-to-date before panic.
-        extensions_to_disable = [ext for ext in self.pro_extensions_map.values() if not ext['was_installed_by_default'] and ext['state'] == 1]
-
-        for ext_details in extensions_to_disable:
-            self.app.log(f"PANIC: Disabling {ext_details['id']}...")
-            success = set_extension_state_for_profile(profile_path, ext_details['id'], 0, self.app.log)
-            if success:
-                disabled_count += 1
+        changes = panic_changes(self.pro_extensions_map)
+        for ext_id, _ in changes:
+            self.app.log(f"PANIC: Disabling {ext_id}...")
+        # One backup, parse and write for all of them
+        result = set_extension_states_for_profile(profile_path, changes, self.app.log)
+        disabled_count = len(result['applied'])
+        if not result['success']: self.app.log(f"PANIC: {result['message']}")
 
         # Refresh the extensions list in the UI after all operations
         self.app.run_task_in_thread(get_extensions_for_profile, self._populate_pro_extensions_ui, profile_path, self.app.log)
@@ -188,8 +233,7 @@ class ProManagerTab(tb.Frame):
             return
 
         try:
-            with open(prefs_path, 'r', encoding='utf-8') as f:
-                prefs = json.load(f)
+            prefs = load_preferences(prefs_path) # Usually already parsed when the profile was selected
 
             # Ensure extensions and settings keys exist to avoid KeyError
             extensions_settings = prefs.get('extensions', {}).get('settings', {})
@@ -200,7 +244,12 @@ class ProManagerTab(tb.Frame):
                 "extensions_settings": extensions_settings # Store the 'settings' dict directly
             }
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, indent=4)
+                json.dump(backup_data, f, separators=(',', ':'))
+            try:
+                entry = backup_profile_file(profile_path, f"Manual backup ({os.path.basename(filepath)})") # The whole Preferences, for History
+                self.app.log(f"Preferences also stored in the backup history (backup #{entry.backup_id}).")
+            except (OSError, ValueError) as e:
+                self.app.log(f"Warning: Could not add the backup to the history: {e}")
 
             self.app.log(f"Backup successful! Saved to {filepath}")
             self.app.after(0, lambda: messagebox.showinfo("Backup Complete", f"Successfully backed up extensions settings to:\n{filepath}", parent=self.app))
@@ -242,19 +291,17 @@ class ProManagerTab(tb.Frame):
             self.app.after(0, lambda: messagebox.showerror("Restore Failed", "Preferences file not found for the selected profile.", parent=self.app))
             return
 
-        # Create a backup of the current Preferences file before overwriting
-        current_prefs_backup_path = prefs_path + f".before_restore_{time.strftime('%Y%m%d%H%M%S')}.bak"
+        # Back up the current Preferences file before overwriting
         try:
-            shutil.copyfile(prefs_path, current_prefs_backup_path)
-            self.app.log(f"Created backup of current preferences: {current_prefs_backup_path}")
-        except IOError as e:
+            entry = backup_profile_file(profile_path, f"Before restoring from {os.path.basename(backup_filepath)}")
+            self.app.log(f"Stored a backup of the current preferences (backup #{entry.backup_id}, see History).")
+        except (OSError, ValueError) as e:
             self.app.log(f"Warning: Could not create pre-restore backup of Preferences file: {e}")
             # Decide if you want to proceed without backup or abort
             if not messagebox.askyesno("Backup Warning", f"Could not create a backup of the current Preferences file.\nError: {e}\n\nProceed with restore anyway?", parent=self.app, icon='warning'):
                 self.app.log("Restore aborted by user due to backup failure.")
                 return
 
-
         try:
             with open(backup_filepath, 'r', encoding='utf-8') as f:
                 backup_data = json.load(f)
@@ -263,16 +310,16 @@ class ProManagerTab(tb.Frame):
             if restored_settings is None: # Check if the key exists and is not None
                 raise ValueError("Backup file is missing the 'extensions_settings' key or it's empty.")
 
-            with open(prefs_path, 'r+', encoding='utf-8') as f:
-                prefs = json.load(f) # Load current preferences
+            with preferences_write_lock(prefs_path): # Not interleaved with queued extension state changes
+                with open(prefs_path, 'r', encoding='utf-8') as f:
+                    prefs = json.load(f) # Load current preferences (a private copy, not the cached one)
                 # Ensure 'extensions' key exists, then overwrite 'settings'
                 if 'extensions' not in prefs:
                     prefs['extensions'] = {}
                 prefs['extensions']['settings'] = restored_settings # Overwrite with backup
-
-                f.seek(0) # Rewind
-                json.dump(prefs, f, indent=4) # Write modified data
-                f.truncate() # Truncate if new data is smaller
+                written = write_json_atomic(prefs_path, prefs) # A failed write leaves Preferences untouched
+                preferences_cache.put(prefs_path, prefs) # Our own write: the parsed document is current
+            self.app.log(f"Preferences written: {written.bytes_written} bytes in {written.seconds * 1000:.0f} ms.")
 
             self.app.log("Restore successful! Restart Chrome to apply changes.")
             # Refresh the UI
@@ -288,19 +335,136 @@ class ProManagerTab(tb.Frame):
         except IOError as e:
             self.app.log(f"Restore failed: IOError. {e}")
             self.app.after(0, lambda: messagebox.showerror("Restore Failed", f"Could not read/write Preferences file.\nError: {e}", parent=self.app))
-        except Exception as e:
+        except Exception as e: # The write is atomic, so Preferences still holds its previous content
             self.app.log(f"Restore failed: Unexpected error. {e}")
             self.app.after(0, lambda: messagebox.showerror("Restore Failed", f"An unexpected error occurred during restore.\nError: {e}", parent=self.app))
-            # Attempt to restore the pre-restore backup if something went wrong
-            if os.path.exists(current_prefs_backup_path):
-                try:
-                    shutil.copyfile(current_prefs_backup_path, prefs_path)
-                    self.app.log(f"Attempted to restore pre-restore backup to {prefs_path}")
-                    messagebox.showwarning("Restore Attempted", "An error occurred during restore. Attempted to revert to the pre-restore state of Preferences. Please check.", parent=self.app)
-                except Exception as re_e:
-                    self.app.log(f"CRITICAL: Failed to restore pre-restore backup after error: {re_e}")
-                    messagebox.showerror("Critical Error", "Failed to restore after an error AND failed to revert to pre-restore backup. Preferences file might be corrupt.", parent=self.app)
 
+    def bulk_action_ui(self):
+        """Disables/enables extension IDs, or runs the Panic rule, in every profile at once."""
+        dialog = tb.Toplevel(title="Extension Action for All Profiles", parent=self.app)
+        dialog.transient(self.app)
+        dialog.grab_set()
+        dialog.geometry("520x320")
+
+        action_var = tk.StringVar(value="disable")
+        for value, text in (("disable", "Disable these extensions in every profile"), ("enable", "Enable these extensions in every profile"),
+                            ("panic", "Panic: disable all non-default, enabled extensions in every profile")):
+            tb.Radiobutton(dialog, text=text, variable=action_var, value=value).pack(anchor=W, padx=10, pady=(8, 0))
+        tb.Label(dialog, text="Extension IDs (one per line or separated by spaces/commas):").pack(anchor=W, padx=10, pady=(10, 2))
+        ids_text = tk.Text(dialog, height=5)
+        ids_text.pack(fill=BOTH, expand=True, padx=10)
+        selected = self._get_selected_pro_extension_details_from_ui() if self.pro_extensions_list.curselection() else None
+        if selected: ids_text.insert(END, selected['id'] + "\n")
+
+        def on_run():
+            action = action_var.get()
+            if action == "panic":
+                choose, description = panic_changes, "Panic (disable all non-default, enabled extensions)"
+            else:
+                entries, invalid = parse_extension_entries(ids_text.get("1.0", END))
+                if invalid or not entries:
+                    messagebox.showwarning("Invalid Extension IDs", f"Enter valid extension IDs{f' (not valid: {invalid[0]})' if invalid else ''}.", parent=dialog)
+                    return
+                new_state = 1 if action == "enable" else 0
+                wanted = [ext_id for ext_id, _ in entries]
+                def choose(extensions, wanted=wanted, new_state=new_state): # Only profiles that have the extension change
+                    installed = {ext['id'] for ext in extensions.values() if not ext.get('read_only')}
+                    return [(ext_id, new_state) for ext_id in wanted if ext_id in installed]
+                description = f"{action.capitalize()} {', '.join(wanted)}"
+            if not messagebox.askyesno("Confirm", f"{description} in ALL profiles?\n\nEvery changed profile is backed up first. Close Chrome before continuing.", parent=dialog, icon='warning'):
+                return
+            dialog.destroy()
+            self.app.log(f"PRO Manager: {description} in all profiles...")
+            self.app.run_task_in_thread(bulk_extension_action, self._show_bulk_results, self.app.user_data_path, choose, self.app.log)
+
+        button_frame = tb.Frame(dialog)
+        button_frame.pack(fill=X, padx=10, pady=10)
+        tb.Button(button_frame, text="Cancel", bootstyle="secondary", command=dialog.destroy).pack(side=RIGHT, padx=5)
+        tb.Button(button_frame, text="Run", bootstyle="danger", command=on_run).pack(side=RIGHT)
+
+    def _show_bulk_results(self, summary):
+        outcomes = summary["profiles"]
+        failed = sum(1 for o in outcomes if not o["success"])
+        changed = sum(len(o["applied"]) for o in outcomes)
+        self.app.log(f"PRO Manager: {changed} extension state(s) set in {len(outcomes)} profile(s), {failed} with problems; "
+                     f"{summary['seconds']:.2f} s total, slowest profile {summary['slowest']:.2f} s.")
+        if self.current_pro_profile_path: self.on_pro_profile_select() # Refresh the open profile
+
+        dialog = tb.Toplevel(title="Results for All Profiles", parent=self.app)
+        dialog.transient(self.app)
+        dialog.geometry("720x360")
+        tb.Label(dialog, text=f"{len(outcomes)} profile(s) in {summary['seconds']:.2f} s (slowest profile {summary['slowest']:.2f} s). "
+                              "Restart Chrome to apply the changes.").pack(fill=X, padx=10, pady=(10, 5))
+        tree = tb.Treeview(dialog, columns=("profile", "changed", "result", "time"), show="headings")
+        for column, heading, width in (("profile", "Profile", 160), ("changed", "Changed", 70), ("result", "Result", 380), ("time", "Time", 70)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, stretch=column == "result")
+        for outcome in outcomes:
+            result = ("OK: " if outcome["success"] else "Problem: ") + outcome["message"]
+            tree.insert("", END, values=(outcome["profile"], len(outcome["applied"]), result, f"{outcome['seconds'] * 1000:.0f} ms"))
+        tree.pack(fill=BOTH, expand=True, padx=10)
+        tb.Button(dialog, text="Close", bootstyle="secondary", command=dialog.destroy).pack(side=RIGHT, padx=10, pady=10)
+
+    def backup_history_ui(self):
+        """Lists the stored Preferences backups of the selected profile and restores the chosen one."""
+        if not self.current_pro_profile_path:
+            messagebox.showwarning("Profile Not Selected", "Please select a profile to see its backups.", parent=self)
+            return
+        profile_path = self.current_pro_profile_path
+        store = backup_store_for(os.path.dirname(os.path.abspath(profile_path)))
+        entries = store.list(os.path.basename(profile_path), "Preferences")
+        if not entries:
+            messagebox.showinfo("No Backups", "No backups have been stored for this profile yet.", parent=self)
+            return
+
+        dialog = tb.Toplevel(title=f"Backups of {os.path.basename(profile_path)}", parent=self.app)
+        dialog.transient(self.app)
+        dialog.geometry("720x400")
+        stored, original = store.disk_usage()
+        tb.Label(dialog, text=f"{len(entries)} backup(s) of this profile. The whole store uses {stored / 1048576:.1f} MB "
+                              f"for {original / 1048576:.1f} MB of backups.", justify="left").pack(fill=X, padx=10, pady=(10, 5))
+        tree = tb.Treeview(dialog, columns=("id", "taken", "size", "reason"), show="headings", selectmode="browse")
+        for column, heading, width in (("id", "#", 50), ("taken", "Taken", 150), ("size", "Size", 90), ("reason", "Reason", 400)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, stretch=column == "reason")
+        for entry in entries: # Newest first
+            tree.insert("", END, iid=str(entry.backup_id), values=(entry.backup_id, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.time)),
+                                                                   f"{entry.size / 1024:.0f} KB", entry.reason))
+        tree.pack(fill=BOTH, expand=True, padx=10)
+        by_id = {str(entry.backup_id): entry for entry in entries}
+
+        def on_restore():
+            selection = tree.selection()
+            if not selection: return
+            entry = by_id[selection[0]]
+            taken = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.time))
+            if not messagebox.askyesno("Confirm Restore", f"Replace the Preferences of '{os.path.basename(profile_path)}' with the version from {taken}?\n\n"
+                                       "The current file is backed up first. Close Chrome before restoring.", parent=dialog, icon='warning'):
+                return
+            dialog.destroy()
+            self.app.run_task_in_thread(self._restore_backup_task, None, profile_path, entry)
+
+        button_frame = tb.Frame(dialog)
+        button_frame.pack(fill=X, padx=10, pady=10)
+        tb.Button(button_frame, text="Close", bootstyle="secondary", command=dialog.destroy).pack(side=RIGHT, padx=5)
+        tb.Button(button_frame, text="Restore Selected", bootstyle="primary", command=on_restore).pack(side=RIGHT)
+
+    def _restore_backup_task(self, profile_path, entry):
+        prefs_path = os.path.join(profile_path, 'Preferences')
+        store = backup_store_for(os.path.dirname(os.path.abspath(profile_path)))
+        try:
+            with preferences_write_lock(prefs_path): # Not interleaved with queued extension state changes
+                if os.path.exists(prefs_path):
+                    backup_profile_file(profile_path, f"Before restoring backup #{entry.backup_id}")
+                written = store.restore(entry, prefs_path)
+                preferences_cache.invalidate(prefs_path)
+            self.app.log(f"Restored backup #{entry.backup_id} of {os.path.basename(profile_path)} "
+                         f"({written.bytes_written} bytes written in {written.seconds * 1000:.0f} ms). Restart Chrome to apply changes.")
+            self.app.run_task_in_thread(get_extensions_for_profile, self._populate_pro_extensions_ui, profile_path, self.app.log)
+            self.app.after(0, lambda: messagebox.showinfo("Restore Complete", "Backup restored. Please restart Chrome for all changes to take effect.", parent=self.app))
+        except (OSError, ValueError) as e:
+            self.app.log(f"Restore failed: {e}")
+            self.app.after(0, lambda: messagebox.showerror("Restore Failed", f"Could not restore the backup.\nError: {e}", parent=self.app))
 
     def clear_data(self):
         """Clears data from the lists in this tab."""
@@ -310,3 +474,60 @@ class ProManagerTab(tb.Frame):
         self.pro_profile_map = {}
         self.pro_extensions_map = {}
         self.app.log("PRO Manager: Data cleared.")
+
+    def force_install_ui(self):
+        if not self.forcelist:
+            messagebox.showerror("Not Available", "Chrome policy management is not available on this system.", parent=self)
+            return
+        dialog = tb.Toplevel(title="Force Install Extensions", parent=self.app)
+        dialog.transient(self.app)
+        dialog.grab_set()
+        dialog.geometry("560x420")
+
+        tb.Label(dialog, text="Extension IDs, one per line or separated by spaces/commas.\n"
+                              "Optional update URL per entry: id;https://... or a CSV with id,update_url columns.",
+                 justify="left").pack(fill=X, padx=10, pady=(10, 5))
+        ids_text = tk.Text(dialog, height=12)
+        ids_text.pack(fill=BOTH, expand=True, padx=10)
+
+        url_frame = tb.Frame(dialog)
+        url_frame.pack(fill=X, padx=10, pady=5)
+        tb.Label(url_frame, text="Default update URL:").pack(side=LEFT)
+        url_var = tk.StringVar(value=DEFAULT_UPDATE_URL)
+        tb.Entry(url_frame, textvariable=url_var).pack(side=LEFT, fill=X, expand=True, padx=5)
+
+        def on_load_csv():
+            filepath = filedialog.askopenfilename(title="Load Extension IDs", filetypes=[("CSV/Text files", "*.csv *.txt"), ("All files", "*.*")], parent=dialog)
+            if not filepath: return
+            try:
+                with open(filepath, 'r', encoding='utf-8-sig') as f:
+                    ids_text.insert(END, f.read().rstrip("\n") + "\n")
+            except (OSError, UnicodeDecodeError) as e:
+                messagebox.showerror("Load Failed", f"Could not read the file.\nError: {e}", parent=dialog)
+
+        def on_add():
+            entries, invalid = parse_extension_entries(ids_text.get("1.0", END))
+            if not entries:
+                messagebox.showwarning("No Extension IDs", "No valid extension IDs were found.", parent=dialog)
+                return
+            if invalid and not messagebox.askyesno("Invalid Entries", f"{len(invalid)} entr{'y is' if len(invalid) == 1 else 'ies are'} not valid extension IDs "
+                                                   f"(e.g. '{invalid[0]}') and will be skipped. Continue?", parent=dialog):
+                return
+            dialog.destroy()
+            self.app.run_task_in_thread(self._force_install_task, None, entries, url_var.get().strip() or DEFAULT_UPDATE_URL)
+
+        button_frame = tb.Frame(dialog)
+        button_frame.pack(fill=X, padx=10, pady=10)
+        tb.Button(button_frame, text="Load CSV...", bootstyle="secondary-outline", command=on_load_csv).pack(side=LEFT)
+        tb.Button(button_frame, text="Cancel", bootstyle="secondary", command=dialog.destroy).pack(side=RIGHT, padx=5)
+        tb.Button(button_frame, text="Add", bootstyle="primary", command=on_add).pack(side=RIGHT)
+
+    def _force_install_task(self, entries, default_update_url):
+        """Adds all entries to ExtensionInstallForcelist with one write. Runs in a thread."""
+        self.app.log(f"PRO Manager: Adding {len(entries)} extension(s) to the force-install policy...")
+        result = self.forcelist.add_extensions(entries, default_update_url, log_callback=self.app.log)
+        self.app.log(f"PRO Manager: Force install: {result['message']}")
+        if result['success']:
+            self.app.after(0, lambda: messagebox.showinfo("Force Install", f"{result['message']}\nRestart Chrome to apply.", parent=self.app))
+        else:
+            self.app.after(0, lambda: messagebox.showerror("Force Install Failed", result['message'], parent=self.app))
@@ -1,16 +1,27 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog, filedialog
+import threading
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 
+from url_matcher import UrlMatcher
+from blocklist_import import bulk_import_blocklist
+from blocklist_compact import compact_blocklist
+from gui_tabs.virtual_listbox import VirtualListbox
+
 class URLBlockerTab(tb.Frame):
     def __init__(self, master, app_instance, **kwargs):
         super().__init__(master, padding=10, **kwargs)
         self.app = app_instance # Reference to the main Application instance
+        self._import_cancel = None # threading.Event of the running bulk import
         self._create_widgets()
+        # With a change-watching policy cache, writes and outside changes arrive as per-entry updates
+        self._listening = bool(self.app.policy_manager and hasattr(self.app.policy_manager, 'add_listener'))
+        if self._listening:
+            self.app.policy_manager.add_listener(self._on_policy_changes)
 
     def _create_widgets(self):
-        tb.Label(self, text="Block specific websites for all users. Wildcards (*) are supported. E.g., *.facebook.com", bootstyle='info').pack(fill=X, pady=5)
+        tb.Label(self, text="Block specific websites for all users. Wildcards (*) are supported. E.g., *.facebook.com (separate several URLs with spaces)", bootstyle='info').pack(fill=X, pady=5)
 
         add_frame = tb.Frame(self)
         add_frame.pack(fill=X, pady=5)
@@ -18,18 +29,39 @@ class URLBlockerTab(tb.Frame):
         self.url_entry = tb.Entry(add_frame)
         self.url_entry.pack(side=LEFT, fill=X, expand=True, padx=5)
         tb.Button(add_frame, text="Block URL", bootstyle="danger", command=self.add_url_to_blocklist_ui).pack(side=LEFT, padx=5)
+        tb.Button(add_frame, text="Import List...", bootstyle="danger-outline", command=self.import_blocklist_ui).pack(side=LEFT, padx=5)
+
+        # Shown while a bulk import runs
+        self.import_frame = tb.Frame(self)
+        self.import_progress = tb.Progressbar(self.import_frame, maximum=100, bootstyle="danger-striped")
+        self.import_progress.pack(side=LEFT, fill=X, expand=True, padx=5)
+        self.import_status = tb.Label(self.import_frame, text="", width=30)
+        self.import_status.pack(side=LEFT, padx=5)
+        tb.Button(self.import_frame, text="Cancel", bootstyle="secondary-outline", command=self.cancel_import_ui).pack(side=LEFT, padx=5)
+
+        test_frame = tb.Frame(self)
+        test_frame.pack(fill=X, pady=5)
+        tb.Label(test_frame, text="Check which URLs the current blocklist (and allowlist) would block:").pack(side=LEFT, padx=5)
+        tb.Button(test_frame, text="Check URL File...", bootstyle="info-outline", command=self.test_url_file_ui).pack(side=RIGHT, padx=5)
+        tb.Button(test_frame, text="Test URL...", bootstyle="info-outline", command=self.test_url_ui).pack(side=RIGHT, padx=5)
 
         list_frame = tb.LabelFrame(self, text="Currently Blocked URLs")
         list_frame.pack(fill=BOTH, expand=True, pady=10)
-        self.blocked_url_list = tk.Listbox(list_frame)
-        self.blocked_url_list.pack(side=LEFT, fill=BOTH, expand=True)
+        filter_frame = tb.Frame(list_frame)
+        filter_frame.pack(fill=X, padx=5, pady=5)
+        tb.Label(filter_frame, text="Filter:").pack(side=LEFT, padx=(0, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.blocked_url_list.set_filter(self.filter_var.get()))
+        tb.Entry(filter_frame, textvariable=self.filter_var).pack(side=LEFT, fill=X, expand=True)
+        self.count_label = tb.Label(filter_frame, text="")
+        self.count_label.pack(side=LEFT, padx=5)
 
-        # It's good practice to have a scrollbar for the listbox
-        scrollbar = tb.Scrollbar(list_frame, orient=VERTICAL, command=self.blocked_url_list.yview)
-        self.blocked_url_list.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=RIGHT, fill=Y)
+        # Only the visible rows exist in the widget, so blocklists of any size stay responsive
+        self.blocked_url_list = VirtualListbox(list_frame)
+        self.blocked_url_list.pack(side=TOP, fill=BOTH, expand=True)
 
-        tb.Button(list_frame, text="Allow Selected URL", bootstyle="success-outline", command=self.remove_url_from_blocklist_ui).pack(side=LEFT, padx=10, pady=10, anchor='center')
+        tb.Button(list_frame, text="Allow Selected URL(s)", bootstyle="success-outline", command=self.remove_url_from_blocklist_ui).pack(side=LEFT, padx=10, pady=10, anchor='center')
+        tb.Button(list_frame, text="Compact List", bootstyle="secondary-outline", command=self.compact_blocklist_ui).pack(side=LEFT, padx=10, pady=10, anchor='center')
 
 
     def load_initial_data(self):
@@ -38,61 +70,55 @@ class URLBlockerTab(tb.Frame):
 
     def _populate_blocklist_ui_callback(self, blocklist_data):
         if not self.winfo_exists(): return # Check if widget still exists
-        self.blocked_url_list.delete(0, END)
-        if blocklist_data:
-            urls, _ = blocklist_data # We only need urls for display
-            for index, url_val in sorted(urls.items(), key=lambda item: int(item[0])): # Sort by index
-                self.blocked_url_list.insert(END, f"[{index}] {url_val}")
+        urls, _ = blocklist_data if blocklist_data else ({}, [])
+        self.blocked_url_list.set_items((int(index), f"[{index}] {url_val}") for index, url_val in urls.items())
+        self._update_count()
+        if urls:
             self.app.log(f"URL Blocker: Displayed {len(urls)} blocked URLs.")
         else:
             self.app.log("URL Blocker: No blocked URLs to display or error fetching list.")
 
+    def _update_count(self):
+        self.count_label.configure(text=f"{self.blocked_url_list.total()} entries")
+
+    def _on_policy_changes(self, changes, source):
+        """PolicyCache listener (background thread)."""
+        if any(key_name == "URLBlocklist" for key_name, _ in changes):
+            self.app.after(0, self._apply_blocklist_changes, changes, source)
+
+    def _apply_blocklist_changes(self, changes, source):
+        """Inserts, updates or deletes only the rows of the changed blocklist indices."""
+        if not self.winfo_exists(): return
+        updated = 0
+        for (key_name, value_name), (_, new_url) in changes.items():
+            if key_name != "URLBlocklist" or not value_name.isdigit(): continue
+            if new_url is None: self.blocked_url_list.remove(int(value_name))
+            else: self.blocked_url_list.upsert(int(value_name), f"[{value_name}] {new_url}")
+            updated += 1
+        self._update_count()
+        if updated and source == "external":
+            self.app.log(f"URL Blocker: {updated} blocklist entr{'y' if updated == 1 else 'ies'} changed outside this app.")
+
+    def _refresh_after_write(self):
+        """Listeners already receive the written entries; without one, re-read the list."""
+        if not self._listening:
+            self.app.run_task_in_thread(self._get_url_blocklist_task, self._populate_blocklist_ui_callback)
+
     def _get_url_blocklist_task(self):
-        """Task to fetch the URL blocklist from the registry. Runs in a thread."""
+        """Task to fetch the URL blocklist from the policy snapshot. Runs in a thread."""
         if not self.app.policy_manager:
             self.app.log("URL Blocker Error: Policy Manager not available.")
             return {}, [] # Return empty data
 
-        key_path = f"HKEY_LOCAL_MACHINE\\{self.app.policy_manager.POLICY_BASE_KEY}\\URLBlocklist"
-        args = f'query "{key_path}"'
-        # _run_reg_command is part of WindowsPolicyManager instance
-        stdout, stderr = self.app.policy_manager._run_reg_command(args)
-
-        urls, indices = {}, []
-        if stderr and "unable to find the specified registry key" not in stderr.lower() and "error" in stderr.lower() :
-            self.app.log(f"URL Blocker: Error querying registry for URLBlocklist: {stderr}")
-            return {}, [] # Return empty on significant error
-        if "unable to find the specified registry key" in stderr.lower() or not stdout : # Key doesn't exist or is empty
-             self.app.log("URL Blocker: URLBlocklist registry key not found or empty.")
-             return {}, []
-
-
-        for line in stdout.strip().split('\n'):
-            if not line.strip() or line.strip().startswith("HKEY_LOCAL_MACHINE") or not line.strip().startswith(" "): # Filter header and non-value lines
-                # A more robust parsing would be to check for REG_SZ type
-                # Example line: "    1    REG_SZ    *.example.com"
-                # Split by multiple spaces, then filter empty strings
-                parts = [p.strip() for p in line.split('    ') if p.strip()]
-                if len(parts) >= 2 and parts[1] == "REG_SZ": # Check if it looks like a value line
-                    index, url_val = parts[0], parts[-1]
-                    try:
-                        indices.append(int(index))
-                        urls[index] = url_val
-                    except ValueError:
-                        self.app.log(f"URL Blocker: Could not parse index from line: {line}")
-                    except Exception as e:
-                         self.app.log(f"URL Blocker: Error parsing line '{line}': {e}")
-                elif len(parts) >=3 and parts[0].isdigit() and parts[1] == "REG_SZ": # Alternative parsing for some reg outputs
-                    index, url_val = parts[0], parts[2] # Value might be third part
-                    try:
-                        indices.append(int(index))
-                        urls[index] = url_val
-                    except ValueError:
-                        self.app.log(f"URL Blocker: Could not parse index from alternative line format: {line}")
-                # else:
-                #     self.app.log(f"URL Blocker: Skipping unparsable line: {line}")
-
+        snapshot = self.app.policy_manager.get_policy_snapshot()
+        if snapshot.error:
+            self.app.log(f"URL Blocker: Error reading URLBlocklist policy: {snapshot.error}")
+            return {}, []
+        if not snapshot.has_key("URLBlocklist"): # Key doesn't exist or is empty
+            self.app.log("URL Blocker: URLBlocklist registry key not found or empty.")
+            return {}, []
 
+        urls, indices = snapshot.get_list("URLBlocklist")
         return urls, indices
 
     def add_url_to_blocklist_ui(self):
@@ -103,78 +129,215 @@ class URLBlockerTab(tb.Frame):
         self.app.run_task_in_thread(self._add_url_logic_task, None, url)
         self.url_entry.delete(0, END)
 
-    def _add_url_logic_task(self, url_to_block):
-        """Task to add a URL to the blocklist. Runs in a thread."""
-        self.app.log(f"URL Blocker: Attempting to block URL: {url_to_block}...")
+    def _add_url_logic_task(self, url_input):
+        """Task to add one or more (whitespace separated) URLs to the blocklist. Runs in a thread."""
+        urls_to_block = list(dict.fromkeys(url_input.split())) # Dedupe, keep order
+        self.app.log(f"URL Blocker: Attempting to block {len(urls_to_block)} URL(s): {', '.join(urls_to_block)}...")
         if not self.app.policy_manager:
             self.app.log("URL Blocker Error: Policy Manager not available for adding URL.")
             return
 
-        # Fetch current list to determine next available index
-        current_urls, current_indices = self._get_url_blocklist_task() # This is a direct call, intended to run within this thread
-
-        # Check if URL already exists (value check, not just index)
-        for idx, existing_url in current_urls.items():
-            if existing_url == url_to_block:
-                self.app.log(f"URL Blocker: URL '{url_to_block}' is already blocked at index {idx}.")
-                self.app.after(0, lambda: messagebox.showinfo("Already Blocked", f"The URL '{url_to_block}' is already in the blocklist.", parent=self.app))
-                # Refresh UI in case indices were not contiguous or something else changed
-                self.app.run_task_in_thread(self._get_url_blocklist_task, self._populate_blocklist_ui_callback)
-                return
-
-        next_index = 1
-        if current_indices:
-            next_index = max(current_indices) + 1
+        # One snapshot read gives both the existing values and the next free index
+        snapshot = self.app.policy_manager.get_policy_snapshot()
+        if snapshot.error: # An unread list would make index 1 look free and overwrite existing entries
+            self.app.log(f"URL Blocker: Could not read URLBlocklist ({snapshot.error}); nothing was added.")
+            self.app.after(0, lambda: messagebox.showerror("Blocking Failed", f"Could not read the current blocklist:\n{snapshot.error}", parent=self.app))
+            return
+        current_urls, current_indices = snapshot.get_list("URLBlocklist")
+        existing = {existing_url: idx for idx, existing_url in current_urls.items()}
+
+        already_blocked = [url for url in urls_to_block if url in existing]
+        for url in already_blocked:
+            self.app.log(f"URL Blocker: URL '{url}' is already blocked at index {existing[url]}.")
+        if already_blocked and len(already_blocked) == len(urls_to_block):
+            self.app.after(0, lambda: messagebox.showinfo("Already Blocked", f"The URL(s) '{', '.join(already_blocked)}' are already in the blocklist.", parent=self.app))
+            # Refresh UI in case indices were not contiguous or something else changed
+            self.app.run_task_in_thread(self._get_url_blocklist_task, self._populate_blocklist_ui_callback)
+            return
 
-        success, msg = self.app.policy_manager.set_policy("URLBlocklist", str(next_index), url_to_block, "REG_SZ")
+        next_index = max(current_indices) + 1 if current_indices else 1
+        transaction = self.app.policy_manager.transaction(snapshot)
+        for url in urls_to_block:
+            if url in existing: continue
+            transaction.set("URLBlocklist", str(next_index), url, "REG_SZ")
+            next_index += 1
+        result = transaction.commit()
 
-        if success:
-            self.app.log(f"URL '{url_to_block}' blocked successfully at index {next_index}. Restart Chrome to apply.")
+        if result.success:
+            self.app.log(f"URL Blocker: {len(result)} URL(s) blocked successfully. Restart Chrome to apply.")
         else:
-            self.app.log(f"URL Blocker: Failed to block URL '{url_to_block}': {msg}")
-            self.app.after(0, lambda: messagebox.showerror("Blocking Failed", f"Failed to block URL '{url_to_block}':\n{msg}", parent=self.app))
+            msg = result.summary()
+            self.app.log(f"URL Blocker: Failed to block URL(s): {msg}")
+            self.app.after(0, lambda: messagebox.showerror("Blocking Failed", f"Failed to block URL(s):\n{msg}", parent=self.app))
 
-        # Refresh the list in the UI by calling the task chain again
-        self.app.run_task_in_thread(self._get_url_blocklist_task, self._populate_blocklist_ui_callback)
+        # Refresh the list in the UI (only needed when no cache listener pushes the new entries)
+        self._refresh_after_write()
 
     def remove_url_from_blocklist_ui(self):
-        if not self.blocked_url_list.curselection():
+        indices = self.blocked_url_list.get_selected_keys() # Blocklist indices of all selected rows, visible or not
+        if not indices:
             messagebox.showwarning("Selection Required", "Please select a URL to allow.", parent=self)
             return
-
-        selected_item_text = self.blocked_url_list.get(self.blocked_url_list.curselection()[0])
-        # Extract index, e.g., from "[123] some.url.com"
-        try:
-            index_to_remove = selected_item_text.split("]")[0].strip("[")
-            int(index_to_remove) # Validate it's an integer
-        except (IndexError, ValueError):
-            messagebox.showerror("Error", "Could not parse the selected URL's index.", parent=self)
-            self.app.log(f"URL Blocker Error: Could not parse index from '{selected_item_text}'")
+        if len(indices) > 1 and not messagebox.askyesno("Allow URLs", f"Remove {len(indices)} URLs from the blocklist?", parent=self):
             return
+        self.blocked_url_list.clear_selection()
+        self.app.run_task_in_thread(self._remove_url_logic_task, None, [str(index) for index in indices])
 
-        self.app.run_task_in_thread(self._remove_url_logic_task, None, index_to_remove)
-
-    def _remove_url_logic_task(self, index_str_to_remove):
-        """Task to remove a URL from the blocklist using its index. Runs in a thread."""
-        self.app.log(f"URL Blocker: Attempting to allow URL at registry index {index_str_to_remove}...")
+    def _remove_url_logic_task(self, indices_to_remove):
+        """Task to remove blocklist entries by index, as one batched write. Runs in a thread."""
+        self.app.log(f"URL Blocker: Attempting to allow {len(indices_to_remove)} URL(s) at index(es) {', '.join(indices_to_remove[:10])}"
+                     f"{'...' if len(indices_to_remove) > 10 else ''}")
         if not self.app.policy_manager:
             self.app.log("URL Blocker Error: Policy Manager not available for removing URL.")
             return
 
-        success, msg = self.app.policy_manager.remove_policy("URLBlocklist", index_str_to_remove)
+        transaction = self.app.policy_manager.transaction()
+        for index in indices_to_remove:
+            transaction.remove("URLBlocklist", index)
+        result = transaction.commit()
 
-        if success:
-            self.app.log(f"URL at index {index_str_to_remove} allowed successfully. Restart Chrome to apply.")
+        if result.success:
+            self.app.log(f"URL Blocker: {len(result)} URL(s) allowed successfully. Restart Chrome to apply.")
         else:
-            self.app.log(f"URL Blocker: Failed to allow URL at index {index_str_to_remove}: {msg}")
+            msg = result.summary()
+            self.app.log(f"URL Blocker: Failed to allow URL(s): {msg}")
             # Only show error if it's not a "not found" type of message
             if "was not found" not in msg and "ERROR:" in msg :
-                 self.app.after(0, lambda: messagebox.showerror("Allow Failed", f"Failed to allow URL at index {index_str_to_remove}:\n{msg}", parent=self.app))
-
-        self.app.run_task_in_thread(self._get_url_blocklist_task, self._populate_blocklist_ui_callback)
+                 self.app.after(0, lambda: messagebox.showerror("Allow Failed", f"Failed to allow URL(s):\n{msg}", parent=self.app))
+
+        self._refresh_after_write()
+
+    def import_blocklist_ui(self):
+        if not self.app.policy_manager or self._import_cancel is not None: return
+        filepath = filedialog.askopenfilename(
+            title="Import Blocklist (hosts file or one domain per line)",
+            filetypes=[("Hosts/Text files", "*.txt hosts *.hosts"), ("All files", "*.*")],
+            parent=self
+        )
+        if not filepath: return
+        self._import_cancel = threading.Event()
+        self.import_progress['value'] = 0
+        self.import_status.configure(text="Starting...")
+        self.import_frame.pack(fill=X, pady=5, after=self.url_entry.master)
+        self.app.run_task_in_thread(self._import_blocklist_task, None, filepath, self._import_cancel)
+
+    def cancel_import_ui(self):
+        if self._import_cancel is not None:
+            self._import_cancel.set()
+            self.import_status.configure(text="Cancelling...")
+
+    def _import_progress_ui(self, fraction, added):
+        if not self.winfo_exists(): return
+        self.import_progress['value'] = fraction * 100
+        self.import_status.configure(text=f"{added} URL(s) added ({fraction:.0%})")
+
+    def _import_finished_ui(self):
+        self._import_cancel = None
+        if self.winfo_exists(): self.import_frame.pack_forget()
+
+    def _import_blocklist_task(self, filepath, cancel_event):
+        """Task to stream a blocklist file into URLBlocklist in batches. Runs in a thread."""
+        self.app.log(f"URL Blocker: Importing blocklist from {filepath}...")
+        try:
+            stats = bulk_import_blocklist(self.app.policy_manager, filepath,
+                                          progress_callback=lambda fraction, added: self.app.after(0, self._import_progress_ui, fraction, added),
+                                          cancel_event=cancel_event, log_callback=self.app.log)
+        except OSError as e:
+            self.app.log(f"URL Blocker: Import failed: {e}")
+            self.app.after(0, lambda: messagebox.showerror("Import Failed", f"Could not import the blocklist.\nError: {e}", parent=self.app))
+            return
+        finally:
+            self.app.after(0, self._import_finished_ui)
+        msg = (f"{stats['added']} URL(s) added from {stats['lines']} line(s) in {stats['seconds']:.1f} s "
+               f"({stats['duplicates']} duplicate(s) skipped, {stats['batches']} batch(es)"
+               + (f", {stats['failed']} failed" if stats['failed'] else "") + ")")
+        self.app.log(f"URL Blocker: Import {'cancelled' if stats['cancelled'] else 'finished'}: {msg}. Restart Chrome to apply.")
+        self.app.after(0, lambda: messagebox.showinfo("Import Cancelled" if stats['cancelled'] else "Import Complete", msg, parent=self.app))
+        self._refresh_after_write()
+
+    def compact_blocklist_ui(self):
+        if self.app.policy_manager:
+            self.app.run_task_in_thread(self._compact_plan_task)
+
+    def _compact_plan_task(self):
+        stats = compact_blocklist(self.app.policy_manager, dry_run=True, log_callback=self.app.log)
+        self.app.log(f"URL Blocker: Compaction check: {stats['message']}")
+        self.app.after(0, self._confirm_compaction, stats)
+
+    def _confirm_compaction(self, stats):
+        if not stats['success'] or not stats['writes']:
+            messagebox.showinfo("Compact Blocklist", stats['message'] if not stats['success'] else "The blocklist is already compact.", parent=self.app)
+            return
+        if messagebox.askyesno("Compact Blocklist", f"{stats['message']}\n\nRemove the redundant entries and renumber the list?", parent=self.app):
+            self.app.run_task_in_thread(self._compact_apply_task)
+
+    def _compact_apply_task(self):
+        stats = compact_blocklist(self.app.policy_manager, log_callback=lambda msg: None) # Covered entries were logged by the check
+        self.app.log(f"URL Blocker: Compaction: {stats['message']}")
+        if not stats['success']:
+            self.app.after(0, lambda: messagebox.showerror("Compaction Failed", stats['message'], parent=self.app))
+        self._refresh_after_write()
+
+    def _build_matcher_task(self):
+        """Compiles the current URLBlocklist/URLAllowlist into a UrlMatcher. Runs in a thread."""
+        snapshot = self.app.policy_manager.get_policy_snapshot()
+        if snapshot.error:
+            self.app.log(f"URL Blocker: Could not read the block/allow lists ({snapshot.error}); results would be incomplete.")
+        blocklist, _ = snapshot.get_list("URLBlocklist")
+        allowlist, _ = snapshot.get_list("URLAllowlist")
+        matcher = UrlMatcher(blocklist.values(), allowlist.values())
+        for pattern in matcher.invalid:
+            self.app.log(f"URL Blocker: Ignoring unusable blocklist entry '{pattern}'.")
+        return matcher
+
+    def test_url_ui(self):
+        if not self.app.policy_manager: return
+        url = simpledialog.askstring("Test URL", "Enter a URL to check against the blocklist:", parent=self)
+        if url and url.strip():
+            self.app.run_task_in_thread(self._test_url_task, None, url.strip())
+
+    def _test_url_task(self, url):
+        blocked, deciding = self._build_matcher_task().match(url)
+        if deciding is None:
+            msg = f"{url}\n\nNot blocked: no blocklist entry matches."
+        elif blocked:
+            msg = f"{url}\n\nBLOCKED by entry '{deciding.pattern}'."
+        else:
+            msg = f"{url}\n\nAllowed by allowlist entry '{deciding.pattern}'."
+        self.app.log(f"URL Blocker: {' '.join(msg.split())}")
+        self.app.after(0, lambda: messagebox.showinfo("Test URL", msg, parent=self.app))
+
+    def test_url_file_ui(self):
+        if not self.app.policy_manager: return
+        filepath = filedialog.askopenfilename(
+            title="Select a file with one URL per line (e.g. a History export)",
+            filetypes=[("Text/CSV files", "*.txt *.csv"), ("All files", "*.*")],
+            parent=self
+        )
+        if filepath:
+            self.app.run_task_in_thread(self._test_url_file_task, None, filepath)
+
+    def _test_url_file_task(self, filepath):
+        matcher = self._build_matcher_task()
+        self.app.log(f"URL Blocker: Checking URLs in {filepath} against {len(matcher)} filter(s)...")
+        try:
+            stats = matcher.evaluate_file(filepath)
+        except OSError as e:
+            self.app.log(f"URL Blocker: Could not read {filepath}: {e}")
+            self.app.after(0, lambda: messagebox.showerror("Check Failed", f"Could not read the file.\nError: {e}", parent=self.app))
+            return
+        rate = stats['checked'] / stats['seconds'] if stats['seconds'] else 0
+        self.app.log(f"URL Blocker: {stats['checked']} URL(s) checked in {stats['seconds']:.2f} s ({rate:,.0f}/s): "
+                     f"{stats['blocked']} blocked, {stats['allowed']} explicitly allowed.")
+        top = stats['hits'].most_common(10)
+        for pattern, count in top:
+            self.app.log(f"URL Blocker:   {count:>8}  {pattern}")
+        lines = "\n".join(f"{count}  {pattern}" for pattern, count in top) or "No entry matched."
+        self.app.after(0, lambda: messagebox.showinfo("URL File Check", f"{stats['checked']} URL(s) checked, {stats['blocked']} would be blocked.\n\nTop matching entries:\n{lines}", parent=self.app))
 
     def clear_data(self):
         """Clears data from the lists in this tab."""
         if hasattr(self, 'blocked_url_list'):
-            self.blocked_url_list.delete(0, END)
+            self.blocked_url_list.set_items([])
+            self._update_count()
         self.app.log("URL Blocker: Data cleared.")
@@ -0,0 +1,161 @@
+import tkinter as tk
+from tkinter import font as tkfont
+import bisect
+import ttkbootstrap as tb
+from ttkbootstrap.constants import *
+
+
+class VirtualListbox(tb.Frame):
+    """A Listbox that only holds the rows currently on screen.
+
+    The model is a sorted list of integer keys with one text line each. Scrolling re-fills
+    the visible window from the model, so lists of any length cost the same to show.
+    Filtering narrows the previous result while the filter text grows (each keystroke only
+    scans what still matched), selection is tracked by key across scrolling, and single
+    rows can be inserted, updated or removed without touching the rest.
+    """
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.listbox = tk.Listbox(self, selectmode=EXTENDED, activestyle='none', exportselection=False)
+        self.listbox.pack(side=LEFT, fill=BOTH, expand=True)
+        self.scrollbar = tb.Scrollbar(self, orient=VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+
+        self._keys = [] # Sorted keys of all rows
+        self._texts = {} # key -> row text
+        self._lowered = {} # key -> lowercased row text, the filter index
+        self._filter = ""
+        self._view = None # Sorted keys matching the filter, None when not filtering
+        self._top = 0 # Position (in the view) of the first visible row
+        self._rows = 1 # Rows that fit into the widget
+        self._shown = [] # Keys currently in the listbox, top to bottom
+        self._selected = set()
+        self._render_pending = False
+        self._line_height = max(1, tkfont.Font(font=self.listbox.cget('font')).metrics('linespace') + 1)
+
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-3)) # X11 wheel
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(3))
+        self.listbox.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.listbox.bind("<Down>", lambda e: self._on_arrow(1))
+        self.listbox.bind("<Prior>", lambda e: self.scroll(-self._rows) or "break")
+        self.listbox.bind("<Next>", lambda e: self.scroll(self._rows) or "break")
+
+    def _visible_keys(self):
+        return self._keys if self._view is None else self._view
+
+    def __len__(self):
+        return len(self._visible_keys())
+
+    def total(self):
+        return len(self._keys)
+
+    # --- Model ---
+    def set_items(self, items):
+        """Replaces all rows. `items` is an iterable of (key, text)."""
+        self._texts = dict(items)
+        self._keys = sorted(self._texts)
+        self._lowered = {key: text.lower() for key, text in self._texts.items()}
+        self._selected &= set(self._texts)
+        self._view = None
+        if self._filter: self._view = [key for key in self._keys if self._filter in self._lowered[key]]
+        self._render()
+
+    def upsert(self, key, text):
+        """Inserts or updates one row."""
+        if key not in self._texts:
+            bisect.insort(self._keys, key)
+        self._texts[key], self._lowered[key] = text, text.lower()
+        if self._view is not None:
+            pos = bisect.bisect_left(self._view, key)
+            present = pos < len(self._view) and self._view[pos] == key
+            matches = self._filter in self._lowered[key]
+            if matches and not present: self._view.insert(pos, key)
+            elif present and not matches: del self._view[pos]
+        self._schedule_render()
+
+    def remove(self, key):
+        if key not in self._texts: return
+        del self._keys[bisect.bisect_left(self._keys, key)]
+        del self._texts[key], self._lowered[key]
+        self._selected.discard(key)
+        if self._view is not None:
+            pos = bisect.bisect_left(self._view, key)
+            if pos < len(self._view) and self._view[pos] == key: del self._view[pos]
+        self._schedule_render()
+
+    def get_text(self, key):
+        return self._texts.get(key)
+
+    def set_filter(self, text):
+        """Shows only rows containing `text` (case-insensitive)."""
+        text = text.strip().lower()
+        if text == self._filter: return
+        if not text:
+            self._view = None
+        elif self._filter and text.startswith(self._filter) and self._view is not None:
+            self._view = [key for key in self._view if text in self._lowered[key]] # Narrow the previous result
+        else:
+            self._view = [key for key in self._keys if text in self._lowered[key]]
+        self._filter = text
+        self._top = 0
+        self._render()
+
+    # --- Selection ---
+    def get_selected_keys(self):
+        return sorted(self._selected)
+
+    def clear_selection(self):
+        self._selected.clear()
+        self.listbox.selection_clear(0, END)
+
+    def _on_select(self, event=None):
+        self._selected.difference_update(self._shown)
+        self._selected.update(self._shown[i] for i in self.listbox.curselection() if i < len(self._shown))
+
+    # --- View ---
+    def _on_configure(self, event):
+        rows = max(1, event.height // self._line_height)
+        if rows != self._rows:
+            self._rows = rows
+            self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._top = int(float(amount) * len(self))
+            self._render()
+        elif action == "scroll":
+            self.scroll(int(amount) * (self._rows if unit == "pages" else 1))
+
+    def _on_arrow(self, step):
+        active = self.listbox.index(ACTIVE)
+        if (step < 0 and active <= 0) or (step > 0 and active >= len(self._shown) - 1):
+            self.scroll(step)
+            return "break"
+
+    def scroll(self, rows):
+        self._top += rows
+        self._render()
+
+    def _schedule_render(self):
+        """Many row updates in one event-loop turn (a committed batch) cause a single redraw."""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        keys = self._visible_keys()
+        self._top = max(0, min(self._top, len(keys) - self._rows))
+        self._shown = keys[self._top:self._top + self._rows]
+        self.listbox.delete(0, END)
+        if self._shown:
+            self.listbox.insert(END, *(self._texts[key] for key in self._shown))
+            for i, key in enumerate(self._shown):
+                if key in self._selected: self.listbox.selection_set(i)
+        if keys:
+            self.scrollbar.set(self._top / len(keys), min(1.0, (self._top + self._rows) / len(keys)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
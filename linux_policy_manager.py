@@ -0,0 +1,190 @@
+import os
+import json
+import glob
+from atomic_writer import write_json_atomic
+from policy_backend import PolicyBackend
+from policy_snapshot import PolicySnapshot
+from policy_definitions import BOOLEAN_POLICIES
+
+MANAGED_POLICY_DIR = "/etc/opt/chrome/policies/managed"
+
+
+def _snapshot_entry(value):
+    """Maps a JSON policy value onto the (registry type, data) pair used by PolicySnapshot."""
+    if isinstance(value, bool): return ("REG_DWORD", int(value))
+    if isinstance(value, int): return ("REG_DWORD", value)
+    if isinstance(value, str): return ("REG_SZ", value)
+    return ("REG_SZ", json.dumps(value, separators=(',', ':'))) # Dictionary policies are stored as JSON strings in the registry too
+
+
+class LinuxPolicyManager(PolicyBackend):
+    """Chrome managed policies on Linux: JSON files in /etc/opt/chrome/policies/managed.
+
+    All *.json files are read to build the snapshot; writes only ever touch our own file,
+    which is replaced atomically. List policies (URLBlocklist, ...) are JSON arrays and
+    are exposed with 1-based indices, like the numbered values of the registry subkeys.
+    A list that only another file sets is shown but read-only: its indices do not refer to
+    our file, so edits to it are rejected instead of landing in the wrong place.
+    """
+    LOCATION = "managed policy JSON"
+
+    def __init__(self, policy_dir=MANAGED_POLICY_DIR, file_name="chrome_manager.json", boolean_policies=BOOLEAN_POLICIES):
+        self.policy_dir = policy_dir
+        self.policy_file = os.path.join(policy_dir, file_name)
+        self.boolean_policies = frozenset(boolean_policies)
+        self.json_policies = frozenset() # Written back as JSON objects, not strings; see _to_json_value
+
+    def use_catalog(self, catalog):
+        """Writes real booleans for every 'main' policy of the catalog, not just the built-in ones."""
+        self.boolean_policies = self.boolean_policies | catalog.boolean_policies()
+        self.json_policies = self.json_policies | catalog.json_policies()
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+
+    def _other_files(self):
+        return sorted(p for p in glob.glob(os.path.join(self.policy_dir, "*.json")) if p != self.policy_file)
+
+    def _foreign_lists(self, own_data):
+        """{list policy: file name} for lists set by other files and not by ours."""
+        foreign = {}
+        for path in self._other_files():
+            try: data = self._read_json(path)
+            except (OSError, ValueError): continue
+            for name, value in data.items():
+                if isinstance(value, list) and not isinstance(own_data.get(name), list):
+                    foreign[name] = os.path.basename(path)
+        return foreign
+
+    def _write_own_file(self, data):
+        os.makedirs(self.policy_dir, exist_ok=True)
+        # Indented and sorted: admins read this file. 0644 because Chrome must be able to read it
+        write_json_atomic(self.policy_file, data, indent=2, sort_keys=True, mode=0o644)
+
+    def get_policy_snapshot(self):
+        """Parses every managed policy file once and merges them (our own file wins on conflicts).
+
+        A file that cannot be read or parsed gives an error snapshot, never a partial one.
+        """
+        keys = {"": {}}
+        try:
+            paths = self._other_files()
+            paths.append(self.policy_file) # Read last so list indices always refer to the file we write
+            for path in paths:
+                for name, value in self._read_json(path).items():
+                    if isinstance(value, list):
+                        keys[name] = {str(i): _snapshot_entry(item) for i, item in enumerate(value, start=1)}
+                    else:
+                        keys[""][name] = _snapshot_entry(value)
+        except PermissionError:
+            return PolicySnapshot(error="access_denied")
+        except (OSError, json.JSONDecodeError) as e: # A partial merge would read as "not configured"
+            print(f"Error reading managed policies: {e}")
+            return PolicySnapshot(error=f"{os.path.basename(path)}: {e}")
+        return PolicySnapshot(keys)
+
+    def get_change_token(self):
+        """Directory mtime plus (name, mtime_ns, size) of every policy file: one scandir, no parsing."""
+        try:
+            files = tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                                 for entry in os.scandir(self.policy_dir) if entry.name.endswith(".json")))
+            return (os.stat(self.policy_dir).st_mtime_ns, files)
+        except FileNotFoundError:
+            return ("missing",)
+        except OSError:
+            return None
+
+    def _to_json_value(self, value_name, value_data, value_type, current=None):
+        """The JSON value to write. Dictionary policies arrive as JSON text (the snapshot's REG_SZ
+        form) and are written as objects when the catalog says so or the file already holds one."""
+        if value_type == "REG_DWORD":
+            value_data = int(value_data)
+            return bool(value_data) if value_name in self.boolean_policies else value_data
+        if isinstance(value_data, (dict, list)): return value_data
+        if value_name in self.json_policies or isinstance(current, (dict, list)):
+            try:
+                parsed = json.loads(value_data)
+                if isinstance(parsed, (dict, list)): return parsed
+            except (TypeError, ValueError):
+                pass
+        return str(value_data)
+
+    def snapshot_entry(self, op):
+        return _snapshot_entry(self._to_json_value(op.key_name or op.value_name, op.value_data, op.value_type))
+
+    def apply_to_snapshot(self, snapshot, ops):
+        """Mirrors _modify: lists are renumbered 1..n without gaps and dropped when empty.
+
+        Needs a re-read (None) when removing a top-level policy, which may uncover a value another
+        file sets, and for JSON-looking text of an uncatalogued policy, which _modify writes as an
+        object only if the file already held one.
+        """
+        for op in ops:
+            if op.op != "set" and not op.key_name: return None
+            if (op.op == "set" and isinstance(op.value_data, str) and op.value_data.lstrip()[:1] in ("{", "[")
+                    and (op.key_name or op.value_name) not in self.json_policies): return None
+        result = super().apply_to_snapshot(snapshot, ops)
+        for key_name in {op.key_name for op in ops if op.key_name}:
+            items = sorted(result.keys[key_name].items(), key=lambda item: int(item[0]))
+            if items: result.keys[key_name] = {str(i): entry for i, (_, entry) in enumerate(items, start=1)}
+            else: del result.keys[key_name]
+        return result
+
+    def _modify(self, changes):
+        """Read-modify-write of our own policy file.
+
+        `changes` is a list of (op, key_name, value_name, value_data, value_type) tuples. List
+        indices always refer to the list as it was before the batch, so removing index 2 does
+        not shift the meaning of index 3 within the same batch.
+        """
+        try:
+            data = self._read_json(self.policy_file)
+            foreign = self._foreign_lists(data)
+            rejected = sorted({key_name for _, key_name, _, _, _ in changes if key_name in foreign})
+            if rejected:
+                return False, "; ".join(f"{key_name} is set by {foreign[key_name]} and is read-only here" for key_name in rejected) + "."
+            lists = {}
+            for op, key_name, value_name, value_data, value_type in changes:
+                if not key_name:
+                    if op == "set": data[value_name] = self._to_json_value(value_name, value_data, value_type, data.get(value_name))
+                    else: data.pop(value_name, None)
+                    continue
+                if key_name not in lists:
+                    current = data.get(key_name)
+                    lists[key_name] = dict(enumerate(current, start=1)) if isinstance(current, list) else {}
+                if op == "set": lists[key_name][int(value_name)] = self._to_json_value(key_name, value_data, value_type, lists[key_name].get(int(value_name)))
+                else: lists[key_name].pop(int(value_name), None)
+            for key_name, items in lists.items():
+                if items: data[key_name] = [value for _, value in sorted(items.items())]
+                else: data.pop(key_name, None)
+            self._write_own_file(data)
+            return True, "Policy file updated successfully."
+        except PermissionError:
+            return False, "Access Denied."
+        except (OSError, ValueError) as e:
+            return False, str(e)
+
+    def apply_batch(self, ops):
+        """All ops are applied with one read and one atomic replace of our policy file.
+
+        Ops on lists owned by another policy file fail on their own; the rest are still applied.
+        """
+        try: foreign = self._foreign_lists(self._read_json(self.policy_file))
+        except (OSError, ValueError): foreign = {}
+        own = [op for op in ops if op.key_name not in foreign]
+        success, msg = self._modify([tuple(op) for op in own]) if own else (True, "")
+        return [(op, False, f"{op.key_name} is set by {foreign[op.key_name]} and is read-only here.") if op.key_name in foreign
+                else (op, success, msg) for op in ops]
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        success, msg = self._modify([("set", key_name, value_name, value_data, value_type)])
+        return success, ("Policy set successfully." if success else msg)
+
+    def remove_policy(self, key_name, value_name):
+        success, msg = self._modify([("remove", key_name, value_name, None, None)])
+        return success, ("Policy removed successfully." if success else msg)
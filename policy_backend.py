@@ -0,0 +1,101 @@
+from policy_transaction import PolicyTransaction
+from policy_snapshot import PolicySnapshot
+from forcelist_manager import ForcelistManager, DEFAULT_UPDATE_URL
+
+
+class PolicyBackend:
+    """Common interface of the Chrome policy stores (Windows registry, Linux managed JSON).
+
+    Policies are addressed the registry way: (key_name, value_name), where key_name is ""
+    for top-level policies and the policy name for list policies such as URLBlocklist
+    (value_name is then the 1-based index). Backends implement get_policy_snapshot,
+    set_policy and remove_policy; everything else is built on top of those. Backends
+    that can write many values in one round-trip also override apply_batch.
+    """
+    LOCATION = "policy store" # Human readable name used in log messages
+
+    def prewarm(self):
+        """Hook for backends that benefit from starting work before the first call."""
+        pass
+
+    def use_catalog(self, catalog):
+        """Hook for backends whose writes depend on policy metadata (e.g. which policies are booleans)."""
+        pass
+
+    def get_policy_snapshot(self):
+        raise NotImplementedError
+
+    def get_change_token(self):
+        """A cheap, comparable fingerprint of the store; it changes whenever any policy changes.
+
+        None means the backend cannot tell, and callers have to re-read the snapshot.
+        """
+        return None
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        raise NotImplementedError
+
+    def remove_policy(self, key_name, value_name):
+        raise NotImplementedError
+
+    def apply_batch(self, ops):
+        """Applies a list of PolicyOps and returns [(op, success, message), ...]."""
+        results = []
+        for op in ops:
+            if op.op == "set": success, msg = self.set_policy(op.key_name, op.value_name, op.value_data, op.value_type)
+            else: success, msg = self.remove_policy(op.key_name, op.value_name)
+            results.append((op, success, msg))
+        return results
+
+    def snapshot_entry(self, op):
+        """The (type, data) pair a re-read would show after the set op `op` succeeded (registry semantics)."""
+        if op.value_type == "REG_DWORD": return (op.value_type, int(op.value_data) & 0xFFFFFFFF)
+        if op.value_type == "REG_QWORD": return (op.value_type, int(op.value_data) & 0xFFFFFFFFFFFFFFFF)
+        if op.value_type == "REG_MULTI_SZ":
+            items = [op.value_data] if isinstance(op.value_data, str) else list(op.value_data or [])
+            return (op.value_type, [str(item) for item in items if item])
+        if op.value_type == "REG_BINARY":
+            return (op.value_type, bytes.fromhex(op.value_data) if isinstance(op.value_data, str) else bytes(op.value_data or b""))
+        return (op.value_type, "" if op.value_data is None else str(op.value_data))
+
+    def apply_to_snapshot(self, snapshot, ops):
+        """A new snapshot: `snapshot` with the successfully applied `ops` on top, without re-reading the store.
+
+        Only the touched keys are copied; the given snapshot is left alone. Returns None when the
+        result cannot be predicted and the store has to be re-read.
+        """
+        keys = dict(snapshot.keys)
+        copied = set()
+        for op in ops:
+            key_name = op.key_name or ""
+            if key_name not in copied:
+                keys[key_name] = dict(keys.get(key_name, {}))
+                copied.add(key_name)
+            if op.op == "set": keys[key_name][str(op.value_name)] = self.snapshot_entry(op)
+            else: keys[key_name].pop(str(op.value_name), None)
+        return PolicySnapshot(keys)
+
+    def transaction(self, snapshot=None):
+        return PolicyTransaction(self, snapshot)
+
+    def get_policy_value(self, key_name, value_name, snapshot=None):
+        if snapshot is None: snapshot = self.get_policy_snapshot() # An empty snapshot is falsy but valid
+        return snapshot.get(key_name, value_name)
+
+    def get_forced_extensions(self, log_callback, snapshot=None):
+        log_callback(f"Reading extension policies from {self.LOCATION}...")
+        if snapshot is None: snapshot = self.get_policy_snapshot() # An empty snapshot is falsy but valid
+        if snapshot.error: return {"_error": snapshot.error}
+        entries, _ = snapshot.get_list("ExtensionInstallForcelist")
+        return {str(value_data).split(';')[0]: index for index, value_data in entries.items()}
+
+    def add_extension(self, ext_id, log_callback, update_url=DEFAULT_UPDATE_URL):
+        log_callback(f"Adding policy for {ext_id}...")
+        result = ForcelistManager(self).add_extensions([(ext_id, update_url)], log_callback=log_callback)
+        if result["invalid"]: return False, f"'{ext_id}' is not a valid extension ID."
+        if result["skipped"]: return True, f"Extension {ext_id} is already in the policy list."
+        return result["success"], ("Policy set successfully." if result["success"] else result["message"])
+
+    def remove_extension(self, index, log_callback):
+        log_callback(f"Removing policy at index {index}...")
+        return self.remove_policy("ExtensionInstallForcelist", str(index))
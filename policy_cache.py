@@ -0,0 +1,135 @@
+import threading
+from policy_backend import PolicyBackend
+from policy_transaction import PolicyOp
+
+
+class PolicyCache(PolicyBackend):
+    """Caching front for a PolicyBackend that notices changes made by anyone.
+
+    The snapshot is only re-read when the backend's change token moves (registry key
+    last-write times, policy file mtimes), so repeated reads of an unchanged store are
+    free. Writes go through to the backend and are applied to the cached snapshot. A watcher
+    thread polls the token and reports outside changes (GPO refresh, other admin tools).
+
+    Listeners are called as listener(changes, source) from a background thread, where
+    `changes` is PolicySnapshot.diff output and `source` is "local" or "external".
+    """
+    def __init__(self, backend, poll_interval=3.0):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self._snapshot = None
+        self._token = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._stop_watching = None
+
+    @property
+    def LOCATION(self):
+        return self.backend.LOCATION
+
+    def prewarm(self):
+        self.backend.prewarm()
+
+    def use_catalog(self, catalog):
+        self.backend.use_catalog(catalog)
+
+    def apply_to_snapshot(self, snapshot, ops):
+        return self.backend.apply_to_snapshot(snapshot, ops)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners: self._listeners.remove(listener)
+
+    def _notify(self, changes, source):
+        for listener in list(self._listeners):
+            try: listener(changes, source)
+            except Exception as e: print(f"Policy cache listener failed: {e}")
+
+    def _reload(self, source, token=None):
+        """Re-reads the snapshot and notifies listeners about what changed since the cached one."""
+        with self._lock:
+            token = token if token is not None else self.backend.get_change_token()
+            snapshot = self.backend.get_policy_snapshot()
+            if snapshot.error: # Not cached and not diffed: a failed read is not "every policy was removed"
+                self._token = None
+                return snapshot
+            previous, self._snapshot, self._token = self._snapshot, snapshot, token
+        if previous is not None:
+            changes = previous.diff(snapshot)
+            if changes: self._notify(changes, source)
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+
+    def get_change_token(self):
+        return self.backend.get_change_token()
+
+    def get_policy_snapshot(self):
+        with self._lock:
+            token = self.backend.get_change_token()
+            if self._snapshot is not None and token is not None and token == self._token:
+                return self._snapshot
+            return self._reload("external", token)
+
+    def _write(self, ops, write):
+        """Runs `write()` (which returns [(op, success, message), ...]) and brings the cache up to date.
+
+        When the store had not changed since the cached read, the successful ops are applied to
+        the cached snapshot and only the new change token is read. Anything unexpected (an outside
+        change before the write, a failed op, a backend that cannot predict the result) re-reads.
+        """
+        with self._lock:
+            expected = self._snapshot is not None and self._token is not None and self.backend.get_change_token() == self._token
+            results = write()
+            snapshot = None
+            if expected and all(success for _, success, _ in results):
+                try: snapshot = self.backend.apply_to_snapshot(self._snapshot, ops)
+                except (TypeError, ValueError): pass # Data the backend took but we cannot mirror: re-read
+            if snapshot is not None:
+                previous, self._snapshot, self._token = self._snapshot, snapshot, self.backend.get_change_token()
+        if snapshot is None: # Listeners are notified outside the lock
+            self._reload("local")
+            return results
+        changes = previous.diff(snapshot)
+        if changes: self._notify(changes, "local")
+        return results
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        op = PolicyOp("set", key_name, value_name, value_data, value_type)
+        results = self._write([op], lambda: [(op, *self.backend.set_policy(key_name, value_name, value_data, value_type))])
+        return results[0][1:]
+
+    def remove_policy(self, key_name, value_name):
+        op = PolicyOp("remove", key_name, value_name, None, None)
+        results = self._write([op], lambda: [(op, *self.backend.remove_policy(key_name, value_name))])
+        return results[0][1:]
+
+    def apply_batch(self, ops):
+        return self._write(ops, lambda: self.backend.apply_batch(ops))
+
+    def check_for_changes(self):
+        """One poll: reloads and notifies only if the change token moved. Returns True if it did."""
+        token = self.backend.get_change_token()
+        with self._lock:
+            if self._snapshot is None or (token is not None and token == self._token):
+                return False
+        self._reload("external", token)
+        return True
+
+    def start_watching(self):
+        if self._stop_watching is not None: return
+        self._stop_watching = threading.Event()
+        def _watch(stop):
+            while not stop.wait(self.poll_interval):
+                try: self.check_for_changes()
+                except Exception as e: print(f"Policy watcher error: {e}")
+        threading.Thread(target=_watch, args=(self._stop_watching,), daemon=True).start()
+
+    def stop_watching(self):
+        if self._stop_watching is not None:
+            self._stop_watching.set()
+            self._stop_watching = None
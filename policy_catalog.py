@@ -0,0 +1,206 @@
+import os
+import re
+import ast
+import json
+import bisect
+import hashlib
+import marshal
+
+import config
+import policy_definitions
+
+CATALOG_FORMAT_VERSION = 2
+_WORD_SPLIT = re.compile(r'[^a-z0-9]+')
+_CAMEL_SPLIT = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+
+def policy_id(policy_item):
+    """Stable ID of a policy: the Chrome policy name (the subkey for list policies, else the value name)."""
+    return policy_item.get('id') or policy_item['key'] or policy_item['value_name']
+
+
+def _tokens(text):
+    words = set(_WORD_SPLIT.split(text.lower()))
+    for camel_word in re.findall(r'[A-Za-z0-9]+', text): # "IncognitoModeAvailability" -> incognito, mode, availability
+        words.update(part.lower() for part in _CAMEL_SPLIT.findall(camel_word))
+    words.discard("")
+    return words
+
+
+def _convert_template_policy(definition):
+    """Maps one policy_templates.json definition onto the policy_definitions item format (or None)."""
+    name, kind = definition.get('name'), definition.get('type')
+    caption = definition.get('caption') or name
+    desc = (definition.get('desc') or "").strip().split("\n\n")[0]
+    help_text = desc if len(desc) <= 400 else desc[:397] + "..."
+    if definition.get('deprecated'):
+        caption += " (deprecated)"
+    item = {"id": name, "name": caption, "key": "", "value_name": name, "help": help_text}
+    if kind == 'main':
+        item.update(type="REG_DWORD", options={"Default": -1, "Enabled": 1, "Disabled": 0}, boolean=True)
+    elif kind == 'int':
+        item.update(type="REG_DWORD", options={"text": "Enter a number"})
+    elif kind == 'int-enum':
+        item.update(type="REG_DWORD", options={"Default": -1, **{i.get('caption') or i.get('name') or str(i['value']): i['value'] for i in definition.get('items', [])}})
+    elif kind == 'string-enum':
+        item.update(type="REG_SZ", options={"Default": -1, **{i.get('caption') or i.get('name') or i['value']: i['value'] for i in definition.get('items', [])}})
+    elif kind in ('string', 'dict'): # Dictionary policies are JSON strings in the registry
+        item.update(type="REG_SZ", options={"text": "Enter JSON" if kind == 'dict' else "Enter value"}, json=kind == 'dict')
+    elif kind in ('list', 'string-enum-list'): # Registry subkey with numbered values; the editor edits entry 1
+        item.update(key=name, value_name="1", type="REG_SZ", options={"text": "Enter value"})
+    else: # 'external', 'group' and unknown types are not editable here
+        return None
+    return item
+
+
+def compile_templates(templates):
+    """Turns parsed policy_templates data into the compact catalog structure that gets cached."""
+    definitions = templates.get('policy_definitions', [])
+    policies, groups, grouped = {}, [], set()
+    def _collect(entries):
+        for definition in entries:
+            if not isinstance(definition, dict): continue
+            if definition.get('type') == 'group':
+                groups.append(definition)
+                _collect(p for p in definition.get('policies', []) if isinstance(p, dict)) # Older nested format
+                continue
+            item = _convert_template_policy(definition)
+            if item: policies[item['id']] = item
+    _collect(definitions)
+
+    categories = []
+    for group in groups:
+        members = [p if isinstance(p, str) else p.get('name') for p in group.get('policies', [])]
+        members = [m for m in members if m in policies and m not in grouped]
+        if members:
+            grouped.update(members)
+            categories.append((group.get('caption') or group.get('name'), members))
+    ungrouped = [pid for pid in policies if pid not in grouped]
+    if ungrouped:
+        categories.append(("Miscellaneous", ungrouped))
+
+    # Hand-written entries have friendlier option labels; they win over the generated ones
+    for category, items in policy_definitions.POLICIES.items():
+        for item in items:
+            pid = policy_id(item)
+            if pid in policies: policies[pid] = dict(item, id=pid, boolean=policies[pid].get('boolean', False))
+    return {"categories": categories, "policies": policies}
+
+
+def _catalog_from_definitions():
+    """Catalog built from the hand-written policy_definitions.POLICIES (no templates file available)."""
+    policies, categories = {}, []
+    for category, items in policy_definitions.POLICIES.items():
+        ids = []
+        for item in items:
+            pid = policy_id(item)
+            policies[pid] = dict(item, id=pid, boolean=pid in policy_definitions.BOOLEAN_POLICIES)
+            ids.append(pid)
+        categories.append((category, ids))
+    return {"categories": categories, "policies": policies}
+
+
+def build_search_index(compiled):
+    """Prefix index (sorted token list) and lowercased haystacks for substring search, over name, value name and help text."""
+    token_ids, haystacks = {}, {}
+    for pid, item in compiled['policies'].items():
+        text = f"{item['name']} {item['value_name']} {pid} {item.get('help', '')}"
+        haystacks[pid] = text.lower()
+        for token in _tokens(text):
+            token_ids.setdefault(token, []).append(pid)
+    tokens = sorted(token_ids)
+    return {"tokens": tokens, "token_ids": [token_ids[t] for t in tokens], "haystacks": haystacks}
+
+
+class PolicyCatalog:
+    """All known Chrome policies, grouped into categories, with a search index. Looked up by policy ID."""
+    def __init__(self, compiled, index=None, source="policy_definitions"):
+        self.categories = compiled['categories'] # [(category name, [policy id, ...]), ...]
+        self.policies = compiled['policies'] # {policy id: policy item}
+        self.index = index or build_search_index(compiled)
+        self.source = source
+        self._order = {pid: i for i, pid in enumerate(pid for _, ids in self.categories for pid in ids)}
+
+    def __len__(self):
+        return len(self.policies)
+
+    def get(self, pid):
+        return self.policies.get(pid)
+
+    def boolean_policies(self):
+        return {item['value_name'] for item in self.policies.values() if item.get('boolean')}
+
+    def json_policies(self):
+        """Dictionary policies: JSON text in the registry, a JSON object in the Linux policy files."""
+        return {item['value_name'] for item in self.policies.values() if item.get('json')}
+
+    def _prefix_ids(self, word):
+        tokens, ids = self.index['tokens'], set()
+        i = bisect.bisect_left(tokens, word)
+        while i < len(tokens) and tokens[i].startswith(word):
+            ids.update(self.index['token_ids'][i])
+            i += 1
+        return ids
+
+    def _substring_ids(self, word):
+        # A plain scan: `in` over a few hundred short lowercased strings takes well under a millisecond
+        return {pid for pid, haystack in self.index['haystacks'].items() if word in haystack}
+
+    def search(self, query):
+        """Policy IDs matching every word of `query` (token prefix or substring), in catalog order."""
+        result = None
+        for word in query.lower().split():
+            ids = self._prefix_ids(word) | self._substring_ids(word)
+            result = ids if result is None else result & ids
+            if not result: return []
+        if result is None:
+            return list(self._order)
+        return sorted(result, key=self._order.get)
+
+
+def _read_templates(raw):
+    text = raw.decode('utf-8-sig')
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError: # The Chromium source copy is a Python literal with comments
+        return ast.literal_eval(text)
+
+
+def load_catalog(templates_path=None, cache_path=None, log_callback=print):
+    """Loads the policy catalog, compiling policy_templates.json only when its hash changed.
+
+    The compiled catalog and its search index are cached with marshal next to the app's other
+    cache files, keyed by the SHA-256 of the templates file. Without a templates file the
+    hand-written policy_definitions.POLICIES are used.
+    """
+    templates_path = templates_path or config.POLICY_TEMPLATES_FILE
+    cache_path = cache_path or config.CATALOG_CACHE_FILE
+    if not os.path.exists(templates_path):
+        catalog = PolicyCatalog(_catalog_from_definitions())
+    else:
+        with open(templates_path, 'rb') as f:
+            raw = f.read()
+        source_hash = hashlib.sha256(raw).hexdigest()
+        catalog = None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = marshal.loads(f.read()) # loads() on the whole buffer is much faster than load(f)
+            if cached.get('version') == CATALOG_FORMAT_VERSION and cached.get('source_hash') == source_hash:
+                catalog = PolicyCatalog(cached['compiled'], cached['index'], source="cache")
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            pass # Missing or unreadable cache: recompile
+        if catalog is None:
+            try:
+                compiled = compile_templates(_read_templates(raw))
+            except (ValueError, SyntaxError) as e:
+                log_callback(f"Policy catalog: could not parse {templates_path}: {e}. Using built-in policies.")
+                compiled = _catalog_from_definitions()
+            catalog = PolicyCatalog(compiled, source=templates_path)
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    marshal.dump({"version": CATALOG_FORMAT_VERSION, "source_hash": source_hash,
+                                  "compiled": compiled, "index": catalog.index}, f)
+            except (OSError, ValueError) as e:
+                log_callback(f"Policy catalog: could not write cache {cache_path}: {e}")
+    return catalog
@@ -25,3 +25,7 @@ POLICIES = {
         {"name": "Hardware Acceleration Mode", "key": "", "value_name": "HardwareAccelerationModeEnabled", "type": "REG_DWORD", "options": {"Default": -1, "Force Enabled": 1, "Force Disabled": 0}, "help": "Forces hardware acceleration on or off. A restart is required."},
     ]
 }
+
+# Policies that are booleans in Chrome's schema. The registry stores them as DWORD 0/1,
+# the Linux managed-policy JSON needs real true/false values.
+BOOLEAN_POLICIES = {"PasswordManagerEnabled", "ShowHomeButton", "BookmarkBarEnabled", "HardwareAccelerationModeEnabled"}
@@ -0,0 +1,158 @@
+import json
+import time
+
+from policy_transaction import PolicyOp
+from forcelist_manager import DEFAULT_UPDATE_URL, EXTENSION_ID_RE
+
+
+def load_spec(filepath):
+    """Reads a desired-state spec file:
+
+        {"policies": {"<policy id>": value or null, ...},
+         "url_blocklist": ["example.com", ...],
+         "forced_extensions": ["<extension id>", ...] or {"<extension id>": "<update url>", ...}}
+
+    Every section is optional. A null policy value means "not configured" (removed);
+    lists are exact, so entries that are not in the spec get removed.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError("A policy spec must be a JSON object.")
+    return spec
+
+
+def _plan_list(key_name, desired, current):
+    """Ops that make the numbered list `current` ({index_str: data}) hold exactly `desired`.
+
+    Entries already present keep their index. Missing entries overwrite unwanted ones
+    first and then take the lowest free indices, so a slightly drifted list gets few writes.
+    """
+    remaining, stale = list(desired), []
+    for index in sorted(current, key=int):
+        if current[index] in remaining: remaining.remove(current[index])
+        else: stale.append(index)
+    ops = [PolicyOp("set", key_name, index, want, "REG_SZ") for index, want in zip(stale, remaining)]
+    ops += [PolicyOp("remove", key_name, index, None, None) for index in stale[len(remaining):]]
+    used, next_index = {int(index) for index in current}, 1
+    for want in remaining[len(stale):]:
+        while next_index in used: next_index += 1
+        ops.append(PolicyOp("set", key_name, str(next_index), want, "REG_SZ"))
+        used.add(next_index)
+    return ops
+
+
+def _same_scalar(current_entry, value, value_type):
+    """Whether the stored entry already holds `value`; dict/list values are compared parsed, so
+    whitespace and key order in the stored JSON text do not count as drift."""
+    if current_entry is None: return False
+    current_type, current_data = current_entry
+    if value_type == "REG_DWORD":
+        try: return current_type == "REG_DWORD" and int(value) == current_data
+        except (TypeError, ValueError): return False
+    if isinstance(value, (dict, list)):
+        try: return json.loads(current_data) == value
+        except (TypeError, ValueError): return False
+    return str(current_data) == str(value)
+
+
+def plan_reconcile(spec, snapshot, catalog):
+    """Compares a spec with one snapshot. Returns (ops, problems): the writes needed to remove
+    the drift, and spec entries that could not be planned (unknown policies, bad values)."""
+    ops, problems = [], []
+    for pid, value in (spec.get("policies") or {}).items():
+        item = catalog.get(pid)
+        if item is None:
+            problems.append(f"Unknown policy '{pid}'.")
+            continue
+        if item['key'] and item['value_name'] == "1" and isinstance(value, list): # List policy given as a whole list
+            entries, _ = snapshot.get_list(item['key'])
+            ops.extend(_plan_list(item['key'], [str(v) for v in value], entries))
+            continue
+        current = snapshot.get_entry(item['key'], item['value_name'])
+        if value is None:
+            if current is not None: ops.append(PolicyOp("remove", item['key'], item['value_name'], None, None))
+            continue
+        if item['type'] == "REG_DWORD":
+            try: value = int(value) # JSON true/false become 1/0
+            except (TypeError, ValueError):
+                problems.append(f"Policy '{pid}' needs a number, got {value!r}.")
+                continue
+        if not _same_scalar(current, value, item['type']):
+            if isinstance(value, (dict, list)): value = json.dumps(value, separators=(',', ':'))
+            ops.append(PolicyOp("set", item['key'], item['value_name'], value, item['type']))
+
+    if "url_blocklist" in spec:
+        entries, _ = snapshot.get_list("URLBlocklist")
+        ops.extend(_plan_list("URLBlocklist", [str(url).strip() for url in spec["url_blocklist"] or []], entries))
+
+    if "forced_extensions" in spec:
+        wanted = spec["forced_extensions"] or []
+        if not isinstance(wanted, dict):
+            wanted = {ext_id: DEFAULT_UPDATE_URL for ext_id in wanted}
+        problems.extend(f"'{ext_id}' is not a valid extension ID." for ext_id in wanted if not EXTENSION_ID_RE.match(ext_id))
+        wanted = {ext_id: update_url for ext_id, update_url in wanted.items() if EXTENSION_ID_RE.match(ext_id)} # A copy: the spec is the caller's
+        entries, _ = snapshot.get_list("ExtensionInstallForcelist")
+        desired = [f"{ext_id};{update_url or DEFAULT_UPDATE_URL}" for ext_id, update_url in wanted.items()]
+        ops.extend(_plan_list("ExtensionInstallForcelist", desired, entries))
+    return ops, problems
+
+
+class ReconcileReport:
+    """Outcome of one reconcile run: the plan, what was applied and how long each phase took."""
+    def __init__(self, ops, problems, timings, result=None, dry_run=True):
+        self.ops = ops
+        self.problems = problems
+        self.timings = timings # {"read": s, "plan": s, "apply": s}
+        self.result = result # CommitResult, None for dry runs and runs without drift
+        self.dry_run = dry_run
+
+    @property
+    def success(self):
+        return not self.problems and (self.result is None or self.result.success)
+
+    def describe_plan(self, limit=20):
+        lines = []
+        for op in self.ops[:limit]:
+            name = f"{op.key_name}\\{op.value_name}" if op.key_name else op.value_name
+            lines.append(f"Set {name} = {op.value_data}" if op.op == "set" else f"Remove {name}")
+        if len(self.ops) > limit: lines.append(f"... and {len(self.ops) - limit} more")
+        return "\n".join(lines)
+
+    def summary(self):
+        timing = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.timings.items())
+        if not self.ops: text = "No drift: policies already match the spec."
+        elif self.dry_run: text = f"{len(self.ops)} change(s) needed."
+        else: text = self.result.summary()
+        if self.problems: text += f" {len(self.problems)} spec problem(s): {self.problems[0]}"
+        return f"{text} ({timing})"
+
+
+def reconcile(backend, spec, catalog, dry_run=True, log_callback=print):
+    """Reads the policies once, plans the drift against `spec` and (unless dry_run) applies
+    exactly those ops in one transaction. A run without drift makes no writes."""
+    timings = {}
+    start = time.perf_counter()
+    snapshot = backend.get_policy_snapshot()
+    timings["read"] = time.perf_counter() - start
+    if snapshot.error:
+        return ReconcileReport([], [f"Could not read current policies ({snapshot.error})."], timings, dry_run=dry_run)
+
+    start = time.perf_counter()
+    ops, problems = plan_reconcile(spec, snapshot, catalog)
+    timings["plan"] = time.perf_counter() - start
+    for problem in problems:
+        log_callback(f"Reconcile: {problem}")
+
+    result = None
+    if ops and not dry_run:
+        start = time.perf_counter()
+        transaction = backend.transaction(snapshot)
+        for op in ops:
+            if op.op == "set": transaction.set(op.key_name, op.value_name, op.value_data, op.value_type)
+            else: transaction.remove(op.key_name, op.value_name)
+        result = transaction.commit()
+        timings["apply"] = time.perf_counter() - start
+    report = ReconcileReport(ops, problems, timings, result, dry_run)
+    log_callback(f"Reconcile{' (dry run)' if dry_run else ''}: {report.summary()}")
+    return report
@@ -0,0 +1,104 @@
+import re
+
+# A value line of `reg query` output looks like "    <name>    <REG_TYPE>    <data>".
+# Names can contain single spaces and the data may be missing for empty strings.
+_REG_VALUE_LINE = re.compile(r'^ {4}(.*?) {4}(REG_[A-Z_]+)(?: {4}(.*))?$')
+
+
+def decode_reg_value(value_type, raw_data):
+    """Converts the textual data printed by `reg query` into a Python value."""
+    raw_data = raw_data or ""
+    if value_type in ("REG_DWORD", "REG_QWORD", "REG_DWORD_BIG_ENDIAN"):
+        raw_data = raw_data.strip()
+        return int(raw_data, 16) if raw_data.lower().startswith("0x") else int(raw_data)
+    if value_type == "REG_MULTI_SZ":
+        return [part for part in raw_data.split("\\0") if part]
+    if value_type == "REG_BINARY":
+        return bytes.fromhex(raw_data.strip())
+    return raw_data # REG_SZ, REG_EXPAND_SZ, REG_NONE
+
+
+class PolicySnapshot:
+    """In-memory copy of the whole Chrome policy tree.
+
+    Keys are stored relative to the policy base key ("" is the base key itself,
+    "URLBlocklist" a direct subkey) and map value names to (type, data) tuples.
+    """
+    def __init__(self, keys=None, error=None):
+        self.keys = keys if keys is not None else {}
+        self.error = error # e.g. "access_denied" when the tree could not be read
+
+    def get_entry(self, key_name, value_name):
+        return self.keys.get(key_name or "", {}).get(value_name)
+
+    def get(self, key_name, value_name, default=None):
+        entry = self.get_entry(key_name, value_name)
+        return entry[1] if entry is not None else default
+
+    def has_key(self, key_name):
+        return (key_name or "") in self.keys
+
+    def get_values(self, key_name):
+        """Returns {value_name: data} for one key."""
+        return {name: data for name, (_, data) in self.keys.get(key_name or "", {}).items()}
+
+    def get_list(self, key_name):
+        """Returns the numbered entries of a list policy key as ({index_str: data}, [index_int, ...])."""
+        entries, indices = {}, []
+        for name, (_, data) in self.keys.get(key_name or "", {}).items():
+            if name.isdigit():
+                entries[name] = data
+                indices.append(int(name))
+        return entries, indices
+
+    def diff(self, other):
+        """Values that differ between this snapshot and `other`: {(key_name, value_name): (old_data, new_data)}.
+
+        A side is None when the value does not exist in that snapshot.
+        """
+        changes = {}
+        for key_name in set(self.keys) | set(other.keys):
+            old_values, new_values = self.keys.get(key_name, {}), other.keys.get(key_name, {})
+            for value_name in set(old_values) | set(new_values):
+                old_entry, new_entry = old_values.get(value_name), new_values.get(value_name)
+                if old_entry != new_entry:
+                    changes[(key_name, value_name)] = (old_entry[1] if old_entry else None, new_entry[1] if new_entry else None)
+        return changes
+
+    def __len__(self):
+        return sum(len(values) for values in self.keys.values())
+
+
+def parse_reg_query_output(stdout, base_key):
+    """Parses the output of `reg query "<base_key>" /s` into a PolicySnapshot.
+
+    `base_key` is the full key path that was queried (e.g. HKEY_LOCAL_MACHINE\\SOFTWARE\\Policies\\Google\\Chrome).
+    """
+    keys = {}
+    base_key_lower = base_key.lower()
+    current = None
+    for line in (stdout or "").splitlines():
+        if not line.strip():
+            continue
+        if line.startswith("HKEY_"):
+            key_path = line.strip()
+            if key_path.lower() == base_key_lower:
+                current = keys.setdefault("", {})
+            elif key_path.lower().startswith(base_key_lower + "\\"):
+                current = keys.setdefault(key_path[len(base_key) + 1:], {})
+            else:
+                current = None # Outside the tree we asked for
+            continue
+        if current is None:
+            continue
+        match = _REG_VALUE_LINE.match(line.rstrip("\r"))
+        if not match:
+            continue
+        value_name, value_type, raw_data = match.groups()
+        if value_name == "(Default)":
+            continue
+        try:
+            current[value_name] = (value_type, decode_reg_value(value_type, raw_data))
+        except ValueError:
+            current[value_name] = (value_type, raw_data) # Keep the raw text rather than dropping the value
+    return PolicySnapshot(keys)
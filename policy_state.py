@@ -0,0 +1,102 @@
+import json
+import time
+
+from policy_snapshot import PolicySnapshot
+
+STATE_FORMAT = "chrome-policy-state"
+STATE_FORMAT_VERSION = 1
+
+
+def _encode_data(value_type, data):
+    return data.hex() if value_type == "REG_BINARY" else data
+
+
+def _decode_data(value_type, data):
+    return bytes.fromhex(data) if value_type == "REG_BINARY" else data
+
+
+def export_policy_state(snapshot):
+    """Serializable copy of a whole policy tree: scalar policies and list policy keys alike."""
+    return {
+        "format": STATE_FORMAT,
+        "version": STATE_FORMAT_VERSION,
+        "exported": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "policies": {key_name: {name: [value_type, _encode_data(value_type, data)] for name, (value_type, data) in values.items()}
+                     for key_name, values in snapshot.keys.items() if values},
+    }
+
+
+def save_policy_state(snapshot, filepath):
+    """Writes the snapshot as a compact state file. Returns the number of values written."""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(export_policy_state(snapshot), f, separators=(',', ':'), ensure_ascii=False)
+    return len(snapshot)
+
+
+def load_policy_state(filepath):
+    """Reads a state file back into a PolicySnapshot. Raises ValueError for files that are not policy states."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if not isinstance(state, dict) or state.get("format") != STATE_FORMAT:
+        raise ValueError("Not a Chrome policy state file.")
+    if state.get("version") != STATE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported policy state version {state.get('version')}.")
+    keys = {}
+    for key_name, values in state.get("policies", {}).items():
+        keys[key_name] = {name: (value_type, _decode_data(value_type, data)) for name, (value_type, data) in values.items()}
+    return PolicySnapshot(keys)
+
+
+def _is_list_key(values):
+    return bool(values) and all(name.isdigit() for name in values)
+
+
+def plan_import(live, target, prune=False):
+    """PolicyOps that turn `live` into `target`, touching only values that differ.
+
+    List policies (keys with numbered values) in the file replace the live list, so
+    stale entries are removed. Other live policies missing from the file are only
+    removed when `prune` is set.
+    """
+    ops = []
+    for key_name, values in target.keys.items():
+        for name, entry in values.items():
+            if live.get_entry(key_name, name) != entry:
+                ops.append(("set", key_name, name, entry[1], entry[0]))
+    for key_name, values in live.keys.items():
+        target_values = target.keys.get(key_name)
+        if not prune and not (target_values and _is_list_key(target_values)):
+            continue
+        for name in values:
+            if not target_values or name not in target_values:
+                ops.append(("remove", key_name, name, None, None))
+    return ops
+
+
+def import_policy_state(backend, filepath, prune=False, dry_run=False, log_callback=print):
+    """Applies a state file to the backend as one transaction of only the changed values.
+
+    Returns (success, message, ops). Re-importing a file that matches the live policies
+    costs one snapshot read and no writes.
+    """
+    try:
+        target = load_policy_state(filepath)
+    except (OSError, ValueError) as e: # json.JSONDecodeError is a ValueError
+        return False, f"Could not read policy state file: {e}", []
+    live = backend.get_policy_snapshot()
+    if live.error:
+        return False, f"Could not read current policies ({live.error}).", []
+
+    ops = plan_import(live, target, prune)
+    if not ops:
+        return True, "Policies already match the file; nothing to change.", []
+    log_callback(f"Policy import: {len(ops)} value(s) differ from {filepath}.")
+    if dry_run:
+        return True, f"{len(ops)} change(s) would be applied.", ops
+
+    transaction = backend.transaction(live)
+    for op, key_name, name, data, value_type in ops:
+        if op == "set": transaction.set(key_name, name, data, value_type)
+        else: transaction.remove(key_name, name)
+    result = transaction.commit()
+    return result.success, result.summary(), ops
@@ -0,0 +1,74 @@
+from collections import namedtuple
+
+PolicyOp = namedtuple('PolicyOp', 'op key_name value_name value_data value_type')
+
+
+class CommitResult:
+    """Outcome of a PolicyTransaction commit: one (op, success, message) tuple per op."""
+    def __init__(self, results):
+        self.results = results
+
+    @property
+    def success(self):
+        return all(ok for _, ok, _ in self.results)
+
+    @property
+    def failures(self):
+        return [(op, msg) for op, ok, msg in self.results if not ok]
+
+    def __len__(self):
+        return len(self.results)
+
+    def summary(self):
+        failed = len(self.failures)
+        if not failed: return f"{len(self.results)} change(s) applied successfully."
+        return f"{len(self.results) - failed} change(s) applied, {failed} failed: {self.failures[0][1]}"
+
+
+class PolicyTransaction:
+    """Collects policy sets/removes and commits them as a single backend operation.
+
+    Only the last op per (key_name, value_name) is kept, so duplicate sets and
+    set-then-remove sequences collapse. If a snapshot is given, ops that would not
+    change it (setting the current value, removing a missing one) are dropped as well.
+    """
+    def __init__(self, backend, snapshot=None):
+        self.backend = backend
+        self.snapshot = snapshot
+        self._ops = {}
+
+    def set(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        self._ops[(key_name or "", str(value_name))] = PolicyOp("set", key_name or "", str(value_name), value_data, value_type)
+        return self
+
+    def remove(self, key_name, value_name):
+        self._ops[(key_name or "", str(value_name))] = PolicyOp("remove", key_name or "", str(value_name), None, None)
+        return self
+
+    def _is_noop(self, op):
+        if self.snapshot is None or self.snapshot.error:
+            return False
+        current = self.snapshot.get_entry(op.key_name, op.value_name)
+        if op.op == "remove":
+            return current is None
+        if current is None:
+            return False
+        current_type, current_data = current
+        if op.value_type == "REG_DWORD":
+            try: return current_type == "REG_DWORD" and int(op.value_data) == current_data
+            except (TypeError, ValueError): return False
+        return current_type == op.value_type and str(op.value_data) == str(current_data)
+
+    def ops(self):
+        """The coalesced list of ops that commit() would send to the backend."""
+        return [op for op in self._ops.values() if not self._is_noop(op)]
+
+    def __len__(self):
+        return len(self.ops())
+
+    def commit(self):
+        ops = self.ops()
+        self._ops = {}
+        if not ops:
+            return CommitResult([])
+        return CommitResult(self.backend.apply_batch(ops))
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import time
+from json.decoder import scanstring
+from json.scanner import make_scanner
+from atomic_writer import WriteResult, write_bytes_atomic
+
+_WS = re.compile(r'[ \t\n\r]*')
+_INT = re.compile(r'-?(?:0|[1-9][0-9]*)(?![0-9.eE])')
+_scan_value = make_scanner(json.JSONDecoder()) # The C scanner json.loads uses; skips one value at a time
+
+
+class UnsupportedLayout(Exception):
+    """The file is not laid out the way the byte patcher can handle safely; rewrite it in full."""
+
+
+def _read_key(text, pos, first):
+    """Reads the next member of an object. Returns (key, value position), or (None, position after '}')."""
+    pos = _WS.match(text, pos).end()
+    ch = text[pos:pos + 1]
+    if ch == '}': return None, pos + 1
+    if not first:
+        if ch != ',': raise UnsupportedLayout(f"expected ',' at byte {pos}")
+        pos = _WS.match(text, pos + 1).end()
+        ch = text[pos:pos + 1]
+    if ch != '"': raise UnsupportedLayout(f"expected a key at byte {pos}")
+    key, pos = scanstring(text, pos + 1)
+    pos = _WS.match(text, pos).end()
+    if text[pos:pos + 1] != ':': raise UnsupportedLayout(f"expected ':' at byte {pos}")
+    return key, _WS.match(text, pos + 1).end()
+
+
+def _skip_value(text, pos):
+    try:
+        return _scan_value(text, pos)[1]
+    except StopIteration:
+        raise UnsupportedLayout(f"invalid value at byte {pos}")
+
+
+def _object_members(text, pos, visit):
+    """Walks the object starting at text[pos]. visit(key, value_pos) returns the end of the value
+    when it read it, or None to have it skipped. Returns the position after the closing brace."""
+    if text[pos:pos + 1] != '{': raise UnsupportedLayout(f"expected an object at byte {pos}")
+    pos, first = pos + 1, True
+    while True:
+        key, pos = _read_key(text, pos, first)
+        if key is None: return pos
+        first = False
+        end = visit(key, pos)
+        pos = end if end is not None else _skip_value(text, pos)
+
+
+def find_extension_state_spans(raw, ext_ids):
+    """Byte spans of extensions.settings.<id>.state in a Preferences file.
+
+    Returns {ext_id: (start, end, current state)} for the requested IDs whose settings are an
+    object with an integer state; IDs missing from extensions.settings (or whose settings are
+    not an object, which the full rewrite skips as well) are left out. Top-level members before
+    "extensions" are skipped with the C scanner and nothing after the extensions object is
+    parsed. Raises UnsupportedLayout for anything where the result could differ from editing
+    the parsed document: duplicate keys, a missing state, a non-integer state, no
+    extensions.settings, or malformed JSON in the part that was read.
+    """
+    text = raw.decode('latin-1') # One character per byte, so positions are byte offsets; the keys we look for are ASCII
+    wanted = set(ext_ids)
+    spans, seen = {}, set()
+
+    def visit_extension(ext_id):
+        def visit(key, pos):
+            if key != "state": return None
+            if ext_id in spans: raise UnsupportedLayout(f"duplicate state for {ext_id}")
+            match = _INT.match(text, pos)
+            if not match: raise UnsupportedLayout(f"state of {ext_id} is not an integer")
+            spans[ext_id] = (match.start(), match.end(), int(match.group()))
+            return match.end()
+        return visit
+
+    def visit_settings(key, pos):
+        if key not in wanted: return None
+        if key in seen: raise UnsupportedLayout(f"duplicate settings for {key}")
+        seen.add(key)
+        if text[pos:pos + 1] != '{': return None # Not an object: reported as not found, like the full rewrite does
+        end = _object_members(text, pos, visit_extension(key))
+        if key not in spans: raise UnsupportedLayout(f"{key} has no state")
+        return end
+
+    found_settings = []
+    def visit_extensions(key, pos):
+        if key != "settings": return None
+        if found_settings: raise UnsupportedLayout("duplicate extensions.settings")
+        found_settings.append(pos)
+        return _object_members(text, pos, visit_settings)
+
+    pos = _WS.match(text).end()
+    if text[pos:pos + 1] != '{': raise UnsupportedLayout("not a JSON object")
+    pos, first = pos + 1, True
+    while True: # Top level: stop at "extensions" instead of walking the (large) rest
+        key, pos = _read_key(text, pos, first)
+        if key is None: raise UnsupportedLayout("no extensions object")
+        first = False
+        if key == "extensions": break
+        pos = _skip_value(text, pos)
+    end = _object_members(text, pos, visit_extensions)
+    if not found_settings: raise UnsupportedLayout("no extensions.settings")
+    if text.find('"extensions"', end) != -1: # A later top-level "extensions" would replace this one when parsed
+        raise UnsupportedLayout("\"extensions\" appears again after the extensions object")
+    return spans
+
+
+def patch_extension_states(prefs_path, states, before_write=None):
+    """Sets extension states by rewriting only the bytes of each state value.
+
+    `states` maps ext_id -> new integer state. When the new values are as wide as the old ones
+    (0 <-> 1) the bytes are overwritten in place and the file size does not change; otherwise
+    the patched bytes are written with write_bytes_atomic. before_write(raw), if given, is called
+    with the original bytes only when something is about to change (e.g. to back them up).
+    Returns (set of IDs found, WriteResult), or None when the file has to be decoded and
+    rewritten instead (see find_extension_state_spans).
+    """
+    start = time.perf_counter()
+    if not all(type(state) is int for state in states.values()): return None
+    with open(prefs_path, 'rb') as f:
+        raw = f.read()
+        signature = os.fstat(f.fileno())
+    try:
+        spans = find_extension_state_spans(raw, states)
+    except (UnsupportedLayout, ValueError): # ValueError: a bad string escape
+        return None
+    edits = sorted((span[0], span[1], str(states[ext_id]).encode('ascii'))
+                   for ext_id, span in spans.items() if span[2] != states[ext_id])
+    if not edits:
+        return set(spans), WriteResult(prefs_path, False, 0, time.perf_counter() - start)
+    if before_write is not None: before_write(raw)
+
+    if any(end - begin != len(value) for begin, end, value in edits):
+        parts, last = [], 0
+        for begin, end, value in edits:
+            parts += [raw[last:begin], value]
+            last = end
+        parts.append(raw[last:])
+        result = write_bytes_atomic(prefs_path, b"".join(parts))
+        return set(spans), result._replace(seconds=time.perf_counter() - start)
+
+    fd = os.open(prefs_path, os.O_RDWR | getattr(os, 'O_BINARY', 0))
+    try:
+        current = os.fstat(fd)
+        if (current.st_mtime_ns, current.st_size) != (signature.st_mtime_ns, signature.st_size):
+            return None # Changed since we read it
+        for begin, _, value in edits: # Each edit is a digit or two: it cannot be torn into invalid JSON
+            os.lseek(fd, begin, os.SEEK_SET)
+            os.write(fd, value)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return set(spans), WriteResult(prefs_path, True, sum(len(value) for _, _, value in edits), time.perf_counter() - start)
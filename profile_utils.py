@@ -1,167 +1,637 @@
 import os
 import json
-import shutil
+import threading
+import time
+import multiprocessing
+import sqlite3
+from contextlib import closing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from atomic_writer import write_json_atomic
+from backup_store import backup_profile_file
+from preferences_patch import patch_extension_states
 
-def get_profile_details(user_data_path, log_callback):
-    profile_details = {}
+LARGE_PREFERENCES_BYTES = 2 * 1024 * 1024 # From this size a Preferences file is parsed in a worker process
+PREFERENCES_CACHE_BYTES = 64 * 1024 * 1024 # Total file size of the parsed documents kept in memory
+PREFERENCES_PATHS = ("profile.name", "extensions.settings") # All the profile and extension views read from Preferences
+PARALLEL_MIN_PROFILES = 4 # With fewer profiles, or a single CPU, a pool costs more than it saves
+
+
+def _json_path(dotted):
+    """SQLite JSON path for a dotted path: "extensions.settings" -> '$."extensions"."settings"'."""
+    return '$' + ''.join(f'."{part}"' for part in dotted.split('.'))
+
+
+def _walk_path(document, dotted):
+    for part in dotted.split('.'):
+        if not isinstance(document, dict): return None
+        document = document.get(part)
+    return document
+
+
+def _has_duplicate_keys(con, text, paths):
+    """True if a key on the way to one of `paths` occurs more than once in its object.
+
+    SQLite resolves such a key to its first occurrence, json.loads to its last. Only objects
+    whose child key is written more than once anywhere in the text are inspected (each with
+    one more C-level parse); duplicates inside the extracted subtrees survive json_extract and
+    are resolved by json.loads like everywhere else.
+    """
+    checked = set()
+    for dotted in paths:
+        parts = dotted.split('.')
+        for depth, part in enumerate(parts):
+            parent = '.'.join(parts[:depth])
+            if (parent, part) in checked: continue
+            checked.add((parent, part))
+            if text.count(f'"{part}"') < 2: continue
+            count, = con.execute("SELECT count(*) FROM json_each(?, ?) WHERE key = ?",
+                                 (text, _json_path(parent) if parent else '$', part)).fetchone()
+            if count > 1: return True
+    return False
+
+
+def extract_json_paths(raw, paths):
+    """Values at the dotted `paths` of the JSON text `raw` (bytes or str), as (values, cost).
+
+    SQLite's JSON functions (C code, in the standard library) parse the text and hand back
+    only the requested subtrees, so the rest of the document (site_engagement and the like,
+    often most of a Preferences file) never becomes Python objects. This bounds the Python
+    objects, not memory: the text is decoded whole and SQLite's parse of it is proportional to
+    the file (a streaming parser would need a third-party package). Missing paths give None.
+    Duplicate keys resolve to the last occurrence, as with json.loads. Falls back to a full
+    json.loads when SQLite lacks JSON support or rejects the text, so malformed input raises
+    the usual JSONDecodeError. `cost` is the size of the extracted text.
+    """
+    text = raw.decode('utf-8') if isinstance(raw, bytes) else raw # A bytes argument would be bound as a BLOB
+    args = [_json_path(p) for p in paths]
+    args += args[-1:] * (2 - len(args)) # With two or more paths json_extract returns a JSON array
+    try:
+        with closing(sqlite3.connect(":memory:")) as con:
+            extracted = con.execute(f"SELECT json_extract(?{', ?' * len(args)})", (text, *args)).fetchone()[0]
+            if extracted is not None and _has_duplicate_keys(con, text, paths): extracted = None # json.loads semantics
+    except sqlite3.Error:
+        extracted = None
+    if extracted is None: # Top level is not an object (or not JSON at all), or duplicate keys on the way
+        document = json.loads(text)
+        return tuple(_walk_path(document, p) for p in paths), len(text)
+    return tuple(json.loads(extracted)[:len(paths)]), len(extracted)
+
+
+class PreferencesCache:
+    """LRU cache of parsed JSON files (Preferences), keyed by (path, mtime_ns, size).
+
+    A hit costs one os.stat. Documents are shared between callers and must be treated as
+    read-only; code that modifies one writes it back and then calls put() (or invalidate()
+    if the write failed). Whole documents (load) and extracted paths (extract) are cached
+    under separate keys; the bound is the total size of the cached files or extracted text.
+    """
+    def __init__(self, max_bytes=PREFERENCES_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # path or (path, paths) -> ((mtime_ns, size), value, cost)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _lookup(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    def load(self, path):
+        """Parsed content of `path`; raises like json.load (OSError, JSONDecodeError)."""
+        signature = self._signature(path)
+        entry = self._lookup(path, signature)
+        if entry is not None: return entry[1]
+        with open(path, 'rb') as f:
+            document = json.loads(f.read())
+        if self._signature(path) == signature: # Not modified while we read it
+            self._store(path, signature, document, signature[1])
+        return document
+
+    def extract(self, path, paths):
+        """Tuple of the values at the dotted `paths` of the JSON file `path` (see extract_json_paths).
+
+        Served from the whole document when that is cached; raises like load().
+        """
+        paths = tuple(paths)
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return tuple(_walk_path(entry[1], p) for p in paths)
+        entry = self._lookup((path, paths), signature)
+        if entry is not None: return entry[1]
+        with open(path, 'rb') as f:
+            values, cost = extract_json_paths(f.read(), paths)
+        if self._signature(path) == signature:
+            self._store((path, paths), signature, values, cost)
+        return values
+
+    def put(self, path, document):
+        """Records `document` as the current content of `path` (after we wrote it)."""
+        try:
+            signature = self._signature(path)
+            self.invalidate(path) # Drops extracted values of the old content too
+            self._store(path, signature, document, signature[1])
+        except OSError: self.invalidate(path)
+
+    def _store(self, key, signature, value, cost):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._bytes -= old[2]
+            if cost > self.max_bytes: return
+            self._entries[key] = (signature, value, cost)
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old[2]
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if k == path or (isinstance(k, tuple) and k[0] == path)]:
+                self._bytes -= self._entries.pop(key)[2]
+
+
+preferences_cache = PreferencesCache()
+
+
+def load_preferences(preferences_path):
+    """Parsed Preferences (or any JSON profile file) through the shared cache. Do not modify the result."""
+    return preferences_cache.load(preferences_path)
+
+
+def extract_preferences(preferences_path, paths):
+    """Only the values at the dotted `paths` of a Preferences file, through the shared cache. Do not modify the result."""
+    return preferences_cache.extract(preferences_path, paths)
+
+
+def _merge_settings(base, overlay):
+    """Deep merge of two extensions.settings dicts; `overlay` (Secure Preferences) wins on conflicts."""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def read_extension_settings(profile_path):
+    """(profile name or None, merged extensions.settings, read-only IDs) of a profile, without parsing anything else.
+
+    Current Chrome keeps part of the extension state (and extensions installed by policy or
+    by default) in `Secure Preferences`; those entries are merged into the ones from
+    `Preferences` for display. Changes are only ever written to `Preferences` (Secure
+    Preferences is signed), so IDs that exist only in Secure Preferences, or whose state it
+    holds, are returned as read-only. A missing Secure Preferences is normal; an unreadable
+    one is ignored.
+    """
+    name, settings = extract_preferences(os.path.join(profile_path, 'Preferences'), PREFERENCES_PATHS)
+    settings = settings if isinstance(settings, dict) else {}
+    try:
+        secure_settings, = extract_preferences(os.path.join(profile_path, 'Secure Preferences'), ("extensions.settings",))
+    except (OSError, ValueError):
+        secure_settings = None
+    read_only = set()
+    if isinstance(secure_settings, dict) and secure_settings:
+        read_only = {ext_id for ext_id, secure in secure_settings.items()
+                     if not isinstance(settings.get(ext_id), dict) or (isinstance(secure, dict) and 'state' in secure)}
+        settings = _merge_settings(settings, secure_settings)
+    return name, settings, read_only
+
+def _worker_count(jobs, max_workers, per_cpu):
+    """Pool size for `jobs` profiles: `max_workers` if given, 1 when parallelism cannot pay off."""
+    if max_workers: return max(1, min(max_workers, jobs))
+    cpus = os.cpu_count() or 1
+    if cpus == 1 or jobs < PARALLEL_MIN_PROFILES: return 1
+    return min(8, cpus * per_cpu, jobs)
+
+
+def _is_profile_folder(name):
+    return name == "Default" or name.startswith("Profile ")
+
+
+def _read_local_state_profiles(user_data_path, log_callback):
+    """Reads profile.info_cache from Chrome's Local State: {folder: info} plus the last-used folder."""
+    local_state_path = os.path.join(user_data_path, 'Local State')
+    try:
+        with open(local_state_path, 'r', encoding='utf-8') as f:
+            profile_state = json.load(f).get('profile', {})
+    except FileNotFoundError:
+        return {}, None
+    except (OSError, ValueError, AttributeError) as e: # ValueError covers JSONDecodeError and bad UTF-8
+        log_callback(f"Could not read Local State ({e}); reading each profile's Preferences instead.")
+        return {}, None
+    info_cache = profile_state.get('info_cache')
+    return (info_cache if isinstance(info_cache, dict) else {}), profile_state.get('last_used')
+
+
+def _read_profile_name_from_preferences(profile_path, item, log_callback):
+    """Fallback for profiles missing from Local State: the name stored in the profile's Preferences."""
+    preferences_path = os.path.join(profile_path, 'Preferences')
+    if not os.path.exists(preferences_path):
+        log_callback(f"Preferences file not found for profile '{item}'. Using folder name.")
+        return item
+    try:
+        profile_name_from_prefs, = extract_preferences(preferences_path, ("profile.name",))
+        if isinstance(profile_name_from_prefs, str) and profile_name_from_prefs and profile_name_from_prefs.strip():
+            return profile_name_from_prefs
+        log_callback(f"Profile '{item}' has no custom name in Preferences, using folder name.")
+    except json.JSONDecodeError:
+        log_callback(f"Error: Could not decode Preferences JSON for profile '{item}'. Using folder name.")
+    except Exception as e:
+        log_callback(f"Error reading Preferences for profile '{item}': {e}. Using folder name.")
+    return item
+
+
+def get_profile_info(user_data_path, log_callback):
+    """Lists the Chrome profiles of a user data dir, most recently used first.
+
+    Names, avatars and last-used times come from the single `Local State` file
+    (profile.info_cache); only profile folders missing from it have their Preferences
+    opened. Returns [{"folder", "path", "name", "avatar_icon", "active_time", "source"}, ...].
+    """
     if not user_data_path or not os.path.exists(user_data_path):
         log_callback(f"Error: Chrome user data path not found or invalid: {user_data_path}")
-        return {}
+        return []
 
     log_callback(f"Scanning for profiles in: {user_data_path}")
-    found_profiles_count = 0
-    for item in os.listdir(user_data_path):
-        if item == "Default" or item.startswith("Profile "):
-            profile_path = os.path.join(user_data_path, item)
-            if not os.path.isdir(profile_path):
-                continue
-
-            preferences_path = os.path.join(profile_path, 'Preferences')
-            profile_name = item # Default to folder name
+    info_cache, last_used = _read_local_state_profiles(user_data_path, log_callback)
+    profiles = []
+    with os.scandir(user_data_path) as entries:
+        folders = [entry.name for entry in entries if _is_profile_folder(entry.name) and entry.is_dir()]
+    for item in folders:
+        profile_path = os.path.join(user_data_path, item)
+        info = info_cache.get(item)
+        if isinstance(info, dict) and str(info.get('name') or '').strip():
+            profiles.append({"folder": item, "path": profile_path, "name": info['name'], "avatar_icon": info.get('avatar_icon'),
+                             "active_time": info.get('active_time') or 0, "source": "Local State"})
+        else:
+            profiles.append({"folder": item, "path": profile_path, "avatar_icon": None, "active_time": 0, "source": "Preferences",
+                             "name": _read_profile_name_from_preferences(profile_path, item, log_callback)})
+    # Last used first, then by last activity; Chrome updates both in Local State
+    profiles.sort(key=lambda p: (p['folder'] != last_used, -float(p['active_time'] or 0), p['folder']))
+    from_preferences = sum(1 for p in profiles if p['source'] == "Preferences")
+    if from_preferences and info_cache:
+        log_callback(f"{from_preferences} profile(s) were missing from Local State and were read from Preferences.")
+    return profiles
 
-            if os.path.exists(preferences_path):
-                try:
-                    with open(preferences_path, 'r', encoding='utf-8') as f:
-                        prefs = json.load(f)
-                        profile_name_from_prefs = prefs.get('profile', {}).get('name')
-                        if profile_name_from_prefs and profile_name_from_prefs.strip():
-                             profile_name = profile_name_from_prefs
-                        else:
-                            log_callback(f"Profile '{item}' has no custom name in Preferences, using folder name.")
-                except json.JSONDecodeError:
-                    log_callback(f"Error: Could not decode Preferences JSON for profile '{item}'. Using folder name.")
-                except Exception as e:
-                    log_callback(f"Error reading Preferences for profile '{item}': {e}. Using folder name.")
-            else:
-                log_callback(f"Preferences file not found for profile '{item}'. Using folder name.")
 
-            original_name = profile_name
-            counter = 2
-            while profile_name in profile_details: # Ensure unique profile names in our map
-                profile_name = f"{original_name} ({counter})"
-                counter += 1
+def get_profile_details(user_data_path, log_callback):
+    """Returns {unique profile name: profile path}, sorted by name."""
+    profile_details = {}
+    profiles = get_profile_info(user_data_path, log_callback)
+    for profile in profiles:
+        profile_name = profile['name']
+        original_name = profile_name
+        counter = 2
+        while profile_name in profile_details: # Ensure unique profile names in our map
+            profile_name = f"{original_name} ({counter})"
+            counter += 1
 
-            profile_details[profile_name] = profile_path
-            found_profiles_count +=1
-            log_callback(f"Found profile: '{profile_name}' at {profile_path}")
+        profile_details[profile_name] = profile['path']
+        log_callback(f"Found profile: '{profile_name}' at {profile['path']}")
 
-    if found_profiles_count == 0:
+    if not profiles:
         log_callback("No Chrome profiles found (Default or Profile X).")
     else:
-        log_callback(f"Finished scanning. Found {found_profiles_count} profile(s).")
+        log_callback(f"Finished scanning. Found {len(profiles)} profile(s).")
 
     return dict(sorted(profile_details.items()))
 
 
-def get_extensions_for_profile(profile_path, log_callback):
+def _extensions_from_settings(installed_extensions, profile_name, messages, read_only=()):
+    """Builds the {display name: details} map of the extensions in an extensions.settings dict.
+
+    Extensions in `read_only` (state kept in Secure Preferences) are shown but marked 'read_only'.
+    """
     extensions = {}
+    if not installed_extensions:
+        messages.append(f"No extensions found in Preferences for profile: {profile_name}")
+        return {}
+
+    for ext_id, details in installed_extensions.items():
+        if len(ext_id) != 32:  # Basic validation for extension ID format
+            messages.append(f"Skipping invalid extension ID: {ext_id}")
+            continue
+
+        manifest = details.get('manifest', {})
+        name = manifest.get('name', ext_id)
+        # Clean up common localization placeholders in names
+        if name.startswith('__MSG_') and name.endswith('__'):
+            name = name.replace('__MSG_','').replace('__','').replace('appName','').strip() or ext_id
+
+        state = details.get('state', 0) # 0: disabled, 1: enabled
+        version = manifest.get('version', 'N/A')
+        permissions = manifest.get('permissions', [])
+        path_to_extension = details.get('path', 'N/A') # Renamed for clarity
+        was_installed_by_default = details.get('was_installed_by_default', False)
+
+        original_name = name
+        counter = 2
+        while name in extensions: # Ensure unique names in our map
+            name = f"{original_name} ({counter})"
+            counter += 1
+
+        extensions[name] = {
+            'id': ext_id,
+            'state': state,
+            'version': version,
+            'permissions': permissions,
+            'path': path_to_extension,
+            'was_installed_by_default': was_installed_by_default,
+            'read_only': ext_id in read_only
+        }
+    messages.append(f"Found {len(extensions)} extensions for profile: {profile_name}")
+    return dict(sorted(extensions.items()))
+
+
+def _read_profile_extensions(profile_path):
+    """Reads one profile's extensions. Returns (extensions, profile name or None, log messages).
+
+    Module-level and free of callbacks so it can run in a worker process.
+    """
+    messages = []
     preferences_file = os.path.join(profile_path, 'Preferences')
     if not os.path.exists(preferences_file):
-        log_callback(f"Preferences file not found for profile: {os.path.basename(profile_path)}")
-        return {}
+        messages.append(f"Preferences file not found for profile: {os.path.basename(profile_path)}")
+        return {}, None, messages
 
     try:
-        with open(preferences_file, 'r', encoding='utf-8') as f:
-            prefs = json.load(f)
-
-        installed_extensions = prefs.get('extensions', {}).get('settings', {})
-        if not installed_extensions:
-            log_callback(f"No extensions found in Preferences for profile: {os.path.basename(profile_path)}")
-            return {}
-
-        for ext_id, details in installed_extensions.items():
-            if len(ext_id) != 32:  # Basic validation for extension ID format
-                log_callback(f"Skipping invalid extension ID: {ext_id}")
-                continue
-
-            manifest = details.get('manifest', {})
-            name = manifest.get('name', ext_id)
-            # Clean up common localization placeholders in names
-            if name.startswith('__MSG_') and name.endswith('__'):
-                name = name.replace('__MSG_','').replace('__','').replace('appName','').strip() or ext_id
-
-            state = details.get('state', 0) # 0: disabled, 1: enabled
-            version = manifest.get('version', 'N/A')
-            permissions = manifest.get('permissions', [])
-            path_to_extension = details.get('path', 'N/A') # Renamed for clarity
-            was_installed_by_default = details.get('was_installed_by_default', False)
-
-            original_name = name
-            counter = 2
-            while name in extensions: # Ensure unique names in our map
-                name = f"{original_name} ({counter})"
-                counter += 1
-
-            extensions[name] = {
-                'id': ext_id,
-                'state': state,
-                'version': version,
-                'permissions': permissions,
-                'path': path_to_extension,
-                'was_installed_by_default': was_installed_by_default
-            }
-        log_callback(f"Found {len(extensions)} extensions for profile: {os.path.basename(profile_path)}")
+        profile_name, settings, read_only = read_extension_settings(profile_path)
+        return _extensions_from_settings(settings, os.path.basename(profile_path), messages, read_only), profile_name, messages
     except json.JSONDecodeError as e:
-        log_callback(f"Error decoding Preferences JSON for {os.path.basename(profile_path)}: {e}")
-        return {} # Return empty if prefs are corrupt
+        messages.append(f"Error decoding Preferences JSON for {os.path.basename(profile_path)}: {e}")
     except Exception as e:
-        log_callback(f"Error reading extensions for {os.path.basename(profile_path)}: {e}")
-        return {} # Return empty on other errors
+        messages.append(f"Error reading extensions for {os.path.basename(profile_path)}: {e}")
+    return {}, None, messages # Return empty if prefs are corrupt or unreadable
 
-    return dict(sorted(extensions.items()))
 
+def get_extensions_for_profile(profile_path, log_callback):
+    extensions, _, messages = _read_profile_extensions(profile_path)
+    for message in messages:
+        log_callback(message)
+    return extensions
 
-def set_extension_state_for_profile(profile_path, ext_id, new_state, log_callback):
-    prefs_path = os.path.join(profile_path, 'Preferences')
-    if not os.path.exists(prefs_path):
-        log_callback(f"Error: Preferences file not found at {prefs_path}")
-        return False
 
-    # Create a backup before modifying
-    backup_path = prefs_path + '.bak'
-    try:
-        shutil.copyfile(prefs_path, backup_path)
-        log_callback(f"Backup of Preferences created at {backup_path}")
-    except IOError as e:
-        log_callback(f"Warning: Could not create backup of Preferences file: {e}")
+def scan_profiles(user_data_path, log_callback, max_workers=None):
+    """Reads the extensions of every profile in parallel and yields each profile as soon as it is done.
+
+    Decoding the extracted subtrees (and the full-parse fallback) holds the GIL, so Preferences
+    files of LARGE_PREFERENCES_BYTES and more are read in a process pool; small ones, where starting a process would cost more than the
+    parse, go to a thread pool. On a single CPU or with few profiles they are read one by one
+    in this thread instead. Yields the get_profile_info dicts with "extensions" added, in
+    completion order.
+    """
+    profiles = get_profile_info(user_data_path, log_callback)
+    if not profiles: return
+    workers = _worker_count(len(profiles), max_workers, 1)
+    if workers == 1:
+        for profile in profiles:
+            extensions, _, messages = _read_profile_extensions(profile['path'])
+            for message in messages:
+                log_callback(message)
+            yield dict(profile, extensions=extensions)
+        return
+    small, large = [], []
+    for profile in profiles:
+        try: size = os.path.getsize(os.path.join(profile['path'], 'Preferences'))
+        except OSError: size = 0
+        (large if size >= LARGE_PREFERENCES_BYTES else small).append(profile)
 
+    process_pool = None
+    if large:
+        # "spawn" everywhere: forking a process that runs Tk and worker threads is not safe
+        process_pool = ProcessPoolExecutor(max_workers=min(workers, len(large)), mp_context=multiprocessing.get_context("spawn"))
     try:
-        with open(prefs_path, 'r+', encoding='utf-8') as f:
-            prefs = json.load(f)
+        with ThreadPoolExecutor(max_workers=min(workers, max(1, len(small)))) as thread_pool:
+            futures = {thread_pool.submit(_read_profile_extensions, p['path']): p for p in small}
+            futures.update({process_pool.submit(_read_profile_extensions, p['path']): p for p in large})
+            for future in as_completed(futures):
+                profile = futures[future]
+                try:
+                    extensions, _, messages = future.result()
+                except Exception as e: # e.g. BrokenProcessPool: parse it here instead
+                    log_callback(f"Parallel scan of {profile['folder']} failed ({e}); reading it directly.")
+                    extensions, _, messages = _read_profile_extensions(profile['path'])
+                for message in messages:
+                    log_callback(message)
+                yield dict(profile, extensions=extensions)
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _PreferencesWriteQueue:
+    """Group commit for one Preferences file.
+
+    Callers append their request to `pending`, then take `lock`; whoever holds it applies
+    everything pending (its own request and any that queued up meanwhile) in one write, so
+    concurrent changes to a profile are serialized and merged instead of racing each other.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_lock = threading.Lock()
+
+
+_write_queues = {} # Preferences path -> _PreferencesWriteQueue
+_write_queues_lock = threading.Lock()
 
-            if 'extensions' not in prefs or 'settings' not in prefs['extensions']:
-                log_callback(f"Error: 'extensions.settings' structure not found in Preferences for {ext_id}.")
-                return False
 
-            if ext_id not in prefs['extensions']['settings']:
-                log_callback(f"Error: Extension ID {ext_id} not found in Preferences.")
-                return False
+def _write_queue(prefs_path):
+    with _write_queues_lock:
+        return _write_queues.setdefault(os.path.normcase(os.path.abspath(prefs_path)), _PreferencesWriteQueue())
 
-            prefs['extensions']['settings'][ext_id]['state'] = new_state
 
-            f.seek(0)  # Rewind to the beginning of the file
-            json.dump(prefs, f, indent=4) # Write changes
-            f.truncate() # Remove trailing content if new data is smaller
+def preferences_write_lock(prefs_path):
+    """The lock held while a Preferences file is rewritten; take it for any other read-modify-write of the file."""
+    return _write_queue(prefs_path).lock
 
-            log_callback(f"Successfully set state to {'Enabled' if new_state == 1 else 'Disabled'} for extension {ext_id} in profile {os.path.basename(profile_path)}")
-            return True
 
+def _apply_state_batch(prefs_path, batch):
+    """One backup (in the profile's BackupStore) and one write for all queued requests; fills in each request's result.
+
+    The state bytes are patched in place when the file's layout allows it; otherwise the
+    document is parsed once and rewritten. The backup is only taken when the file is about
+    to change, so requests that change nothing do not push older backups out of retention.
+    """
+    logs = list({id(r['log_callback']): r['log_callback'] for r in batch}.values())
+    def log_all(msg):
+        for log_callback in logs: log_callback(msg)
+
+    def finish(success, message):
+        for request in batch:
+            if success:
+                applied = [ext_id for ext_id, _ in request['changes'] if ext_id in applied_states]
+                missing = [ext_id for ext_id, _ in request['changes'] if ext_id not in applied_states]
+                message = f"{len(applied)} extension state(s) set, {len(missing)} not found."
+            else:
+                applied, missing = [], []
+            request['result'] = {"applied": applied, "missing": missing, "success": success and not missing, "message": message}
+            request['done'].set()
+
+    applied_states = {}
+    if not os.path.exists(prefs_path):
+        log_all(f"Error: Preferences file not found at {prefs_path}")
+        return finish(False, "Preferences file not found.")
+
+    def backup(raw=None): # Called right before the file is modified
+        try:
+            count = sum(len(request['changes']) for request in batch)
+            entry = backup_profile_file(os.path.dirname(prefs_path), f"Before setting the state of {count} extension(s)", data=raw)
+            log_all(f"Backup of Preferences stored (backup #{entry.backup_id}).")
+        except (OSError, ValueError) as e:
+            log_all(f"Warning: Could not create backup of Preferences file: {e}")
+
+    try:
+        states = {}
+        for request in batch: # Queue order: a later change to the same extension wins
+            for ext_id, new_state in request['changes']:
+                states[ext_id] = new_state
+        patched = patch_extension_states(prefs_path, states, before_write=backup) # Fast path: only the state bytes change
+        if patched is not None:
+            found, written = patched
+            applied_states.update((ext_id, states[ext_id]) for ext_id in found)
+            if written.written:
+                preferences_cache.invalidate(prefs_path) # A cached document predates the patch
+                log_all(f"Preferences patched in place: {written.bytes_written} bytes in {written.seconds * 1000:.0f} ms.")
+        else:
+            prefs = load_preferences(prefs_path) # Shared with other readers: changed entries are copied, never edited
+            extensions_section = prefs.get('extensions')
+            settings = extensions_section.get('settings') if isinstance(extensions_section, dict) else None
+            if not isinstance(settings, dict):
+                log_all("Error: 'extensions.settings' structure not found in Preferences.")
+                return finish(False, "'extensions.settings' not found in Preferences.")
+            new_settings, modified = dict(settings), False
+            for ext_id, new_state in states.items():
+                if not isinstance(settings.get(ext_id), dict): continue
+                if settings[ext_id].get('state') != new_state:
+                    new_settings[ext_id] = dict(settings[ext_id], state=new_state)
+                    modified = True
+                applied_states[ext_id] = new_state
+            if modified:
+                backup()
+                document = dict(prefs, extensions=dict(extensions_section, settings=new_settings))
+                written = write_json_atomic(prefs_path, document) # Compact, like Chrome writes it
+                preferences_cache.put(prefs_path, document) # Only once the write has succeeded
+                log_all(f"Preferences written: {written.bytes_written} bytes in {written.seconds * 1000:.0f} ms.")
     except json.JSONDecodeError as e:
-        log_callback(f"Error decoding Preferences JSON while setting state for {ext_id}: {e}")
-        # Attempt to restore backup if modification failed
-        if os.path.exists(backup_path):
-            try:
-                shutil.copyfile(backup_path, prefs_path)
-                log_callback(f"Restored Preferences from backup due to error.")
-            except IOError as re:
-                log_callback(f"FATAL: Could not restore Preferences from backup: {re}")
-        return False
+        preferences_cache.invalidate(prefs_path)
+        log_all(f"Error decoding Preferences JSON while setting extension states: {e}")
+        return finish(False, f"Could not decode Preferences: {e}")
     except Exception as e:
-        log_callback(f"Error modifying Preferences file for extension {ext_id}: {e}")
-        if os.path.exists(backup_path): # Same restoration attempt
+        log_all(f"Error modifying Preferences file: {e}")
+        return finish(False, f"Could not write Preferences: {e}")
+
+    profile_name = os.path.basename(os.path.dirname(prefs_path))
+    for request in batch:
+        for ext_id, new_state in request['changes']:
+            if ext_id not in applied_states:
+                request['log_callback'](f"Error: Extension ID {ext_id} not found in Preferences.")
+            else:
+                request['log_callback'](f"Successfully set state to {'Enabled' if applied_states[ext_id] == 1 else 'Disabled'} for extension {ext_id} in profile {profile_name}")
+    finish(True, "")
+
+
+def set_extension_states_for_profile(profile_path, changes, log_callback):
+    """Applies many (ext_id, new_state) changes to a profile's Preferences with a single write.
+
+    Calls for the same profile from several threads are merged: whichever thread gets to
+    write takes every change queued so far. Returns a dict: {"applied", "missing",
+    "success", "message"}.
+    """
+    changes = list(changes)
+    if not changes:
+        return {"applied": [], "missing": [], "success": True, "message": "No changes."}
+    prefs_path = os.path.join(profile_path, 'Preferences')
+    request = {"changes": changes, "log_callback": log_callback, "done": threading.Event(), "result": None}
+    queue = _write_queue(prefs_path)
+    with queue.pending_lock:
+        queue.pending.append(request)
+    while not request['done'].is_set():
+        with queue.lock:
+            with queue.pending_lock:
+                batch, queue.pending = queue.pending, []
             try:
-                shutil.copyfile(backup_path, prefs_path)
-                log_callback(f"Restored Preferences from backup due to error.")
-            except IOError as re:
-                log_callback(f"FATAL: Could not restore Preferences from backup: {re}")
-        return False
+                if batch: _apply_state_batch(prefs_path, batch)
+            finally:
+                for other in batch: # Never leave a waiting thread behind, even if a callback raised
+                    if not other['done'].is_set():
+                        other['result'] = {"applied": [], "missing": [], "success": False, "message": "Preferences update was interrupted."}
+                        other['done'].set()
+    return request['result']
+
+
+def set_extension_state_for_profile(profile_path, ext_id, new_state, log_callback):
+    result = set_extension_states_for_profile(profile_path, [(ext_id, new_state)], log_callback)
+    return ext_id in result['applied']
+
+
+def panic_changes(extensions):
+    """The Panic rule: disable every enabled extension that was not installed by default (and that we can change)."""
+    return [(ext['id'], 0) for ext in extensions.values()
+            if not ext['was_installed_by_default'] and ext['state'] == 1 and not ext.get('read_only')]
+
+
+def bulk_extension_action(user_data_path, choose_changes, log_callback, max_workers=None):
+    """Applies an extension state change to every profile of a user data dir in parallel.
+
+    choose_changes(extensions) gets a profile's {display name: details} map and returns its
+    [(ext_id, new_state), ...] (e.g. panic_changes, or one ID when the profile has it); it
+    should leave out 'read_only' extensions, whose state is not in Preferences. Each
+    profile is read and written by one worker with a single batched write, so the total time
+    follows the slowest profile rather than the sum (on a single CPU, or with fewer than
+    PARALLEL_MIN_PROFILES profiles, they run one after another). Log lines are prefixed with the profile
+    name. Returns {"profiles": [{"profile", "path", "changes", "applied", "missing", "success",
+    "message", "seconds"}, ...] sorted by profile name, "seconds", "slowest"}.
+    """
+    start = time.perf_counter()
+    profiles = get_profile_details(user_data_path, log_callback)
+
+    def run(profile_name, profile_path):
+        profile_start = time.perf_counter()
+        profile_log = lambda msg: log_callback(f"[{profile_name}] {msg}")
+        outcome = {"profile": profile_name, "path": profile_path, "changes": [], "applied": [], "missing": [], "success": True, "message": ""}
+        try:
+            extensions, _, messages = _read_profile_extensions(profile_path)
+            for message in messages:
+                profile_log(message)
+            outcome["changes"] = changes = choose_changes(extensions)
+            if not changes:
+                outcome["message"] = "Nothing to change."
+            else:
+                result = set_extension_states_for_profile(profile_path, changes, profile_log)
+                outcome.update(applied=result["applied"], missing=result["missing"], success=result["success"], message=result["message"])
+        except Exception as e: # One bad profile must not stop the others
+            outcome.update(success=False, message=f"Failed: {e}")
+            profile_log(f"Error: {e}")
+        outcome["seconds"] = time.perf_counter() - profile_start
+        return outcome
+
+    workers = _worker_count(len(profiles), max_workers, 2) # Mostly file I/O and C-level parsing
+    if workers == 1:
+        outcomes = [run(name, path) for name, path in profiles.items()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run, name, path) for name, path in profiles.items()]
+            outcomes = [future.result() for future in futures]
+    return {"profiles": sorted(outcomes, key=lambda o: o["profile"]), "seconds": time.perf_counter() - start,
+            "slowest": max((o["seconds"] for o in outcomes), default=0.0)}
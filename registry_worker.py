@@ -0,0 +1,147 @@
+import subprocess
+import threading
+import queue
+import atexit
+import uuid
+import weakref
+
+END_MARKER = "@@REGWORKER_END"
+_live_workers = weakref.WeakSet() # Closed at interpreter exit by one atexit hook for the module
+
+
+@atexit.register
+def _close_all_workers():
+    for worker in list(_live_workers):
+        worker.close()
+
+
+class PowerShellFraming:
+    """Runs commands in a long-lived `powershell -Command -` host.
+
+    Every output line is prefixed with "1|" (stdout) or "2|" (stderr) and each command
+    is terminated by "<END_MARKER>|<token>|<exit code>" so responses can be framed.
+    """
+    argv = ['powershell', '-NoLogo', '-NoProfile', '-NonInteractive', '-Command', '-']
+    init_lines = ["[Console]::OutputEncoding = [System.Text.Encoding]::UTF8", "$ProgressPreference = 'SilentlyContinue'"]
+
+    def wrap(self, command, token):
+        return ("$__out = & { " + command + " } 2>&1; $__rc = $LASTEXITCODE; "
+                "foreach ($__l in $__out) { if ($__l -is [System.Management.Automation.ErrorRecord]) { '2|' + $__l.ToString() } else { '1|' + $__l } }; "
+                f"'{END_MARKER}|{token}|' + $__rc")
+
+
+class PosixShellFraming:
+    """Same protocol on top of `sh`. Used to exercise the worker on Linux with a stub `reg` function."""
+    argv = ['sh']
+    init_lines = []
+
+    def __init__(self, init_lines=None):
+        self.init_lines = list(init_lines or [])
+
+    def wrap(self, command, token):
+        return ('__e=$(mktemp); __o=$( { ' + command + ' ; } 2>"$__e" ); __rc=$?; '
+                '[ -n "$__o" ] && printf "%s\\n" "$__o" | sed "s/^/1|/"; sed "s/^/2|/" "$__e"; rm -f "$__e"; '
+                f'echo "{END_MARKER}|{token}|$__rc"')
+
+
+class RegistryWorker:
+    """A shell process that is started once and fed commands over stdin/stdout.
+
+    Replaces the spawn-per-call PowerShell path: `run()` returns (stdout, stderr, exit code)
+    for each command (the exit code is None if the worker itself failed). The process is restarted
+    automatically if it dies, and a command is retried once on a fresh process.
+    """
+    def __init__(self, framing=None, timeout=30):
+        self.framing = framing or PowerShellFraming()
+        self.timeout = timeout
+        self.restarts = 0
+        self._proc = None
+        self._lines = None
+        self._lock = threading.Lock()
+        _live_workers.add(self)
+
+    def _spawn(self):
+        kwargs = {}
+        if hasattr(subprocess, 'STARTUPINFO'): # Windows only: keep the console hidden
+            startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
+            kwargs['startupinfo'] = startupinfo
+            kwargs['creationflags'] = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        proc = subprocess.Popen(self.framing.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, encoding='utf-8', errors='ignore', bufsize=1, **kwargs)
+        lines = queue.Queue()
+        def _reader():
+            for line in proc.stdout:
+                lines.put(line.rstrip('\r\n'))
+            lines.put(None) # EOF: the process exited or crashed
+        threading.Thread(target=_reader, daemon=True).start()
+        for init_line in self.framing.init_lines:
+            proc.stdin.write(init_line + "\n")
+        proc.stdin.flush()
+        self._proc, self._lines = proc, lines
+
+    def _ensure_started(self):
+        if self._proc is None or self._proc.poll() is not None:
+            if self._proc is not None:
+                self.restarts += 1
+            self._spawn()
+
+    def start(self):
+        with self._lock:
+            self._ensure_started()
+
+    def prewarm(self):
+        """Starts the worker process in the background so the first real call does not pay for it."""
+        def _start():
+            try: self.start()
+            except OSError as e: print(f"Registry worker prewarm failed: {e}")
+        threading.Thread(target=_start, daemon=True).start()
+
+    def _kill(self):
+        if self._proc is not None:
+            try: self._proc.kill()
+            except OSError: pass
+            self._proc = None
+
+    def _request(self, command):
+        token = uuid.uuid4().hex
+        self._proc.stdin.write(self.framing.wrap(command.replace("\n", " "), token) + "\n")
+        self._proc.stdin.flush()
+        stdout_lines, stderr_lines = [], []
+        end_prefix = f"{END_MARKER}|{token}|"
+        while True:
+            line = self._lines.get(timeout=self.timeout)
+            if line is None:
+                raise BrokenPipeError("Registry worker exited unexpectedly.")
+            if line.startswith(end_prefix):
+                exit_code = line[len(end_prefix):].strip()
+                exit_code = int(exit_code) if exit_code.lstrip("-").isdigit() else 0 # PowerShell: empty when no native command ran
+                return "\n".join(stdout_lines), "\n".join(stderr_lines), exit_code
+            if line.startswith("2|"): stderr_lines.append(line[2:])
+            elif line.startswith("1|"): stdout_lines.append(line[2:])
+            # Anything else is noise from the host (prompts, init output) and is dropped
+
+    def run(self, command):
+        """Runs one command and returns (stdout, stderr, exit code)."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._ensure_started()
+                    return self._request(command)
+                except queue.Empty:
+                    self._kill()
+                    return None, f"Registry worker timed out after {self.timeout}s.", None
+                except (BrokenPipeError, OSError, ValueError) as e:
+                    self._kill() # Restart on the next attempt
+                    if attempt == 1:
+                        return None, f"Registry worker failed: {e}", None
+
+    def close(self):
+        _live_workers.discard(self)
+        proc, self._proc = self._proc, None
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proc.kill()
@@ -0,0 +1,100 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+import atomic_writer
+from atomic_writer import dumps_compact, write_bytes_atomic, write_json_atomic
+
+
+class AtomicWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "Preferences")
+        with open(self.path, 'wb') as f:
+            f.write(b'{"old":true}')
+        os.chmod(self.path, 0o640)
+
+    def _content(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def _leftovers(self):
+        return sorted(name for name in os.listdir(self.tmp.name) if name != "Preferences")
+
+    def test_replace_keeps_the_mode(self):
+        result = write_bytes_atomic(self.path, b'{"new":true}')
+        self.assertEqual((result.written, result.bytes_written), (True, 12))
+        self.assertEqual(self._content(), b'{"new":true}')
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        self.assertEqual(self._leftovers(), [])
+
+    def test_new_file_gets_the_given_mode(self):
+        path = os.path.join(self.tmp.name, "policy.json")
+        write_bytes_atomic(path, b"{}", mode=0o644)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o644)
+
+    def test_file_and_directory_are_fsynced(self):
+        synced = []
+        real_fsync = os.fsync
+        def fsync(fd):
+            synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+            real_fsync(fd)
+        with mock.patch.object(atomic_writer.platform, "system", return_value="Linux"), mock.patch("os.fsync", fsync):
+            write_bytes_atomic(self.path, b'{"new":true}')
+        self.assertEqual(synced, [False, True]) # The data before the rename, the directory after it
+
+    def test_unchanged_content_is_not_written(self):
+        with mock.patch("os.replace") as replace:
+            result = write_bytes_atomic(self.path, b'{"old":true}')
+        self.assertFalse(result.written)
+        replace.assert_not_called()
+
+    def test_failed_write_leaves_the_original(self):
+        with mock.patch("os.fsync", side_effect=OSError(28, "No space left on device")):
+            with self.assertRaises(OSError):
+                write_bytes_atomic(self.path, b'{"new":' + b'0' * 100000 + b'}')
+        self.assertEqual(self._content(), b'{"old":true}')
+        self.assertEqual(self._leftovers(), [])
+
+    def test_failed_replace_leaves_the_original(self):
+        with mock.patch("os.replace", side_effect=PermissionError(13, "Permission denied")):
+            with self.assertRaises(PermissionError):
+                write_bytes_atomic(self.path, b'{"new":true}')
+        self.assertEqual(self._content(), b'{"old":true}')
+        self.assertEqual(self._leftovers(), [])
+
+    def test_interrupted_write_cleans_up(self):
+        with mock.patch("os.fsync", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                write_bytes_atomic(self.path, b'{"new":true}')
+        self.assertEqual(self._leftovers(), [])
+
+    def test_windows_retries_a_locked_target(self):
+        real_replace = os.replace
+        attempts = []
+        def replace(src, dst):
+            attempts.append(dst)
+            if len(attempts) < 3: raise PermissionError(13, "The process cannot access the file")
+            real_replace(src, dst)
+        with mock.patch.object(atomic_writer.platform, "system", return_value="Windows"), \
+             mock.patch("os.replace", replace), mock.patch.object(atomic_writer.time, "sleep"):
+            write_bytes_atomic(self.path, b'{"new":true}')
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(self._content(), b'{"new":true}')
+
+    def test_json_is_written_compact(self):
+        write_json_atomic(self.path, {"name": "Renée", "list": [1, 2]})
+        self.assertEqual(self._content(), '{"name":"Renée","list":[1,2]}'.encode('utf-8'))
+        write_json_atomic(self.path, {"b": 1, "a": 2}, indent=2, sort_keys=True)
+        self.assertEqual(json.loads(self._content()), {"a": 2, "b": 1})
+
+    def test_lone_surrogates_stay_escaped(self):
+        self.assertEqual(dumps_compact({"x": "\ud800"}), b'{"x":"\\ud800"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
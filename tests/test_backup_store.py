@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import backup_store
+import config
+from backup_store import BackupStore, backup_profile_file
+
+
+class BackupStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "store")
+
+    def _objects(self):
+        objects_dir = os.path.join(self.root, "objects")
+        return sorted(name for _, _, files in os.walk(objects_dir) for name in files)
+
+    def test_identical_content_is_stored_once(self):
+        store = BackupStore(self.root)
+        first = store.backup_bytes(b'{"a":1}' * 100, "Default", "Preferences", "disable")
+        second = store.backup_bytes(b'{"a":1}' * 100, "Default", "Preferences", "enable")
+        store.backup_bytes(b'{"a":1}' * 100, "Profile 1", "Preferences", "disable")
+        self.assertEqual(first.hash, second.hash)
+        self.assertEqual((first.backup_id, second.backup_id), (1, 2))
+        self.assertEqual(len(self._objects()), 1)
+        stored, original = store.disk_usage()
+        self.assertEqual(original, 3 * 700)
+        self.assertLess(stored, 700)
+
+    def test_list_is_newest_first_and_filtered(self):
+        store = BackupStore(self.root)
+        store.backup_bytes(b"1", "Default", "Preferences", "a")
+        store.backup_bytes(b"2", "Profile 1", "Preferences", "b")
+        store.backup_bytes(b"3", "Default", "Preferences", "c")
+        self.assertEqual([e.reason for e in store.list()], ["c", "b", "a"])
+        self.assertEqual([e.reason for e in store.list("Default")], ["c", "a"])
+
+    def test_manifest_is_reloaded_and_survives_a_torn_line(self):
+        BackupStore(self.root).backup_bytes(b"1", "Default", "Preferences", "a")
+        with open(os.path.join(self.root, "manifest.jsonl"), 'a', encoding='utf-8') as f:
+            f.write('{"backup_id": 2, "ti')
+        store = BackupStore(self.root)
+        self.assertEqual([e.reason for e in store.list()], ["a"])
+        self.assertEqual(store.backup_bytes(b"2", "Default", "Preferences", "b").backup_id, 2)
+
+    def test_keep_last_prunes_old_backups_and_their_objects(self):
+        store = BackupStore(self.root, keep_last=2, max_age_days=0)
+        for i in range(4):
+            store.backup_bytes(f"version {i}".encode(), "Default", "Preferences", f"change {i}")
+        store.backup_bytes(b"other", "Profile 1", "Preferences", "other")
+        self.assertEqual([e.reason for e in store.list("Default")], ["change 3", "change 2"])
+        self.assertEqual(len(self._objects()), 3)
+        self.assertEqual([e.reason for e in BackupStore(self.root).list("Default")], ["change 3", "change 2"]) # Manifest rewritten
+
+    def test_shared_objects_survive_pruning(self):
+        store = BackupStore(self.root, keep_last=1, max_age_days=0)
+        store.backup_bytes(b"same", "Default", "Preferences", "a")
+        store.backup_bytes(b"same", "Profile 1", "Preferences", "b")
+        store.backup_bytes(b"new", "Default", "Preferences", "c")
+        self.assertEqual(store.read(store.list("Profile 1")[0]), b"same")
+
+    def test_max_age_keeps_the_newest_backup(self):
+        store = BackupStore(self.root, keep_last=10, max_age_days=1)
+        now = 1_700_000_000.0
+        with mock.patch.object(backup_store.time, "time", return_value=now - 3 * 86400):
+            store.backup_bytes(b"old 1", "Default", "Preferences", "old 1")
+            store.backup_bytes(b"old 2", "Default", "Preferences", "old 2")
+        with mock.patch.object(backup_store.time, "time", return_value=now):
+            self.assertEqual(store.prune(), 1)
+            self.assertEqual([e.reason for e in store.list()], ["old 2"])
+            store.backup_bytes(b"new", "Default", "Preferences", "new")
+        self.assertEqual([e.reason for e in store.list()], ["new"])
+
+    def test_restore_round_trip(self):
+        for compression in ("zz", "xz"):
+            with self.subTest(compression=compression):
+                store = BackupStore(os.path.join(self.root, compression), compression=compression)
+                target = os.path.join(self.tmp.name, f"Preferences.{compression}")
+                with open(target, 'wb') as f:
+                    f.write(b'{"before":true}')
+                entry = store.backup_file(target, "Default", "disable")
+                with open(target, 'wb') as f:
+                    f.write(b'{"after":true}')
+                self.assertTrue(store.restore(entry, target).written)
+                with open(target, 'rb') as f:
+                    self.assertEqual(f.read(), b'{"before":true}')
+
+    def test_entry_at(self):
+        store = BackupStore(self.root)
+        with mock.patch.object(backup_store.time, "time", return_value=100.0):
+            first = store.backup_bytes(b"1", "Default", "Preferences", "a")
+        with mock.patch.object(backup_store.time, "time", return_value=200.0):
+            store.backup_bytes(b"2", "Default", "Preferences", "b")
+        self.assertEqual(store.entry_at("Default", "Preferences", 150.0), first)
+        self.assertIsNone(store.entry_at("Default", "Preferences", 50.0))
+
+    def test_damaged_or_missing_objects_are_not_restored(self):
+        store = BackupStore(self.root)
+        entry = store.backup_bytes(b"content", "Default", "Preferences", "a")
+        object_path, suffix = store._find_object(entry.hash)
+        with open(object_path, 'wb') as f:
+            f.write(backup_store._COMPRESSORS[suffix][0](b"tampered"))
+        with self.assertRaises(ValueError):
+            store.read(entry)
+        os.remove(object_path)
+        with self.assertRaises(ValueError):
+            store.read(entry)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            BackupStore(self.root, compression="zip")
+
+
+class BackupProfileFileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.object(config, "BACKUP_STORE_DIR", os.path.join(self.tmp.name, "backups"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.profile = os.path.join(self.tmp.name, "User Data", "Default")
+        os.makedirs(self.profile)
+        with open(os.path.join(self.profile, "Preferences"), 'wb') as f:
+            f.write(b'{"on":1}')
+
+    def test_profile_files_share_their_user_data_store(self):
+        entry = backup_profile_file(self.profile, "disable")
+        same = backup_profile_file(self.profile, "disable again", data=b'{"on":1}')
+        store = backup_store.backup_store_for(os.path.dirname(self.profile))
+        self.assertIs(backup_store.backup_store_for(os.path.dirname(self.profile)), store)
+        self.assertTrue(store.root.startswith(config.BACKUP_STORE_DIR))
+        self.assertEqual((entry.profile, entry.name, entry.hash), ("Default", "Preferences", same.hash))
+        self.assertEqual(store.read(store.list("Default")[0]), b'{"on":1}')
+
+
+if __name__ == '__main__':
+    unittest.main()
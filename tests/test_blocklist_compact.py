@@ -0,0 +1,54 @@
+import itertools
+import unittest
+
+from blocklist_compact import plan_compaction
+from url_matcher import UrlMatcher
+
+SAMPLE_URLS = [f"{scheme}://{host}{path}{query}"
+               for scheme, host, path, query in itertools.product(
+                   ("http", "https"), ("example.com", "a.example.com", "b.a.example.com", "other.org", "ads.other.org"),
+                   ("/", "/a", "/ads", "/ads/x", "/b"), ("", "?a=1", "?a=1&b=2", "?b=2&a=1"))]
+
+
+class PlanCompactionTests(unittest.TestCase):
+    def _compact(self, block, allow=()):
+        survivors, duplicates, covered = plan_compaction({str(i): entry for i, entry in enumerate(block, 1)}, allow)
+        before, after = UrlMatcher(block, allow), UrlMatcher(survivors, allow)
+        for url in SAMPLE_URLS:
+            self.assertEqual(before.is_blocked(url), after.is_blocked(url), f"{url} changed verdict; kept {survivors}")
+        return survivors, duplicates, covered
+
+    def test_allow_path_between_block_filters_keeps_the_deeper_one(self):
+        survivors, _, covered = self._compact(["example.com", "example.com/ads"], ["example.com/a"])
+        self.assertEqual(survivors, ["example.com", "example.com/ads"])
+        self.assertEqual(covered, [])
+        self.assertTrue(UrlMatcher(survivors, ["example.com/a"]).is_blocked("https://example.com/ads/x"))
+
+    def test_unrelated_allow_path_does_not_block_compaction(self):
+        survivors, _, covered = self._compact(["example.com", "example.com/ads"], ["example.com/b"])
+        self.assertEqual((survivors, covered), (["example.com"], ["example.com/ads"]))
+
+    def test_query_order_is_one_entry(self):
+        survivors, duplicates, _ = self._compact(["example.com?a=1&b=2", "example.com?b=2&a=1"])
+        self.assertEqual(survivors, ["example.com?a=1&b=2"])
+        self.assertEqual(duplicates, ["example.com?b=2&a=1"])
+
+    def test_subdomains_and_chains(self):
+        survivors, _, covered = self._compact(["a.example.com", "*.example.com", "b.a.example.com", "other.org"])
+        self.assertEqual(survivors, ["*.example.com", "other.org"])
+        self.assertEqual(sorted(covered), ["a.example.com", "b.a.example.com"])
+
+    def test_allow_on_a_middle_host(self):
+        block, allow = ["example.com", "b.a.example.com"], ["a.example.com"]
+        survivors, _, _ = self._compact(block, allow)
+        self.assertEqual(survivors, block)
+
+    def test_mixed_lists_keep_verdicts(self):
+        block = ["example.com", "example.com/ads", "https://example.com/ads/x", "a.example.com?a=1", "a.example.com",
+                 ".other.org", "ads.other.org/ads", "http://other.org/b", "*"]
+        for allow in ([], ["example.com/a"], ["https://a.example.com"], ["other.org/ads"], ["example.com?a=1", "ads.other.org"]):
+            self._compact(block, allow)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from blocklist_import import parse_blocklist_line
+
+
+class ParseBlocklistLineTests(unittest.TestCase):
+    def test_any_address_column_is_skipped(self):
+        self.assertEqual(parse_blocklist_line("192.168.1.1 router"), ["router"])
+        self.assertEqual(parse_blocklist_line("10.0.0.2 a.example b.example"), ["a.example", "b.example"])
+        self.assertEqual(parse_blocklist_line("2001:db8::1 ipv6.example"), ["ipv6.example"])
+        self.assertEqual(parse_blocklist_line("0.0.0.0 ads.example # tracker"), ["ads.example"])
+
+    def test_local_names_are_dropped(self):
+        self.assertEqual(parse_blocklist_line("127.0.0.1 localhost"), [])
+        self.assertEqual(parse_blocklist_line("fe80::1%lo0 localhost"), [])
+
+    def test_domain_lists_keep_the_first_field(self):
+        self.assertEqual(parse_blocklist_line("example.com some note"), ["example.com"])
+        self.assertEqual(parse_blocklist_line("||Tracker.Example^"), ["tracker.example"])
+
+
+if __name__ == "__main__":
+    unittest.main()
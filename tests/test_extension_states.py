@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+import profile_utils
+from backup_store import backup_store_for
+from profile_utils import (bulk_extension_action, load_preferences, panic_changes, set_extension_state_for_profile,
+                           set_extension_states_for_profile)
+
+IDS = [f"{'abcdefghijklmnop'[e % 16] * 31}{'abcdefghijklmnop'[e // 16]}" for e in range(12)]
+
+
+class ExtensionStateTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        patcher = mock.patch.object(config, "BACKUP_STORE_DIR", os.path.join(self.root, "backups"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.quiet = lambda msg: None
+
+    def _profile(self, folder, settings):
+        path = os.path.join(self.root, folder)
+        os.makedirs(path)
+        with open(os.path.join(path, "Preferences"), 'w', encoding='utf-8') as f:
+            json.dump({"profile": {"name": folder}, "extensions": {"settings": settings}}, f)
+        return path
+
+    def _read(self, profile_path):
+        with open(os.path.join(profile_path, "Preferences"), encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_batch_matches_one_call_per_extension(self):
+        settings = {ext_id: {"state": e % 2, "manifest": {"name": f"E{e}"}} for e, ext_id in enumerate(IDS)}
+        settings[IDS[3]] = {"manifest": {"name": "no state yet"}} # Forces the full rewrite
+        changes = [(ext_id, 1 - e % 2) for e, ext_id in enumerate(IDS)] + [("q" * 32, 0)]
+        one_by_one, batch = self._profile("One", settings), self._profile("Batch", settings)
+        for ext_id, state in changes:
+            set_extension_state_for_profile(one_by_one, ext_id, state, self.quiet)
+        result = set_extension_states_for_profile(batch, changes, self.quiet)
+        self.assertEqual(self._read(one_by_one)["extensions"], self._read(batch)["extensions"])
+        self.assertEqual(sorted(result["applied"]), sorted(IDS))
+        self.assertEqual(result["missing"], ["q" * 32])
+        self.assertFalse(result["success"])
+
+    def test_failed_rewrite_leaves_cached_document_untouched(self):
+        settings = {IDS[0]: {"manifest": {}}, IDS[1]: {"state": 1}} # No state to patch in place: rewritten in full
+        profile = self._profile("Default", settings)
+        prefs_path = os.path.join(profile, "Preferences")
+        cached = load_preferences(prefs_path)
+        with mock.patch.object(profile_utils, "write_json_atomic", side_effect=OSError("disk full")):
+            result = set_extension_states_for_profile(profile, [(IDS[0], 0)], self.quiet)
+        self.assertFalse(result["success"])
+        self.assertNotIn("state", cached["extensions"]["settings"][IDS[0]])
+        self.assertNotIn("state", load_preferences(prefs_path)["extensions"]["settings"][IDS[0]])
+        self.assertEqual(self._read(profile)["extensions"]["settings"], settings)
+
+    def test_rewrite_does_not_edit_the_cached_document(self):
+        profile = self._profile("Default", {IDS[0]: {"manifest": {}}, IDS[1]: {"state": 1}})
+        prefs_path = os.path.join(profile, "Preferences")
+        cached = load_preferences(prefs_path)
+        self.assertTrue(set_extension_states_for_profile(profile, [(IDS[0], 0)], self.quiet)["success"])
+        self.assertNotIn("state", cached["extensions"]["settings"][IDS[0]])
+        self.assertEqual(load_preferences(prefs_path)["extensions"]["settings"][IDS[0]]["state"], 0)
+
+
+    def _backups(self, profile):
+        return backup_store_for(os.path.dirname(profile)).list(os.path.basename(profile), "Preferences")
+
+    def test_backup_only_when_the_file_changes(self):
+        for folder, settings in (("Patched", {IDS[0]: {"state": 1}}), ("Rewritten", {IDS[0]: {"state": 1}, IDS[1]: {}})):
+            with self.subTest(path=folder):
+                profile = self._profile(folder, settings)
+                changes = [(ext_id, 1) for ext_id in settings]
+                set_extension_states_for_profile(profile, changes[:1], self.quiet) # Already enabled: no write
+                self.assertEqual(self._backups(profile), [])
+                with open(os.path.join(profile, "Preferences"), 'rb') as f:
+                    before = f.read()
+                set_extension_states_for_profile(profile, [(IDS[0], 0)] + changes[1:], self.quiet)
+                backups = self._backups(profile)
+                self.assertEqual(len(backups), 1)
+                self.assertEqual(backup_store_for(self.root).read(backups[0]), before)
+
+
+class BulkExtensionActionTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        patcher = mock.patch.object(config, "BACKUP_STORE_DIR", os.path.join(self.root, "backups"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user_data = os.path.join(self.root, "User Data")
+        enabled = {"state": 1, "was_installed_by_default": False, "manifest": {"name": "Tracker"}}
+        default = {"state": 1, "was_installed_by_default": True, "manifest": {"name": "Docs"}}
+        self.work = self._profile("Default", "Work", {IDS[0]: enabled, IDS[1]: default})
+        self.home = self._profile("Profile 1", "Home", {IDS[2]: enabled})
+        self.kids = self._profile("Profile 2", "Kids", {IDS[3]: enabled})
+
+    def _profile(self, folder, name, settings):
+        path = os.path.join(self.user_data, folder)
+        os.makedirs(path)
+        with open(os.path.join(path, "Preferences"), 'w', encoding='utf-8') as f:
+            json.dump({"profile": {"name": name}, "extensions": {"settings": settings}}, f)
+        return path
+
+    def _states(self, profile_path):
+        with open(os.path.join(profile_path, "Preferences"), encoding='utf-8') as f:
+            return {ext_id: ext.get("state") for ext_id, ext in json.load(f)["extensions"]["settings"].items()}
+
+    def _run(self, choose_changes, log_callback=lambda msg: None):
+        result = bulk_extension_action(self.user_data, choose_changes, log_callback)
+        return {o["profile"]: o for o in result["profiles"]}
+
+    def test_few_profiles_run_serially(self):
+        with mock.patch.object(profile_utils, "ThreadPoolExecutor", side_effect=AssertionError("pool used")):
+            outcomes = self._run(panic_changes)
+        self.assertEqual(sorted(outcomes), ["Home", "Kids", "Work"])
+        self.assertTrue(all(o["success"] for o in outcomes.values()))
+        self.assertEqual(outcomes["Work"]["applied"], [IDS[0]])
+        self.assertEqual(self._states(self.work), {IDS[0]: 0, IDS[1]: 1}) # Installed by default: left alone
+        self.assertEqual(self._states(self.home), {IDS[2]: 0})
+
+    def test_failed_write_is_reported_for_its_profile_only(self):
+        real_patch = profile_utils.patch_extension_states
+        def patch(prefs_path, states, before_write=None):
+            if prefs_path.startswith(self.kids): raise OSError(30, "Read-only file system")
+            return real_patch(prefs_path, states, before_write=before_write)
+        log = []
+        with mock.patch.object(profile_utils, "patch_extension_states", patch):
+            outcomes = self._run(panic_changes, log.append)
+        self.assertFalse(outcomes["Kids"]["success"])
+        self.assertIn("Read-only file system", outcomes["Kids"]["message"])
+        self.assertTrue(outcomes["Work"]["success"] and outcomes["Home"]["success"])
+        self.assertEqual(self._states(self.kids), {IDS[3]: 1})
+        self.assertEqual(self._states(self.home), {IDS[2]: 0})
+        self.assertTrue(any(line.startswith("[Kids] Error modifying Preferences file") for line in log))
+
+    def test_failing_chooser_does_not_stop_the_others(self):
+        def choose(extensions):
+            if any(ext["id"] == IDS[2] for ext in extensions.values()): raise RuntimeError("bad profile")
+            return panic_changes(extensions)
+        outcomes = self._run(choose)
+        self.assertEqual((outcomes["Home"]["success"], outcomes["Home"]["message"]), (False, "Failed: bad profile"))
+        self.assertTrue(outcomes["Work"]["success"] and outcomes["Kids"]["success"])
+        self.assertEqual(self._states(self.kids), {IDS[3]: 0})
+
+    def test_missing_extension_is_a_failure(self):
+        outcomes = self._run(lambda extensions: [("q" * 32, 0)])
+        self.assertTrue(all(not o["success"] and o["missing"] == ["q" * 32] for o in outcomes.values()))
+
+if __name__ == "__main__":
+    unittest.main()
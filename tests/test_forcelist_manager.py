@@ -0,0 +1,118 @@
+import unittest
+
+from forcelist_manager import DEFAULT_UPDATE_URL, FORCELIST_KEY, ForcelistManager, parse_extension_entries
+from policy_backend import PolicyBackend
+from policy_snapshot import PolicySnapshot
+
+A, B, C = "a" * 32, "b" * 32, "c" * 32
+
+
+class MemoryBackend(PolicyBackend):
+    def __init__(self, forcelist=None):
+        self.values = {str(i): ("REG_SZ", v) for i, v in (forcelist or {}).items()}
+        self.reads = 0
+        self.batches = []
+
+    def get_policy_snapshot(self):
+        self.reads += 1
+        return PolicySnapshot({FORCELIST_KEY: dict(self.values)})
+
+    def apply_batch(self, ops):
+        self.batches.append(ops)
+        return super().apply_batch(ops)
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        self.values[value_name] = (value_type, value_data)
+        return True, "Policy set successfully."
+
+    def remove_policy(self, key_name, value_name):
+        self.values.pop(value_name, None)
+        return True, "Policy removed successfully."
+
+
+class ParseExtensionEntriesTests(unittest.TestCase):
+    def test_free_text(self):
+        entries, invalid = parse_extension_entries(f"{A} {B.upper()},\n{C}  nope")
+        self.assertEqual(entries, [(A, None), (B, None), (C, None)])
+        self.assertEqual(invalid, ["nope"])
+
+    def test_policy_format_update_url(self):
+        entries, _ = parse_extension_entries(f"{A};https://example.com/update.xml {B}")
+        self.assertEqual(entries, [(A, "https://example.com/update.xml"), (B, None)])
+
+    def test_csv_with_header_and_url_column(self):
+        entries, invalid = parse_extension_entries(f"extension_id,update_url\n{A},https://example.com/u\n{B},\n")
+        self.assertEqual(entries, [(A, "https://example.com/u"), (B, None)])
+        self.assertEqual(invalid, [])
+
+    def test_url_does_not_override_an_explicit_one(self):
+        entries, _ = parse_extension_entries(f"{A};https://first.example/u,https://second.example/u")
+        self.assertEqual(entries, [(A, "https://first.example/u")])
+
+
+class ForcelistManagerTests(unittest.TestCase):
+    def test_new_entries_go_after_the_highest_index(self):
+        backend = MemoryBackend({1: f"{A};{DEFAULT_UPDATE_URL}", 4: f"{B};https://example.com/u"})
+        result = ForcelistManager(backend).add_extensions([C, ("d" * 32, "https://example.com/d")], log_callback=lambda m: None)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["added"], [(C, 5), ("d" * 32, 6)])
+        self.assertEqual(backend.values["5"], ("REG_SZ", f"{C};{DEFAULT_UPDATE_URL}"))
+        self.assertEqual(backend.values["6"], ("REG_SZ", "d" * 32 + ";https://example.com/d"))
+        self.assertEqual(len(backend.batches), 1)
+
+    def test_empty_list_starts_at_one(self):
+        backend = MemoryBackend()
+        result = ForcelistManager(backend).add_extensions([A], log_callback=lambda m: None)
+        self.assertEqual(result["added"], [(A, 1)])
+
+    def test_duplicates_and_invalid_ids_are_skipped(self):
+        backend = MemoryBackend({1: f"{A};{DEFAULT_UPDATE_URL}"})
+        log = []
+        result = ForcelistManager(backend).add_extensions([A.upper(), B, f" {B} ", "bad"], log_callback=log.append)
+        self.assertEqual(result["added"], [(B, 2)])
+        self.assertEqual(result["skipped"], [A, B])
+        self.assertEqual(result["invalid"], ["bad"])
+        self.assertTrue(any("index 1" in line for line in log))
+
+    def test_nothing_to_add_writes_nothing(self):
+        backend = MemoryBackend({1: f"{A};{DEFAULT_UPDATE_URL}"})
+        result = ForcelistManager(backend).add_extensions([A], log_callback=lambda m: None)
+        self.assertTrue(result["success"])
+        self.assertEqual(backend.batches, [])
+
+    def test_unreadable_policy_is_not_written(self):
+        class ErrorBackend(MemoryBackend):
+            def get_policy_snapshot(self):
+                return PolicySnapshot(error="access_denied")
+        backend = ErrorBackend()
+        result = ForcelistManager(backend).add_extensions([A], log_callback=lambda m: None)
+        self.assertFalse(result["success"])
+        self.assertEqual(backend.batches, [])
+
+    def test_entries_and_lookup(self):
+        manager = ForcelistManager(MemoryBackend({2: f"{B};https://example.com/u", 1: f"{A};{DEFAULT_UPDATE_URL}"}))
+        self.assertEqual(manager.entries(), [(1, A, DEFAULT_UPDATE_URL), (2, B, "https://example.com/u")])
+        self.assertEqual(manager.index_of(B), 2)
+        self.assertIsNone(manager.index_of(C))
+
+    def test_remove_by_id(self):
+        backend = MemoryBackend({1: f"{A};{DEFAULT_UPDATE_URL}", 2: f"{B};{DEFAULT_UPDATE_URL}"})
+        success, _ = ForcelistManager(backend).remove_extensions([A, C])
+        self.assertTrue(success)
+        self.assertEqual(list(backend.values), ["2"])
+        self.assertEqual(ForcelistManager(backend).remove_extensions([C]), (True, "None of the extensions are in the policy list."))
+
+    def test_map_is_only_rebuilt_for_a_new_snapshot(self):
+        snapshot = PolicySnapshot({FORCELIST_KEY: {"1": ("REG_SZ", f"{A};{DEFAULT_UPDATE_URL}")}})
+        class FixedBackend(MemoryBackend):
+            def get_policy_snapshot(self):
+                return snapshot
+        manager = ForcelistManager(FixedBackend())
+        manager.refresh()
+        by_id = manager._by_id
+        manager.index_of(A)
+        self.assertIs(manager._by_id, by_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+
+import policy_definitions
+from linux_policy_manager import LinuxPolicyManager
+from policy_transaction import PolicyOp
+
+
+class ForeignListTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manager = LinuxPolicyManager(self.tmp.name)
+        self._write("10_admin.json", {"URLBlocklist": ["admin.example", "ads.example"], "ShowHomeButton": True})
+
+    def _write(self, name, data):
+        with open(os.path.join(self.tmp.name, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def _own(self):
+        with open(self.manager.policy_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_foreign_list_is_shown(self):
+        entries, _ = self.manager.get_policy_snapshot().get_list("URLBlocklist")
+        self.assertEqual(sorted(entries.values()), ["admin.example", "ads.example"])
+
+    def test_edits_to_foreign_list_are_rejected(self):
+        success, msg = self.manager.remove_policy("URLBlocklist", "2")
+        self.assertFalse(success)
+        self.assertIn("10_admin.json", msg)
+        success, _ = self.manager.set_policy("URLBlocklist", "1", "mine.example", "REG_SZ")
+        self.assertFalse(success)
+        self.assertFalse(os.path.exists(self.manager.policy_file))
+
+    def test_batch_rejects_only_foreign_ops(self):
+        ops = [PolicyOp("set", "URLBlocklist", "3", "mine.example", "REG_SZ"),
+               PolicyOp("set", "URLAllowlist", "1", "ok.example", "REG_SZ"),
+               PolicyOp("set", "", "ShowHomeButton", 0, "REG_DWORD")]
+        results = self.manager.apply_batch(ops)
+        self.assertEqual([ok for _, ok, _ in results], [False, True, True])
+        self.assertEqual(self._own(), {"URLAllowlist": ["ok.example"], "ShowHomeButton": False})
+
+    def test_unreadable_file_gives_an_error_snapshot(self):
+        with open(os.path.join(self.tmp.name, "20_broken.json"), 'w', encoding='utf-8') as f:
+            f.write('{"URLAllowlist": [')
+        snapshot = self.manager.get_policy_snapshot()
+        self.assertIn("20_broken.json", snapshot.error)
+        self.assertEqual(len(snapshot), 0)
+
+    def test_own_list_stays_editable(self):
+        self._write("chrome_manager.json", {"URLBlocklist": ["mine.example"]})
+        self.assertTrue(self.manager.set_policy("URLBlocklist", "2", "more.example", "REG_SZ")[0])
+        self.assertEqual(self._own()["URLBlocklist"], ["mine.example", "more.example"])
+
+
+
+class DictPolicyTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.manager = LinuxPolicyManager(self.tmp.name)
+
+    def _own(self):
+        with open(self.manager.policy_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_dict_policy_round_trips_as_an_object(self):
+        with open(self.manager.policy_file, 'w', encoding='utf-8') as f:
+            json.dump({"ProxySettings": {"ProxyMode": "direct"}, "ManagedBookmarks": [{"name": "a", "url": "a.example"}]}, f)
+        snapshot = self.manager.get_policy_snapshot()
+        value_type, data = snapshot.get_entry("", "ProxySettings")
+        self.assertEqual(value_type, "REG_SZ")
+        self.assertTrue(self.manager.set_policy("", "ProxySettings", data, value_type)[0])
+        _, item = snapshot.get_entry("ManagedBookmarks", "1")
+        self.assertTrue(self.manager.set_policy("ManagedBookmarks", "1", item, "REG_SZ")[0])
+        self.assertEqual(self._own(), {"ProxySettings": {"ProxyMode": "direct"}, "ManagedBookmarks": [{"name": "a", "url": "a.example"}]})
+
+    def test_catalog_dict_policy_is_written_as_an_object(self):
+        class Catalog:
+            def boolean_policies(self): return set()
+            def json_policies(self): return {"ProxySettings"}
+        self.manager.use_catalog(Catalog())
+        self.manager.set_policy("", "ProxySettings", '{"ProxyMode": "system"}', "REG_SZ")
+        self.manager.set_policy("", "HomepageLocation", '{"not": "parsed"}', "REG_SZ")
+        self.assertEqual(self._own(), {"ProxySettings": {"ProxyMode": "system"}, "HomepageLocation": '{"not": "parsed"}'})
+
+
+class CatalogBooleanTests(unittest.TestCase):
+    def test_catalog_booleans_stay_on_the_instance(self):
+        class Catalog:
+            def boolean_policies(self): return {"SomeCatalogSwitch"}
+            def json_policies(self): return set()
+        before = set(policy_definitions.BOOLEAN_POLICIES)
+        with tempfile.TemporaryDirectory() as tmp:
+            manager, other = LinuxPolicyManager(tmp), LinuxPolicyManager(tmp, "other.json")
+            manager.use_catalog(Catalog())
+            self.assertIs(manager._to_json_value("SomeCatalogSwitch", 1, "REG_DWORD"), True)
+            self.assertEqual(other._to_json_value("SomeCatalogSwitch", 1, "REG_DWORD"), 1)
+        self.assertEqual(policy_definitions.BOOLEAN_POLICIES, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
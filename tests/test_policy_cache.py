@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import unittest
+
+from linux_policy_manager import LinuxPolicyManager
+from policy_backend import PolicyBackend
+from policy_cache import PolicyCache
+from policy_snapshot import PolicySnapshot
+from policy_transaction import PolicyOp
+
+
+class FakeBackend(PolicyBackend):
+    """In-memory registry-like store whose change token is a write counter."""
+    def __init__(self):
+        self.values = {}
+        self.version = 0
+        self.reads = 0
+        self.fail = False
+
+    def get_change_token(self):
+        return self.version
+
+    def get_policy_snapshot(self):
+        self.reads += 1
+        keys = {}
+        for (key_name, value_name), entry in self.values.items():
+            keys.setdefault(key_name, {})[value_name] = entry
+        return PolicySnapshot(keys)
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        if self.fail: return False, "Access Denied."
+        self.values[(key_name, value_name)] = (value_type, int(value_data) if value_type == "REG_DWORD" else value_data)
+        self.version += 1
+        return True, "Policy set successfully."
+
+    def remove_policy(self, key_name, value_name):
+        if self.fail: return False, "Access Denied."
+        self.values.pop((key_name, value_name), None)
+        self.version += 1
+        return True, "Policy removed successfully."
+
+
+class PolicyCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeBackend()
+        self.backend.values[("", "ShowHomeButton")] = ("REG_DWORD", 0)
+        self.cache = PolicyCache(self.backend)
+        self.events = []
+        self.cache.add_listener(lambda changes, source: self.events.append((source, changes)))
+        self.cache.get_policy_snapshot()
+
+    def test_unchanged_token_serves_the_cached_snapshot(self):
+        first = self.cache.get_policy_snapshot()
+        self.assertIs(self.cache.get_policy_snapshot(), first)
+        self.assertEqual(self.backend.reads, 1)
+        self.assertFalse(self.cache.check_for_changes())
+
+    def test_moved_token_is_reported_as_external_change(self):
+        self.backend.values[("", "ShowHomeButton")] = ("REG_DWORD", 1)
+        self.backend.version += 1
+        self.assertTrue(self.cache.check_for_changes())
+        self.assertEqual(self.events, [("external", {("", "ShowHomeButton"): (0, 1)})])
+        self.assertIs(self.cache.get_policy_snapshot(), self.cache._snapshot)
+        self.assertEqual(self.backend.reads, 2)
+
+    def test_local_writes_are_applied_without_a_reread(self):
+        self.cache.set_policy("", "ShowHomeButton", 1)
+        self.cache.apply_batch([PolicyOp("set", "URLBlocklist", "1", "ads.example", "REG_SZ"),
+                                PolicyOp("remove", "", "ShowHomeButton", None, None)])
+        self.assertEqual(self.backend.reads, 1)
+        snapshot = self.cache.get_policy_snapshot()
+        self.assertEqual(self.backend.reads, 1) # The token read after the write is the cached one
+        self.assertEqual(snapshot.diff(self.backend.get_policy_snapshot()), {})
+        self.assertEqual([source for source, _ in self.events], ["local", "local"])
+        self.assertEqual(self.events[0][1], {("", "ShowHomeButton"): (0, 1)})
+        self.assertEqual(self.events[1][1], {("", "ShowHomeButton"): (1, None),
+                                             ("URLBlocklist", "1"): (None, "ads.example")})
+
+    def test_outside_change_before_a_write_forces_a_reread(self):
+        self.backend.values[("", "HomepageLocation")] = ("REG_SZ", "https://example.com")
+        self.backend.version += 1
+        self.cache.remove_policy("", "ShowHomeButton")
+        self.assertEqual(self.backend.reads, 2)
+        self.assertEqual(self.cache.get_policy_snapshot().get("", "HomepageLocation"), "https://example.com")
+        self.assertEqual(self.events, [("local", {("", "ShowHomeButton"): (0, None),
+                                                  ("", "HomepageLocation"): (None, "https://example.com")})])
+
+    def test_failed_write_forces_a_reread(self):
+        self.backend.fail = True
+        success, _ = self.cache.set_policy("", "ShowHomeButton", 1)
+        self.assertFalse(success)
+        self.assertEqual(self.backend.reads, 2)
+        self.assertEqual(self.events, [])
+
+    def test_registry_dword_wraps_like_a_reread(self):
+        self.cache.set_policy("", "DownloadRestrictions", -1)
+        self.assertEqual(self.cache.get_policy_snapshot().get("", "DownloadRestrictions"), 0xFFFFFFFF)
+
+
+class LinuxPolicyCacheTests(unittest.TestCase):
+    """The patched snapshot must equal what a fresh read of the files gives."""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        with open(os.path.join(self.tmp.name, "10_admin.json"), 'w', encoding='utf-8') as f:
+            json.dump({"HomepageLocation": "https://admin.example"}, f)
+        self.backend = LinuxPolicyManager(self.tmp.name)
+        self.backend.set_policy("URLBlocklist", "1", "a.example", "REG_SZ")
+        self.backend.set_policy("URLBlocklist", "2", "b.example", "REG_SZ")
+        self.backend.set_policy("URLBlocklist", "3", "c.example", "REG_SZ")
+        self.cache = PolicyCache(self.backend)
+        self.cache.get_policy_snapshot()
+
+    def assertMatchesReread(self):
+        self.assertEqual(self.cache._snapshot.diff(self.backend.get_policy_snapshot()), {})
+
+    def test_list_removal_is_renumbered(self):
+        self.cache.apply_batch([PolicyOp("remove", "URLBlocklist", "2", None, None)])
+        self.assertMatchesReread()
+        self.assertEqual(self.cache._snapshot.get("URLBlocklist", "2"), "c.example")
+
+    def test_booleans_and_emptied_lists(self):
+        self.cache.apply_batch([PolicyOp("set", "", "ShowHomeButton", 1, "REG_DWORD")] +
+                               [PolicyOp("remove", "URLBlocklist", str(i), None, None) for i in (1, 2, 3)])
+        self.assertMatchesReread()
+        self.assertFalse(self.cache._snapshot.has_key("URLBlocklist"))
+
+    def test_top_level_removal_rereads(self):
+        self.cache.set_policy("", "HomepageLocation", "https://mine.example", "REG_SZ")
+        self.cache.remove_policy("", "HomepageLocation") # The admin file's value shows through again
+        self.assertEqual(self.cache.get_policy_snapshot().get("", "HomepageLocation"), "https://admin.example")
+
+
+if __name__ == '__main__':
+    unittest.main()
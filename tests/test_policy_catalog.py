@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import policy_catalog
+from policy_catalog import PolicyCatalog, compile_templates, load_catalog
+
+TEMPLATES = {"policy_definitions": [
+    {"name": "BrowserSettings", "type": "group", "caption": "Browser settings",
+     "policies": ["ShowHomeButton", "AuthServerAllowlist", "MaxConnectionsPerProxy"]},
+    {"name": "ShowHomeButton", "type": "main", "caption": "Show Home button on toolbar", "desc": "Shows the Home button."},
+    {"name": "AuthServerAllowlist", "type": "string", "caption": "Authentication server allowlist", "desc": "First paragraph.\n\nSecond paragraph."},
+    {"name": "MaxConnectionsPerProxy", "type": "int", "caption": "Maximal number of concurrent connections", "desc": "x" * 500},
+    {"name": "ProxyMode", "type": "string-enum", "caption": "Proxy mode", "deprecated": True,
+     "items": [{"name": "Direct", "value": "direct", "caption": "Never use a proxy"}, {"name": "System", "value": "system"}]},
+    {"name": "ManagedBookmarks", "type": "dict", "caption": "Managed Bookmarks"},
+    {"name": "URLBlocklist", "type": "list", "caption": "Block access to a list of URLs"},
+    {"name": "ExternalThing", "type": "external", "caption": "Not editable"},
+]}
+
+
+class CompileTemplatesTests(unittest.TestCase):
+    def setUp(self):
+        self.compiled = compile_templates(TEMPLATES)
+        self.policies = self.compiled["policies"]
+
+    def test_types_are_mapped(self):
+        self.assertTrue(self.policies["ShowHomeButton"]["boolean"])
+        self.assertEqual(self.policies["MaxConnectionsPerProxy"]["type"], "REG_DWORD")
+        self.assertEqual(self.policies["ProxyMode"]["options"], {"Default": -1, "Never use a proxy": "direct", "System": "system"})
+        self.assertTrue(self.policies["ManagedBookmarks"]["json"])
+        self.assertEqual((self.policies["URLBlocklist"]["key"], self.policies["URLBlocklist"]["value_name"]), ("URLBlocklist", "1"))
+        self.assertNotIn("ExternalThing", self.policies)
+
+    def test_captions_and_help(self):
+        self.assertEqual(self.policies["AuthServerAllowlist"]["help"], "First paragraph.")
+        self.assertEqual(len(self.policies["MaxConnectionsPerProxy"]["help"]), 400)
+        self.assertTrue(self.policies["ProxyMode"]["name"].endswith("(deprecated)"))
+
+    def test_categories(self):
+        self.assertEqual(self.compiled["categories"][0], ("Browser settings", ["ShowHomeButton", "AuthServerAllowlist", "MaxConnectionsPerProxy"]))
+        self.assertEqual(self.compiled["categories"][-1][0], "Miscellaneous")
+        self.assertEqual(sorted(self.compiled["categories"][-1][1]), ["ManagedBookmarks", "ProxyMode", "URLBlocklist"])
+
+    def test_hand_written_definitions_win(self):
+        catalog = PolicyCatalog(compile_templates({"policy_definitions": [{"name": "IncognitoModeAvailability", "type": "int-enum", "items": []}]}))
+        self.assertIn("Forced", catalog.get("IncognitoModeAvailability")["options"])
+
+    def test_catalog_helpers(self):
+        catalog = PolicyCatalog(self.compiled)
+        self.assertIn("ShowHomeButton", catalog.boolean_policies())
+        self.assertEqual(catalog.json_policies(), {"ManagedBookmarks"})
+
+
+class CatalogCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.templates_path = os.path.join(self.tmp.name, "policy_templates.json")
+        self.cache_path = os.path.join(self.tmp.name, "cache", "catalog.marshal")
+        self.log = []
+        self._write_templates(TEMPLATES)
+
+    def _write_templates(self, templates):
+        with open(self.templates_path, 'w', encoding='utf-8') as f:
+            json.dump(templates, f)
+
+    def _load(self):
+        return load_catalog(self.templates_path, self.cache_path, log_callback=self.log.append)
+
+    def test_second_load_is_a_cache_hit(self):
+        first = self._load()
+        self.assertEqual(first.source, self.templates_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+        second = self._load()
+        self.assertEqual(second.source, "cache")
+        self.assertEqual(second.policies, first.policies)
+        self.assertEqual(second.search("home"), first.search("home"))
+
+    def test_changed_templates_invalidate_the_cache(self):
+        self._load()
+        changed = dict(TEMPLATES, policy_definitions=TEMPLATES["policy_definitions"] + [{"name": "BrowserSignin", "type": "int", "caption": "Browser sign in"}])
+        self._write_templates(changed)
+        catalog = self._load()
+        self.assertEqual(catalog.source, self.templates_path)
+        self.assertIsNotNone(catalog.get("BrowserSignin"))
+        self.assertEqual(self._load().source, "cache")
+
+    def test_other_format_version_is_recompiled(self):
+        self._load()
+        with mock.patch.object(policy_catalog, "CATALOG_FORMAT_VERSION", policy_catalog.CATALOG_FORMAT_VERSION + 1):
+            self.assertEqual(self._load().source, self.templates_path)
+
+    def test_corrupt_cache_is_recompiled(self):
+        self._load()
+        with open(self.cache_path, 'wb') as f:
+            f.write(b"\x00garbage")
+        self.assertEqual(self._load().source, self.templates_path)
+
+    def test_missing_templates_use_built_in_definitions(self):
+        catalog = load_catalog(os.path.join(self.tmp.name, "missing.json"), self.cache_path)
+        self.assertEqual(catalog.source, "policy_definitions")
+        self.assertIn("IncognitoModeAvailability", catalog.policies)
+
+
+class SearchTests(unittest.TestCase):
+    QUERIES = ["", "home", "HOME button", "url", "proxy mode", "conn", "max", "xyz", "incognito", "ss", "bookmarks managed", "1"]
+
+    def _naive(self, catalog, query):
+        """Every word must be a prefix of a token or a substring of the text, checked policy by policy."""
+        result = []
+        for _, ids in catalog.categories:
+            for pid in ids:
+                item = catalog.policies[pid]
+                text = f"{item['name']} {item['value_name']} {pid} {item.get('help', '')}"
+                tokens = policy_catalog._tokens(text)
+                if all(any(t.startswith(w) for t in tokens) or w in text.lower() for w in query.lower().split()):
+                    result.append(pid)
+        return result
+
+    def test_matches_a_naive_scan(self):
+        for catalog in (PolicyCatalog(compile_templates(TEMPLATES)), PolicyCatalog(policy_catalog._catalog_from_definitions())):
+            for query in self.QUERIES:
+                with self.subTest(source=len(catalog), query=query):
+                    self.assertEqual(catalog.search(query), self._naive(catalog, query))
+
+    def test_camel_case_parts_are_prefixes(self):
+        catalog = PolicyCatalog(compile_templates(TEMPLATES))
+        self.assertIn("MaxConnectionsPerProxy", catalog.search("per"))
+        self.assertIn("MaxConnectionsPerProxy", catalog.search("connections proxy"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import copy
+import json
+import tempfile
+import unittest
+
+from linux_policy_manager import LinuxPolicyManager
+from policy_catalog import PolicyCatalog, _catalog_from_definitions
+from policy_reconcile import plan_reconcile
+from policy_snapshot import PolicySnapshot
+
+CATALOG = PolicyCatalog({"categories": [("Test", ["ProxySettings", "ExtensionSettings", "HomepageLocation"])], "policies": {
+    "ProxySettings": {"id": "ProxySettings", "name": "Proxy", "key": "", "value_name": "ProxySettings", "type": "REG_SZ", "json": True},
+    "ExtensionSettings": {"id": "ExtensionSettings", "name": "Extensions", "key": "", "value_name": "ExtensionSettings", "type": "REG_SZ", "json": True},
+    "HomepageLocation": {"id": "HomepageLocation", "name": "Home", "key": "", "value_name": "HomepageLocation", "type": "REG_SZ"}}})
+
+
+class PlanReconcileTests(unittest.TestCase):
+    def test_spec_is_not_modified(self):
+        spec = {"forced_extensions": {"not-an-id": None, "a" * 32: None}}
+        original = copy.deepcopy(spec)
+        ops, problems = plan_reconcile(spec, PolicySnapshot(), PolicyCatalog(_catalog_from_definitions()))
+        self.assertEqual(spec, original)
+        self.assertEqual([op.value_data.split(";")[0] for op in ops], ["a" * 32])
+        self.assertEqual(len(problems), 1)
+
+
+    def test_no_drift_with_dict_policies_plans_nothing(self):
+        snapshot = PolicySnapshot({"": {
+            "ProxySettings": ("REG_SZ", '{ "ProxyServer": "p:8080",\n  "ProxyMode": "fixed_servers" }'),
+            "ExtensionSettings": ("REG_SZ", '{"*":{"installation_mode":"blocked"}}'),
+            "HomepageLocation": ("REG_SZ", "https://example.com")}})
+        spec = {"policies": {"ProxySettings": {"ProxyMode": "fixed_servers", "ProxyServer": "p:8080"},
+                             "ExtensionSettings": {"*": {"installation_mode": "blocked"}},
+                             "HomepageLocation": "https://example.com"}}
+        self.assertEqual(plan_reconcile(spec, snapshot, CATALOG), ([], []))
+
+    def test_changed_dict_policy_is_written_as_json(self):
+        snapshot = PolicySnapshot({"": {"ProxySettings": ("REG_SZ", '{"ProxyMode": "direct"}')}})
+        ops, _ = plan_reconcile({"policies": {"ProxySettings": {"ProxyMode": "system"}}}, snapshot, CATALOG)
+        self.assertEqual([(op.value_name, op.value_data) for op in ops], [("ProxySettings", '{"ProxyMode":"system"}')])
+
+    def test_linux_round_trip_has_no_drift(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = LinuxPolicyManager(tmp)
+            with open(manager.policy_file, 'w', encoding='utf-8') as f:
+                json.dump({"ProxySettings": {"ProxyMode": "direct"}}, f, indent=4)
+            ops, _ = plan_reconcile({"policies": {"ProxySettings": {"ProxyMode": "direct"}}}, manager.get_policy_snapshot(), CATALOG)
+            self.assertEqual(ops, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
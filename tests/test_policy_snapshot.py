@@ -0,0 +1,117 @@
+import unittest
+
+from policy_snapshot import PolicySnapshot, decode_reg_value, parse_reg_query_output
+from windows_policy_manager import WindowsPolicyManager
+
+BASE = r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\Chrome"
+# Captured from `reg query "HKLM\SOFTWARE\Policies\Google\Chrome" /s` (CRLF line ends, as reg.exe prints them)
+REG_QUERY_OUTPUT = "\r\n".join([
+    "",
+    r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\Chrome",
+    "    ShowHomeButton    REG_DWORD    0x1",
+    "    DownloadRestrictions    REG_DWORD    0xffffffff",
+    "    HomepageLocation    REG_SZ    https://example.com/a b",
+    "    Proxy Server Name    REG_SZ    ",
+    "    (Default)    REG_SZ    ",
+    "    Blob    REG_BINARY    01FF",
+    "    Hosts    REG_MULTI_SZ    a.example\\0b.example",
+    "    Broken    REG_DWORD    0xZZ",
+    "",
+    r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\Chrome\Recommended",
+    "    ShowHomeButton    REG_DWORD    0x0",
+    "",
+    r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\Chrome\Recommended\URLBlocklist",
+    "    1    REG_SZ    recommended.example",
+    "",
+    r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\Chrome\URLBlocklist",
+    "    1    REG_SZ    example.com",
+    "    2    REG_SZ    *.ads.example",
+    "",
+    r"HKEY_LOCAL_MACHINE\SOFTWARE\Policies\Google\ChromeOther",
+    "    Outside    REG_SZ    ignored",
+    "",
+])
+
+
+class ParseRegQueryOutputTests(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = parse_reg_query_output(REG_QUERY_OUTPUT, BASE)
+
+    def test_base_key_values(self):
+        self.assertEqual(self.snapshot.get_entry("", "ShowHomeButton"), ("REG_DWORD", 1))
+        self.assertEqual(self.snapshot.get("", "DownloadRestrictions"), 0xFFFFFFFF)
+        self.assertEqual(self.snapshot.get("", "HomepageLocation"), "https://example.com/a b")
+        self.assertEqual(self.snapshot.get("", "Blob"), b"\x01\xff")
+        self.assertEqual(self.snapshot.get("", "Hosts"), ["a.example", "b.example"])
+
+    def test_empty_and_default_values(self):
+        self.assertEqual(self.snapshot.get_entry("", "Proxy Server Name"), ("REG_SZ", ""))
+        self.assertIsNone(self.snapshot.get_entry("", "(Default)"))
+
+    def test_undecodable_data_is_kept_raw(self):
+        self.assertEqual(self.snapshot.get_entry("", "Broken"), ("REG_DWORD", "0xZZ"))
+
+    def test_nested_subkeys(self):
+        self.assertEqual(self.snapshot.get("Recommended", "ShowHomeButton"), 0)
+        self.assertEqual(self.snapshot.get_list("Recommended\\URLBlocklist"), ({"1": "recommended.example"}, [1]))
+        self.assertEqual(self.snapshot.get_list("URLBlocklist"), ({"1": "example.com", "2": "*.ads.example"}, [1, 2]))
+
+    def test_keys_outside_the_tree_are_ignored(self):
+        self.assertEqual(set(self.snapshot.keys), {"", "Recommended", "Recommended\\URLBlocklist", "URLBlocklist"})
+        self.assertEqual(len(self.snapshot), 11)
+
+    def test_empty_output(self):
+        self.assertEqual(len(parse_reg_query_output("", BASE)), 0)
+        self.assertEqual(len(parse_reg_query_output(None, BASE)), 0)
+
+
+class DecodeRegValueTests(unittest.TestCase):
+    def test_dwords(self):
+        self.assertEqual(decode_reg_value("REG_DWORD", "0x10"), 16)
+        self.assertEqual(decode_reg_value("REG_DWORD", " 0X1F "), 31)
+        self.assertEqual(decode_reg_value("REG_DWORD", "7"), 7)
+        self.assertEqual(decode_reg_value("REG_QWORD", "0x100000000"), 1 << 32)
+
+    def test_bad_dword_raises(self):
+        with self.assertRaises(ValueError):
+            decode_reg_value("REG_DWORD", "")
+
+    def test_strings(self):
+        self.assertEqual(decode_reg_value("REG_SZ", None), "")
+        self.assertEqual(decode_reg_value("REG_EXPAND_SZ", "%ProgramFiles%"), "%ProgramFiles%")
+        self.assertEqual(decode_reg_value("REG_MULTI_SZ", ""), [])
+
+
+class FakeWorker:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def run(self, command):
+        return self.reply
+
+
+class SnapshotErrorPathTests(unittest.TestCase):
+    def _snapshot(self, reply):
+        return WindowsPolicyManager(FakeWorker(reply)).get_policy_snapshot()
+
+    def test_missing_key_is_an_empty_tree(self):
+        snapshot = self._snapshot((None, "ERROR: The system was unable to find the specified registry key or value.", 1))
+        self.assertIsNone(snapshot.error)
+        self.assertEqual(len(snapshot), 0)
+
+    def test_access_denied(self):
+        self.assertEqual(self._snapshot((None, "ERROR: Access is denied.", 1)).error, "access_denied")
+
+    def test_failures_are_errors_not_empty_trees(self):
+        self.assertIn("timed out", self._snapshot((None, "Registry worker timed out after 10 s.", None)).error)
+        self.assertIn("code 5", self._snapshot(("", "", 5)).error)
+
+    def test_success(self):
+        snapshot = self._snapshot((REG_QUERY_OUTPUT, "", 0))
+        self.assertIsNone(snapshot.error)
+        self.assertEqual(snapshot.get("URLBlocklist", "2"), "*.ads.example")
+        self.assertIsInstance(snapshot, PolicySnapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import unittest
+
+from linux_policy_manager import LinuxPolicyManager
+from policy_snapshot import PolicySnapshot
+from policy_state import import_policy_state, load_policy_state, plan_import, save_policy_state
+from policy_transaction import PolicyTransaction
+
+LIVE = PolicySnapshot({
+    "": {"ShowHomeButton": ("REG_DWORD", 1), "HomepageLocation": ("REG_SZ", "https://old.example")},
+    "URLBlocklist": {"1": ("REG_SZ", "a.example"), "2": ("REG_SZ", "b.example"), "3": ("REG_SZ", "c.example")},
+    "URLAllowlist": {"1": ("REG_SZ", "ok.example")},
+})
+
+
+class StateFileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "state.json")
+
+    def test_round_trip(self):
+        snapshot = PolicySnapshot({"": {"Blob": ("REG_BINARY", b"\x00\xff"), "ShowHomeButton": ("REG_DWORD", 1)},
+                                   "URLBlocklist": {"1": ("REG_SZ", "a.example")}, "Empty": {}})
+        self.assertEqual(save_policy_state(snapshot, self.path), 3)
+        loaded = load_policy_state(self.path)
+        self.assertEqual(snapshot.diff(loaded), {})
+        self.assertNotIn("Empty", loaded.keys)
+
+    def test_foreign_files_are_rejected(self):
+        for content in ([1, 2], {"format": "something-else"}, {"format": "chrome-policy-state", "version": 99}):
+            with self.subTest(content=content):
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    json.dump(content, f)
+                with self.assertRaises(ValueError):
+                    load_policy_state(self.path)
+
+
+class PlanImportTests(unittest.TestCase):
+    def test_only_changed_values_are_set(self):
+        target = PolicySnapshot({"": {"ShowHomeButton": ("REG_DWORD", 1), "HomepageLocation": ("REG_SZ", "https://new.example")}})
+        self.assertEqual(plan_import(LIVE, target), [("set", "", "HomepageLocation", "https://new.example", "REG_SZ")])
+
+    def test_lists_in_the_file_replace_the_live_list(self):
+        target = PolicySnapshot({"URLBlocklist": {"1": ("REG_SZ", "a.example")}})
+        self.assertEqual(plan_import(LIVE, target), [("remove", "URLBlocklist", "2", None, None),
+                                                     ("remove", "URLBlocklist", "3", None, None)])
+
+    def test_prune_removes_everything_not_in_the_file(self):
+        target = PolicySnapshot({"": {"ShowHomeButton": ("REG_DWORD", 1)}})
+        self.assertEqual(plan_import(LIVE, target), [])
+        removed = sorted((key_name, name) for op, key_name, name, _, _ in plan_import(LIVE, target, prune=True) if op == "remove")
+        self.assertEqual(removed, [("", "HomepageLocation"), ("URLAllowlist", "1"),
+                                   ("URLBlocklist", "1"), ("URLBlocklist", "2"), ("URLBlocklist", "3")])
+
+    def test_identical_state_plans_nothing(self):
+        self.assertEqual(plan_import(LIVE, LIVE, prune=True), [])
+
+
+class RecordingBackend:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.batches = []
+
+    def get_policy_snapshot(self):
+        return self.snapshot
+
+    def transaction(self, snapshot=None):
+        return PolicyTransaction(self, snapshot)
+
+    def apply_batch(self, ops):
+        self.batches.append(ops)
+        return [(op, True, "ok") for op in ops]
+
+
+class ImportStateTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "state.json")
+
+    def test_matching_file_writes_nothing(self):
+        save_policy_state(LIVE, self.path)
+        backend = RecordingBackend(LIVE)
+        success, msg, ops = import_policy_state(backend, self.path, prune=True, log_callback=lambda m: None)
+        self.assertTrue(success)
+        self.assertEqual((ops, backend.batches), ([], []))
+
+    def test_dry_run_only_plans(self):
+        save_policy_state(PolicySnapshot({"URLBlocklist": {"1": ("REG_SZ", "z.example")}}), self.path)
+        backend = RecordingBackend(LIVE)
+        success, msg, ops = import_policy_state(backend, self.path, dry_run=True, log_callback=lambda m: None)
+        self.assertTrue(success)
+        self.assertEqual(len(ops), 3)
+        self.assertEqual(backend.batches, [])
+
+    def test_changes_are_one_batch(self):
+        save_policy_state(PolicySnapshot({"URLBlocklist": {"1": ("REG_SZ", "z.example")}}), self.path)
+        backend = RecordingBackend(LIVE)
+        success, _, ops = import_policy_state(backend, self.path, log_callback=lambda m: None)
+        self.assertTrue(success)
+        self.assertEqual(len(backend.batches), 1)
+        self.assertEqual(len(backend.batches[0]), len(ops))
+
+    def test_unreadable_live_policies_abort(self):
+        save_policy_state(LIVE, self.path)
+        backend = RecordingBackend(PolicySnapshot(error="access_denied"))
+        success, msg, _ = import_policy_state(backend, self.path, log_callback=lambda m: None)
+        self.assertFalse(success)
+        self.assertIn("access_denied", msg)
+        self.assertEqual(backend.batches, [])
+
+    def test_bad_file_is_reported(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("{not json")
+        success, msg, ops = import_policy_state(RecordingBackend(LIVE), self.path, log_callback=lambda m: None)
+        self.assertFalse(success)
+        self.assertEqual(ops, [])
+
+
+class LinuxImportTests(unittest.TestCase):
+    """A list set by another managed policy file cannot be imported into ours."""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.policy_dir = os.path.join(self.tmp.name, "managed")
+        os.makedirs(self.policy_dir)
+        with open(os.path.join(self.policy_dir, "10_admin.json"), 'w', encoding='utf-8') as f:
+            json.dump({"URLBlocklist": ["admin.example"]}, f)
+        self.backend = LinuxPolicyManager(self.policy_dir)
+        self.path = os.path.join(self.tmp.name, "state.json")
+
+    def test_foreign_list_ops_fail_and_the_rest_apply(self):
+        save_policy_state(PolicySnapshot({"": {"ShowHomeButton": ("REG_DWORD", 1)},
+                                          "URLBlocklist": {"1": ("REG_SZ", "mine.example")}}), self.path)
+        success, msg, ops = import_policy_state(self.backend, self.path, log_callback=lambda m: None)
+        self.assertFalse(success)
+        self.assertIn("10_admin.json", msg)
+        self.assertEqual(len(ops), 2)
+        snapshot = self.backend.get_policy_snapshot()
+        self.assertEqual(snapshot.get("", "ShowHomeButton"), 1)
+        self.assertEqual(snapshot.get("URLBlocklist", "1"), "admin.example")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from policy_backend import PolicyBackend
+from policy_snapshot import PolicySnapshot
+from policy_transaction import PolicyOp, PolicyTransaction
+
+
+class RecordingBackend(PolicyBackend):
+    """Records every apply_batch call; single writes must not be used by a commit."""
+    def __init__(self, fail=()):
+        self.batches = []
+        self.fail = set(fail)
+
+    def apply_batch(self, ops):
+        self.batches.append(list(ops))
+        return [(op, op.value_name not in self.fail, "failed" if op.value_name in self.fail else "ok") for op in ops]
+
+    def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
+        raise AssertionError("commit() must go through apply_batch")
+
+    def remove_policy(self, key_name, value_name):
+        raise AssertionError("commit() must go through apply_batch")
+
+
+class PolicyTransactionTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = RecordingBackend()
+
+    def test_last_op_per_value_wins(self):
+        txn = self.backend.transaction()
+        txn.set("", "ShowHomeButton", 1).set("", "ShowHomeButton", 0)
+        txn.set("URLBlocklist", 1, "a.example", "REG_SZ").remove("URLBlocklist", "1")
+        txn.remove("", "HomepageLocation").set("", "HomepageLocation", "https://example.com", "REG_SZ")
+        self.assertEqual(txn.ops(), [PolicyOp("set", "", "ShowHomeButton", 0, "REG_DWORD"),
+                                     PolicyOp("remove", "URLBlocklist", "1", None, None),
+                                     PolicyOp("set", "", "HomepageLocation", "https://example.com", "REG_SZ")])
+
+    def test_none_and_empty_key_are_the_same_value(self):
+        txn = self.backend.transaction()
+        txn.set(None, "ShowHomeButton", 1).set("", "ShowHomeButton", 0)
+        self.assertEqual(len(txn), 1)
+
+    def test_noops_against_the_snapshot_are_dropped(self):
+        snapshot = PolicySnapshot({"": {"ShowHomeButton": ("REG_DWORD", 1), "HomepageLocation": ("REG_SZ", "https://example.com")}})
+        txn = self.backend.transaction(snapshot)
+        txn.set("", "ShowHomeButton", "1").set("", "HomepageLocation", "https://example.com", "REG_SZ")
+        txn.remove("URLBlocklist", "1")
+        self.assertEqual(txn.ops(), [])
+        self.assertTrue(txn.commit().success)
+        self.assertEqual(self.backend.batches, [])
+
+    def test_error_snapshot_drops_nothing(self):
+        txn = self.backend.transaction(PolicySnapshot(error="access_denied"))
+        txn.remove("", "ShowHomeButton")
+        self.assertEqual(len(txn), 1)
+
+    def test_commit_is_a_single_apply_batch(self):
+        txn = self.backend.transaction()
+        for i in range(1, 6):
+            txn.set("URLBlocklist", i, f"{i}.example", "REG_SZ")
+        txn.remove("URLBlocklist", 3)
+        result = txn.commit()
+        self.assertEqual(len(self.backend.batches), 1)
+        self.assertEqual([(op.op, op.value_name) for op in self.backend.batches[0]],
+                         [("set", "1"), ("set", "2"), ("remove", "3"), ("set", "4"), ("set", "5")])
+        self.assertEqual(len(result), 5)
+        self.assertEqual(len(txn), 0) # Committed ops are not sent twice
+
+    def test_commit_reports_failures(self):
+        backend = RecordingBackend(fail={"2"})
+        txn = backend.transaction()
+        txn.set("URLBlocklist", 1, "a.example", "REG_SZ").set("URLBlocklist", 2, "b.example", "REG_SZ")
+        result = txn.commit()
+        self.assertFalse(result.success)
+        self.assertEqual([op.value_name for op, _ in result.failures], ["2"])
+        self.assertEqual(result.summary(), "1 change(s) applied, 1 failed: failed")
+
+
+if __name__ == '__main__':
+    unittest.main()
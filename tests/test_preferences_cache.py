@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profile_utils import PREFERENCES_PATHS, PreferencesCache
+
+
+class PreferencesCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name, document, mtime_ns=None):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        if mtime_ns is not None: os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def test_hit_returns_the_same_document(self):
+        cache = PreferencesCache()
+        path = self._write("Preferences", {"profile": {"name": "a"}})
+        first = cache.load(path)
+        self.assertIs(cache.load(path), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_changed_mtime_is_reloaded(self):
+        cache = PreferencesCache()
+        path = self._write("Preferences", {"profile": {"name": "a"}}, mtime_ns=1_000_000_000)
+        cache.load(path)
+        self._write("Preferences", {"profile": {"name": "b"}}, mtime_ns=2_000_000_000) # Same size
+        self.assertEqual(cache.load(path)["profile"]["name"], "b")
+
+    def test_changed_size_is_reloaded(self):
+        cache = PreferencesCache()
+        path = self._write("Preferences", {"profile": {"name": "a"}}, mtime_ns=1_000_000_000)
+        self.assertEqual(cache.extract(path, PREFERENCES_PATHS), ("a", None))
+        self._write("Preferences", {"profile": {"name": "longer"}}, mtime_ns=1_000_000_000) # Same mtime
+        self.assertEqual(cache.extract(path, PREFERENCES_PATHS), ("longer", None))
+        self.assertEqual(cache.hits, 0)
+
+    def test_least_recently_used_is_evicted(self):
+        paths = [self._write(f"P{i}", {"profile": {"name": "x" * 100}}) for i in range(3)]
+        size = os.path.getsize(paths[0])
+        cache = PreferencesCache(max_bytes=2 * size)
+        cache.load(paths[0])
+        cache.load(paths[1])
+        cache.load(paths[0]) # P0 is now the most recently used
+        cache.load(paths[2])
+        self.assertEqual(list(cache._entries), [paths[0], paths[2]])
+        self.assertEqual(cache._bytes, 2 * size)
+
+    def test_documents_over_the_bound_are_not_kept(self):
+        path = self._write("Preferences", {"profile": {"name": "x" * 100}})
+        cache = PreferencesCache(max_bytes=10)
+        cache.load(path)
+        self.assertEqual((len(cache._entries), cache._bytes), (0, 0))
+
+    def test_extract_uses_a_cached_document(self):
+        cache = PreferencesCache()
+        path = self._write("Preferences", {"profile": {"name": "a"}, "extensions": {"settings": {}}})
+        cache.load(path)
+        self.assertEqual(cache.extract(path, PREFERENCES_PATHS), ("a", {}))
+        self.assertEqual(cache.hits, 1)
+
+    def test_put_replaces_extracted_values(self):
+        cache = PreferencesCache()
+        path = self._write("Preferences", {"profile": {"name": "a"}})
+        cache.extract(path, PREFERENCES_PATHS)
+        document = {"profile": {"name": "b"}}
+        self._write("Preferences", document)
+        cache.put(path, document)
+        self.assertEqual(list(cache._entries), [path])
+        self.assertEqual(cache.extract(path, ("profile.name",)), ("b",))
+
+    def test_invalidate(self):
+        cache = PreferencesCache()
+        a, b = self._write("A", {"n": 1}), self._write("B", {"n": 2})
+        cache.load(a)
+        cache.extract(a, ("n",))
+        cache.load(b)
+        cache.invalidate(a)
+        self.assertEqual(list(cache._entries), [b])
+        self.assertEqual(cache._bytes, os.path.getsize(b))
+        cache.invalidate()
+        self.assertEqual((len(cache._entries), cache._bytes), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
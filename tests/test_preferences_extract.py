@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profile_utils import (PREFERENCES_PATHS, _merge_settings, _read_profile_extensions, _walk_path, extract_json_paths,
+                           panic_changes, read_extension_settings)
+
+
+def _settings(count):
+    return {f"{'abcdefghijklmnop'[e % 16] * 31}{'abcdefghijklmnop'[e // 16 % 16]}":
+            {"state": 1, "path": f"ext{e}", "manifest": {"name": f"Extension {e} ☃", "version": "1.0"}} for e in range(count)}
+
+
+class ExtractJsonPathsTests(unittest.TestCase):
+    """extract_json_paths must agree with json.loads on text that trips naive scanners."""
+    def _documents(self):
+        for n in range(4):
+            yield n, {"a_first": {"profile": {"name": "decoy"}, "[*.]x.com,*": "}]{[\\\"", "n": [1e-7, -0.0, 12345678901234567890, 1.5E300]},
+                      "profile": {"name": f"Renée \"{n}\" \U0001F600 [{{x}}]", "content_settings": {"settings": {"name": "nested"}}},
+                      "extensions": {"settings": _settings(20)}}
+
+    def test_matches_full_parse(self):
+        for n, document in self._documents():
+            raw = json.dumps(document, ensure_ascii=n % 2 == 0, indent=None if n % 2 else 3).encode('utf-8')
+            expected = tuple(_walk_path(json.loads(raw), p) for p in PREFERENCES_PATHS)
+            self.assertEqual(extract_json_paths(raw, PREFERENCES_PATHS)[0], expected, n)
+
+    def test_missing_paths_and_non_objects(self):
+        self.assertEqual(extract_json_paths(b'{"profile": {}}', PREFERENCES_PATHS)[0], (None, None))
+        self.assertEqual(extract_json_paths(b'[1, 2]', PREFERENCES_PATHS)[0], (None, None))
+
+    def test_duplicate_keys_resolve_like_json_loads(self):
+        for raw in (b'{"profile":{"name":"a","name":"b"}}',
+                    b'{"profile":{"name":"a"},"extensions":{"settings":{}},"profile":{"name":"c"}}',
+                    b'{"extensions":{"settings":{"x":{"state":1,"state":0}},"settings":{"y":{}}}}',
+                    b'{"profile":{"name":"a","other":{"name":"z"}}}'):
+            with self.subTest(raw=raw):
+                expected = tuple(_walk_path(json.loads(raw), p) for p in PREFERENCES_PATHS)
+                self.assertEqual(extract_json_paths(raw, PREFERENCES_PATHS)[0], expected)
+        self.assertEqual(extract_json_paths(b'{"profile":{"name":"a","name":"b"}}', ("profile.name",))[0], ("b",))
+
+    def test_malformed_json_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            extract_json_paths(b'{"profile": {', PREFERENCES_PATHS)
+
+
+class SecurePreferencesTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.profile = os.path.join(tmp.name, "Default")
+        os.makedirs(self.profile)
+        self.settings = _settings(6)
+        self.ids = list(self.settings)
+        self.secure = {self.ids[0]: {"state": 0, "from_secure": True}, self.ids[1]: {"from_secure": True},
+                       "p" * 32: {"state": 1, "manifest": {"name": "Only in Secure Preferences"}}}
+        for name, document in (("Preferences", {"profile": {"name": "Person"}, "extensions": {"settings": self.settings}}),
+                               ("Secure Preferences", {"extensions": {"settings": self.secure}})):
+            with open(os.path.join(self.profile, name), 'w', encoding='utf-8') as f:
+                json.dump(document, f)
+
+    def test_merged_for_display(self):
+        name, settings, read_only = read_extension_settings(self.profile)
+        self.assertEqual((name, settings), ("Person", _merge_settings(self.settings, self.secure)))
+        self.assertEqual(read_only, {self.ids[0], "p" * 32}) # Its own state, or not in Preferences at all
+
+    def test_secure_entries_are_not_actionable(self):
+        extensions, _, _ = _read_profile_extensions(self.profile)
+        by_id = {ext['id']: ext for ext in extensions.values()}
+        self.assertTrue(by_id["p" * 32]['read_only'])
+        self.assertFalse(by_id[self.ids[1]]['read_only'])
+        changes = panic_changes(extensions)
+        self.assertEqual(sorted(ext_id for ext_id, _ in changes), sorted(self.ids[1:]))
+
+    def test_without_secure_preferences(self):
+        os.remove(os.path.join(self.profile, "Secure Preferences"))
+        self.assertEqual(read_extension_settings(self.profile), ("Person", self.settings, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from preferences_patch import find_extension_state_spans, patch_extension_states
+
+IDS = [f"{'abcdefghijklmnop'[e % 16] * 31}{'abcdefghijklmnop'[e // 16]}" for e in range(40)]
+LAYOUTS = {"compact": lambda d: json.dumps(d, separators=(',', ':')).encode(),
+           "compact utf-8": lambda d: json.dumps(d, separators=(',', ':'), ensure_ascii=False).encode(),
+           "indented": lambda d: json.dumps(d, indent=3).encode(),
+           "sorted crlf": lambda d: json.dumps(d, indent=1, sort_keys=True).replace("\n", "\r\n").encode()}
+# Layouts the patcher must refuse (the caller then decodes and rewrites the document)
+UNSUPPORTED = ['{"extensions":{"settings":{"%s":{"state":"1"}}}}', '{"extensions":{"settings":{"%s":{"path":"p"}}}}',
+               '{"extensions":{"settings":{"%s":{"state":1,"state":0}}}}', '{"extensions":{"settings":{"%s":{"state":1.0}}}}',
+               '{"extensions":{"settings":{"%s":{"state":1}}},"extensions":{}}', '{"extensions":{}}', '[1]',
+               '{"extensions":{"settings":{"%s":{"state":1}},"settings":{}}}', '{"extensions":{"settings":{"%s":{"state":1}}']
+
+
+def _expected_after(document, states):
+    settings = document["extensions"]["settings"]
+    for ext_id, state in states.items():
+        if isinstance(settings.get(ext_id), dict): settings[ext_id]["state"] = state
+    return document
+
+
+class PatchExtensionStatesTests(unittest.TestCase):
+    """Patching the state bytes must give the same document as decoding, editing and rewriting it."""
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "Preferences")
+        self.base = {"aé": "ü [*.]{\\\"}", "browser": {"extensions": ["not", "this"], "n": [1e-7, -0.0, 10 ** 20]},
+                     "extensions": {"alerts": {}, "settings": {ext_id: {"manifest": {"name": f"E{e} ☃", "state": 5}, "state": e % 2,
+                                                                        "path": f"p{e}"} for e, ext_id in enumerate(IDS)}},
+                     "profile": {"name": "x", "content_settings": {"settings": {"state": 1}}}}
+        self.base["extensions"]["settings"][IDS[5]] = "not an object"
+
+    def _write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_matches_full_rewrite(self):
+        states = {ext_id: (e + 1) % 2 for e, ext_id in enumerate(IDS)}
+        states[IDS[7]] = 10 # Wider than the old value
+        states["q" * 32] = 0 # Not installed
+        for name, dump in LAYOUTS.items():
+            with self.subTest(layout=name):
+                self._write(dump(self.base))
+                found, written = patch_extension_states(self.path, states)
+                self.assertTrue(written.written)
+                self.assertEqual(json.loads(self._read()), _expected_after(json.loads(dump(self.base)), states))
+                self.assertEqual(found, {ext_id for ext_id in IDS if ext_id != IDS[5]})
+
+    def test_same_width_keeps_every_other_byte(self):
+        raw = LAYOUTS["compact"](self.base)
+        self._write(raw)
+        patch_extension_states(self.path, {IDS[0]: 1, IDS[1]: 0})
+        patched = self._read()
+        self.assertEqual(len(patched), len(raw))
+        self.assertEqual(sum(a != b for a, b in zip(raw, patched)), 2)
+
+    def test_unchanged_states_write_nothing(self):
+        self._write(LAYOUTS["compact"](self.base))
+        found, written = patch_extension_states(self.path, {IDS[0]: 0, IDS[1]: 1})
+        self.assertEqual(found, {IDS[0], IDS[1]})
+        self.assertFalse(written.written)
+
+    def test_unsupported_layouts_are_refused(self):
+        for text in UNSUPPORTED:
+            with self.subTest(text=text):
+                self._write((text.replace("%s", IDS[0]) if "%s" in text else text).encode())
+                self.assertIsNone(patch_extension_states(self.path, {IDS[0]: 0}))
+
+    def test_non_integer_state_is_refused(self):
+        self._write(LAYOUTS["compact"](self.base))
+        self.assertIsNone(patch_extension_states(self.path, {IDS[0]: True}))
+
+    def test_spans_point_at_the_state_bytes(self):
+        raw = LAYOUTS["indented"](self.base)
+        for ext_id, (start, end, state) in find_extension_state_spans(raw, IDS[:4]).items():
+            self.assertEqual(raw[start:end], str(state).encode())
+
+
+if __name__ == "__main__":
+    unittest.main()
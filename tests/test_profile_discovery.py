@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profile_utils import get_profile_details, get_profile_info
+
+
+class ProfileDiscoveryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.log = []
+
+    def _profile(self, folder, preferences=None):
+        path = os.path.join(self.root, folder)
+        os.makedirs(path)
+        if preferences is not None:
+            with open(os.path.join(path, "Preferences"), 'w', encoding='utf-8') as f:
+                f.write(preferences if isinstance(preferences, str) else json.dumps(preferences))
+        return path
+
+    def _local_state(self, info_cache, last_used=None):
+        with open(os.path.join(self.root, "Local State"), 'w', encoding='utf-8') as f:
+            json.dump({"profile": {"info_cache": info_cache, "last_used": last_used}}, f)
+
+    def test_names_come_from_local_state(self):
+        self._profile("Default", {"profile": {"name": "Ignored"}})
+        self._profile("Profile 1")
+        self._local_state({"Default": {"name": "Work", "active_time": 100.0, "avatar_icon": "chrome://theme/IDR_PROFILE_AVATAR_26"},
+                           "Profile 1": {"name": "Home", "active_time": 200.0}})
+        profiles = get_profile_info(self.root, self.log.append)
+        self.assertEqual([(p["folder"], p["name"], p["source"]) for p in profiles],
+                         [("Profile 1", "Home", "Local State"), ("Default", "Work", "Local State")])
+        self.assertEqual(profiles[1]["avatar_icon"], "chrome://theme/IDR_PROFILE_AVATAR_26")
+
+    def test_last_used_profile_comes_first(self):
+        self._profile("Default")
+        self._profile("Profile 1")
+        self._local_state({"Default": {"name": "A", "active_time": 1}, "Profile 1": {"name": "B", "active_time": 2}}, last_used="Default")
+        self.assertEqual([p["folder"] for p in get_profile_info(self.root, self.log.append)], ["Default", "Profile 1"])
+
+    def test_profiles_missing_from_local_state_read_preferences(self):
+        self._profile("Default")
+        self._profile("Profile 2", {"profile": {"name": "From Prefs"}})
+        self._profile("Profile 3", "{broken")
+        self._profile("Profile 4")
+        self._profile("System Profile") # Not a user profile folder
+        self._local_state({"Default": {"name": "Main"}})
+        names = {p["folder"]: (p["name"], p["source"]) for p in get_profile_info(self.root, self.log.append)}
+        self.assertEqual(names, {"Default": ("Main", "Local State"), "Profile 2": ("From Prefs", "Preferences"),
+                                 "Profile 3": ("Profile 3", "Preferences"), "Profile 4": ("Profile 4", "Preferences")})
+        self.assertTrue(any("3 profile(s) were missing from Local State" in line for line in self.log))
+
+    def test_unreadable_local_state_falls_back(self):
+        self._profile("Default", {"profile": {"name": "Fallback"}})
+        with open(os.path.join(self.root, "Local State"), 'w', encoding='utf-8') as f:
+            f.write("not json")
+        profiles = get_profile_info(self.root, self.log.append)
+        self.assertEqual([(p["name"], p["source"]) for p in profiles], [("Fallback", "Preferences")])
+        self.assertTrue(any("Could not read Local State" in line for line in self.log))
+
+    def test_missing_user_data_dir(self):
+        self.assertEqual(get_profile_info(os.path.join(self.root, "missing"), self.log.append), [])
+
+    def test_details_make_names_unique(self):
+        self._profile("Default")
+        self._profile("Profile 1")
+        self._local_state({"Default": {"name": "Same"}, "Profile 1": {"name": "Same"}})
+        details = get_profile_details(self.root, self.log.append)
+        self.assertEqual(sorted(details), ["Same", "Same (2)"])
+        self.assertEqual(sorted(details.values()), [os.path.join(self.root, "Default"), os.path.join(self.root, "Profile 1")])
+
+
+if __name__ == '__main__':
+    unittest.main()
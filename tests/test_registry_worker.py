@@ -0,0 +1,67 @@
+import shutil
+import unittest
+
+from registry_worker import RegistryWorker, PosixShellFraming, _live_workers
+
+# A `reg` stand-in: "query" prints one value line, "fail" writes an error and exits with 1
+STUB = ('reg() { case "$1" in '
+        'query) echo "HKEY_LOCAL_MACHINE\\\\STUB"; echo "    $3    REG_DWORD    0x1" ;; '
+        'fail) echo "ERROR: stub failure" >&2; return 1 ;; '
+        'quiet) return 3 ;; '
+        'esac; }')
+
+
+@unittest.skipUnless(shutil.which("sh"), "needs a POSIX shell")
+class RegistryWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.worker = RegistryWorker(PosixShellFraming([STUB]), timeout=5)
+        self.addCleanup(self.worker.close)
+
+    def test_framed_reply_and_exit_code(self):
+        stdout, stderr, exit_code = self.worker.run('reg query "HKEY_LOCAL_MACHINE\\STUB" /v Value')
+        self.assertEqual(stdout.splitlines(), ["HKEY_LOCAL_MACHINE\\STUB", "    /v    REG_DWORD    0x1"])
+        self.assertEqual(stderr, "")
+        self.assertEqual(exit_code, 0)
+
+    def test_failure_keeps_stderr_and_exit_code(self):
+        stdout, stderr, exit_code = self.worker.run("reg fail")
+        self.assertEqual((stdout, stderr, exit_code), ("", "ERROR: stub failure", 1))
+        self.assertEqual(self.worker.run("reg quiet")[2], 3) # Non-zero exit without any output
+
+    def test_same_process_serves_many_calls(self):
+        self.worker.run("reg query X /v A")
+        pid = self.worker._proc.pid
+        for _ in range(5):
+            self.assertEqual(self.worker.run("reg query X /v A")[2], 0)
+        self.assertEqual(self.worker._proc.pid, pid)
+        self.assertEqual(self.worker.restarts, 0)
+
+    def test_restarts_after_the_process_dies(self):
+        self.worker.run("reg query X /v A")
+        self.worker._proc.kill()
+        self.worker._proc.wait()
+        stdout, _, exit_code = self.worker.run("reg query X /v A")
+        self.assertEqual(exit_code, 0)
+        self.assertIn("REG_DWORD", stdout)
+        self.assertEqual(self.worker.restarts, 1)
+
+    def test_timeout_is_reported_and_the_worker_recovers(self):
+        self.worker.timeout = 0.5
+        stdout, stderr, exit_code = self.worker.run("sleep 3")
+        self.assertIsNone(stdout)
+        self.assertIsNone(exit_code)
+        self.assertIn("timed out", stderr)
+        self.worker.timeout = 5
+        self.assertEqual(self.worker.run("reg query X /v A")[2], 0)
+
+    def test_close_stops_the_process_and_unregisters(self):
+        self.worker.run("reg query X /v A")
+        proc = self.worker._proc
+        self.assertIn(self.worker, _live_workers)
+        self.worker.close()
+        self.assertIsNotNone(proc.poll())
+        self.assertNotIn(self.worker, _live_workers)
+
+
+if __name__ == "__main__":
+    unittest.main()
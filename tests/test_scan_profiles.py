@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import profile_utils
+from profile_utils import scan_profiles
+
+
+def _extension(name, state=1):
+    return {"state": state, "path": name.lower(), "manifest": {"name": name, "version": "1.0"}}
+
+
+class ScanProfilesTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+        self.log = []
+        self.expected = {}
+        for i, folder in enumerate(["Default", "Profile 1", "Profile 2", "Profile 3", "Profile 4"]):
+            os.makedirs(os.path.join(self.root, folder))
+            settings = {chr(ord('a') + i) * 32: _extension(f"Ext {i}"), "p" * 32: _extension("Shared", state=0)}
+            with open(os.path.join(self.root, folder, "Preferences"), 'w', encoding='utf-8') as f:
+                json.dump({"profile": {"name": f"Person {i}"}, "extensions": {"settings": settings}}, f)
+            self.expected[folder] = {f"Ext {i}": chr(ord('a') + i) * 32, "Shared": "p" * 32}
+        os.makedirs(os.path.join(self.root, "Profile 9")) # No Preferences at all
+        self.expected["Profile 9"] = {}
+
+    def _scan(self, **kwargs):
+        results = list(scan_profiles(self.root, self.log.append, **kwargs))
+        return {p["folder"]: {name: ext["id"] for name, ext in p["extensions"].items()} for p in results}, results
+
+    def test_serial_scan(self):
+        found, results = self._scan(max_workers=1)
+        self.assertEqual(found, self.expected)
+        self.assertEqual(results[0]["name"], "Person 0") # Profile info order, as from get_profile_info
+        self.assertTrue(any("Preferences file not found for profile: Profile 9" in line for line in self.log))
+
+    def test_thread_pool_scan_gives_the_same_result(self):
+        found, _ = self._scan(max_workers=3)
+        self.assertEqual(found, self.expected)
+
+    def test_large_files_go_to_the_process_pool(self):
+        with mock.patch.object(profile_utils, "LARGE_PREFERENCES_BYTES", 1):
+            found, _ = self._scan(max_workers=2)
+        self.assertEqual(found, self.expected)
+
+    def test_failed_worker_is_read_directly(self):
+        calls = []
+        real = profile_utils._read_profile_extensions
+        def flaky(profile_path):
+            calls.append(profile_path)
+            if calls.count(profile_path) == 1 and profile_path.endswith("Profile 2"): raise RuntimeError("worker died")
+            return real(profile_path)
+        with mock.patch.object(profile_utils, "_read_profile_extensions", flaky):
+            found, _ = self._scan(max_workers=2)
+        self.assertEqual(found, self.expected)
+        self.assertTrue(any("Parallel scan of Profile 2 failed (worker died)" in line for line in self.log))
+
+    def test_no_profiles(self):
+        empty = os.path.join(self.root, "empty")
+        os.makedirs(empty)
+        self.assertEqual(list(scan_profiles(empty, self.log.append)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from url_matcher import UrlMatcher
+
+
+class DefaultPortTests(unittest.TestCase):
+    def test_filter_port_matches_the_scheme_default(self):
+        matcher = UrlMatcher(["example.com:443", "http://plain.example:80"])
+        self.assertTrue(matcher.is_blocked("https://example.com/x"))
+        self.assertTrue(matcher.is_blocked("https://example.com:443/x"))
+        self.assertTrue(matcher.is_blocked("http://plain.example/"))
+        self.assertFalse(matcher.is_blocked("http://example.com/"))
+        self.assertFalse(matcher.is_blocked("https://example.com:8443/"))
+
+    def test_explicit_default_port_in_url(self):
+        matcher = UrlMatcher(["https://example.com"])
+        self.assertTrue(matcher.is_blocked("https://example.com:443/"))
+
+
+class EvaluateLinesTests(unittest.TestCase):
+    def test_csv_header_is_not_counted(self):
+        matcher = UrlMatcher(["ads.example"])
+        stats = matcher.evaluate_lines(["url,title,visits\n", "https://ads.example/x,Ads,3\n", "https://ok.example/,Ok,1\n"])
+        self.assertEqual((stats["checked"], stats["blocked"]), (2, 1))
+
+    def test_bare_hosts_are_counted(self):
+        stats = UrlMatcher(["ads.example"]).evaluate_lines(["ads.example\n", "\n", "other.example\n"])
+        self.assertEqual((stats["checked"], stats["blocked"]), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from policy_transaction import PolicyOp
+from windows_policy_manager import WindowsPolicyManager, build_reg_file
+
+BASE = r"SOFTWARE\Policies\Google\Chrome"
+
+
+class FakeWorker:
+    def __init__(self):
+        self.commands = []
+
+    def run(self, command):
+        self.commands.append(command)
+        return "", "The operation completed successfully.", 0
+
+
+class BuildRegFileTests(unittest.TestCase):
+    def _line(self, op):
+        return build_reg_file(BASE, [op]).split("\r\n")[3]
+
+    def test_multi_string_is_hex7_utf16(self):
+        op = PolicyOp("set", "", "Hosts", ["a", "b"], "REG_MULTI_SZ")
+        self.assertEqual(self._line(op), '"Hosts"=hex(7):61,00,00,00,62,00,00,00,00,00')
+
+    def test_binary_is_hex(self):
+        self.assertEqual(self._line(PolicyOp("set", "", "Blob", b"\x01\xff", "REG_BINARY")), '"Blob"=hex:01,ff')
+        self.assertEqual(self._line(PolicyOp("set", "", "Blob", "01ff", "REG_BINARY")), '"Blob"=hex:01,ff')
+
+    def test_string_with_newline_is_hex1(self):
+        self.assertEqual(self._line(PolicyOp("set", "", "Text", "a\nb", "REG_SZ")), '"Text"=hex(1):61,00,0a,00,62,00,00,00')
+
+    def test_scalar_types(self):
+        self.assertEqual(self._line(PolicyOp("set", "", "Flag", 1, "REG_DWORD")), '"Flag"=dword:00000001')
+        self.assertEqual(self._line(PolicyOp("set", "URLBlocklist", "1", 'a"b', "REG_SZ")), '"1"="a\\"b"')
+
+
+class ApplyBatchTests(unittest.TestCase):
+    def test_all_types_go_through_one_import(self):
+        worker = FakeWorker()
+        ops = [PolicyOp("set", "", "Hosts", ["a"], "REG_MULTI_SZ"), PolicyOp("set", "", "Blob", b"\x00", "REG_BINARY"),
+               PolicyOp("set", "", "Flag", 1, "REG_DWORD")]
+        results = WindowsPolicyManager(worker).apply_batch(ops)
+        self.assertTrue(all(ok for _, ok, _ in results))
+        self.assertEqual(len(worker.commands), 1)
+        self.assertTrue(worker.commands[0].startswith("reg import"))
+
+    def test_unencodable_ops_fail_alone(self):
+        worker = FakeWorker()
+        ops = [PolicyOp("set", "", "Odd", 1, "REG_DWORD_BIG_ENDIAN"), PolicyOp("set", "", "Flag", 1, "REG_DWORD")]
+        results = WindowsPolicyManager(worker).apply_batch(ops)
+        self.assertEqual([ok for _, ok, _ in results], [False, True])
+        self.assertIn("REG_DWORD_BIG_ENDIAN", results[0][2])
+        self.assertEqual(len(worker.commands), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+
+import profile_utils
+from profile_utils import PARALLEL_MIN_PROFILES, _worker_count
+
+
+class WorkerCountTests(unittest.TestCase):
+    def test_single_cpu_runs_serially(self):
+        with mock.patch.object(profile_utils.os, "cpu_count", return_value=1):
+            self.assertEqual(_worker_count(50, None, 2), 1)
+
+    def test_few_profiles_run_serially(self):
+        with mock.patch.object(profile_utils.os, "cpu_count", return_value=8):
+            self.assertEqual(_worker_count(PARALLEL_MIN_PROFILES - 1, None, 2), 1)
+            self.assertEqual(_worker_count(0, None, 2), 1)
+
+    def test_many_profiles_use_a_bounded_pool(self):
+        with mock.patch.object(profile_utils.os, "cpu_count", return_value=2):
+            self.assertEqual(_worker_count(10, None, 2), 4)
+            self.assertEqual(_worker_count(10, None, 1), 2)
+        with mock.patch.object(profile_utils.os, "cpu_count", return_value=64):
+            self.assertEqual(_worker_count(100, None, 2), 8)
+
+    def test_explicit_max_workers_wins(self):
+        with mock.patch.object(profile_utils.os, "cpu_count", return_value=1):
+            self.assertEqual(_worker_count(10, 4, 2), 4)
+            self.assertEqual(_worker_count(2, 4, 2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
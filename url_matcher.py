@@ -0,0 +1,186 @@
+import re
+import time
+from collections import namedtuple, Counter
+
+# One URLBlocklist/URLAllowlist entry in Chrome's URL filter format:
+#   [scheme://][.]host[:port][/path][?query]
+# "*" as the host matches every host, a leading "." turns off subdomain matching,
+# the path is a prefix and query filters list key=value pairs that must all be present.
+UrlFilter = namedtuple('UrlFilter', 'pattern scheme host match_subdomains port path query allow')
+
+# [scheme://][user@]host[:port][path][?query][#fragment]; whitespace, quotes and commas end a URL
+_URL_REST = r'''(?:[^/?#@\s,"'<>]*@)?(\[[^\]/?#\s]*\]|[^/?#:\s,"'<>]*)(?::(\d*))?([^?#\s,"'<>]*)(?:\?([^#\s,"'<>]*))?'''
+_URL_PARTS = re.compile(r'(?:([A-Za-z][A-Za-z0-9+.-]*)://)?' + _URL_REST)
+_URL_IN_LINE = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*)://' + _URL_REST)
+_NO_PORT = None
+_DEFAULT_PORTS = {"http": 80, "https": 443, "ws": 80, "wss": 443, "ftp": 21}
+
+
+def _parts(match):
+    scheme, host, port, path, query = match.groups()
+    return ((scheme or "").lower(), host.lower().rstrip("."), int(port) if port else _NO_PORT, path or "/", query or "")
+
+
+def split_url(url):
+    """Splits a URL (or bare host) into (scheme, host, port, path, query) with one regex match.
+
+    Much cheaper than urllib.parse for what blocklist matching needs; the host is
+    lowercased and stripped of credentials and a trailing dot.
+    """
+    return _parts(_URL_PARTS.match(url))
+
+
+def parse_filter(pattern, allow=False):
+    """Parses one filter string into a UrlFilter, or returns None for empty/unusable entries."""
+    text = pattern.strip()
+    if not text: return None
+    if text == "*":
+        return UrlFilter(pattern, "", "", True, _NO_PORT, "", (), allow)
+    scheme, host, port, path, query = split_url(text)
+    match_subdomains = True
+    if host.startswith("."):
+        host, match_subdomains = host[1:], False
+    if host == "*": host = ""
+    elif host.startswith("*."): host = host[2:] # Common "*.example.com" spelling of "example.com"
+    if path == "/": path = "" # "example.com" and "example.com/" mean every path
+    query_pairs = tuple(tuple(part.split("=", 1)) if "=" in part else (part, "*") for part in query.split("&") if part)
+    return UrlFilter(pattern, scheme, host, match_subdomains, port, path, query_pairs, allow)
+
+
+def filter_identity(url_filter):
+    """What a filter matches, without its spelling or list: equal identities match the same URLs."""
+    scheme, host, match_subdomains, port, path, query = url_filter[1:7]
+    return (scheme, host, match_subdomains, port, path, tuple(sorted(set(query))))
+
+
+def filter_rank(depth, url_filter):
+    """How specific a filter is (host depth, path length, query length); the highest matching rank decides."""
+    return (depth, len(url_filter.path), len(url_filter.query))
+
+
+def _query_matches(required, query):
+    if not required: return True
+    present = set()
+    for part in query.split("&"):
+        key, _, value = part.partition("=")
+        present.add((key, value))
+        present.add((key, "*"))
+    return all(pair in present for pair in required)
+
+
+class UrlMatcher:
+    """URLBlocklist (+ optional URLAllowlist) compiled into a reversed-host label trie.
+
+    A lookup walks the host's labels from the TLD down ("www.example.com" -> com, example,
+    www), so its cost depends on the number of labels, not on the number of patterns. The
+    most specific matching filter wins (longest host, then longest path); on a tie the
+    allowlist wins, as in Chrome.
+    """
+    def __init__(self, block_patterns=(), allow_patterns=()):
+        self._root = self._new_node()
+        self.filters = []
+        self.invalid = []
+        self._host_cache = {}
+        for allow, patterns in ((False, block_patterns), (True, allow_patterns)):
+            for pattern in patterns:
+                url_filter = parse_filter(pattern, allow)
+                if url_filter is None:
+                    self.invalid.append(pattern)
+                    continue
+                self.filters.append(url_filter)
+                node = self._root
+                for label in reversed(url_filter.host.split(".")) if url_filter.host else ():
+                    node = node[0].setdefault(label, self._new_node())
+                node[1 if url_filter.match_subdomains else 2].append(url_filter)
+
+    @staticmethod
+    def _new_node():
+        return ({}, [], []) # children by label, filters matching subdomains too, filters for this exact host
+
+    def __len__(self):
+        return len(self.filters)
+
+    def host_filters(self, host):
+        """[(depth, filter), ...] whose host part matches `host`; cached per host for batch runs."""
+        found = self._host_cache.get(host)
+        if found is not None: return found
+        node = self._root
+        found = [(0, f) for f in node[1]]
+        labels = host.split(".") if host else []
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node[0].get(label)
+            if node is None: break
+            found.extend((depth, f) for f in node[1])
+            if depth == len(labels):
+                found.extend((depth, f) for f in node[2])
+        if len(self._host_cache) > 100000: self._host_cache.clear()
+        self._host_cache[host] = found
+        return found
+
+    def covering(self, url_filter):
+        """[(depth, filter), ...] of compiled filters that match every URL `url_filter` matches
+        (other than an identical filter), i.e. the ones that make it redundant."""
+        found, identity = [], filter_identity(url_filter)
+        for depth, f in self.host_filters(url_filter.host):
+            if filter_identity(f) == identity: continue
+            if not f.match_subdomains and url_filter.match_subdomains: continue
+            if f.scheme and f.scheme != url_filter.scheme: continue
+            if f.port is not _NO_PORT and f.port != url_filter.port: continue
+            if f.path and not url_filter.path.startswith(f.path): continue
+            if f.query and not set(f.query) <= set(url_filter.query): continue
+            found.append((depth, f))
+        return found
+
+    def match(self, url):
+        """Returns (blocked, deciding UrlFilter or None) for one URL."""
+        scheme, host, port, path, query = split_url(url.strip())
+        return self._decide(self.host_filters(host), scheme, port, path, query)
+
+    def _decide(self, candidates, scheme, port, path, query):
+        if port is _NO_PORT: port = _DEFAULT_PORTS.get(scheme, _NO_PORT) # "example.com:443" matches https://example.com
+        best, best_rank = None, None
+        for depth, f in candidates:
+            if f.scheme and f.scheme != scheme: continue
+            if f.port is not _NO_PORT and f.port != port: continue
+            if f.path and not path.startswith(f.path): continue
+            if f.query and not _query_matches(f.query, query): continue
+            rank = (depth, len(f.path), len(f.query), f.allow) # filter_rank, inlined on the hot path
+            if best_rank is None or rank > best_rank:
+                best, best_rank = f, rank
+        return (best is not None and not best.allow), best
+
+    def is_blocked(self, url):
+        return self.match(url)[0]
+
+    def evaluate_lines(self, lines, cancel_event=None):
+        """Batch mode: matches every URL found in `lines` (one per line; CSV/History exports work too).
+
+        A first line without a URL that looks like a CSV header ("url,title,visits") is skipped.
+
+        Returns {"checked", "blocked", "allowed", "hits": Counter(pattern -> count), "seconds"}.
+        """
+        start = time.perf_counter()
+        hits = Counter()
+        checked = blocked = allowed = 0
+        for line_number, line in enumerate(lines):
+            if cancel_event is not None and checked % 10000 == 0 and cancel_event.is_set(): break
+            found = _URL_IN_LINE.search(line) # Finds and splits the URL in one regex pass
+            if not found: # A bare host per line
+                line = line.strip()
+                if not line: continue
+                if line_number == 0 and "," in line and "." not in line.split(",", 1)[0]: continue # CSV header
+                found = _URL_PARTS.match(line)
+            checked += 1
+            candidates = self.host_filters(found.group(2).lower().rstrip("."))
+            if not candidates: continue # Most URLs: no filter for the host, nothing else to parse
+            scheme, _, port, path, query = _parts(found)
+            is_blocked, deciding = self._decide(candidates, scheme, port, path, query)
+            if deciding is None: continue
+            hits[deciding.pattern] += 1
+            if is_blocked: blocked += 1
+            else: allowed += 1
+        return {"checked": checked, "blocked": blocked, "allowed": allowed, "hits": hits, "seconds": time.perf_counter() - start}
+
+    def evaluate_file(self, filepath, cancel_event=None):
+        with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+            return self.evaluate_lines(f, cancel_event)
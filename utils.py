@@ -5,6 +5,8 @@ import os
 import subprocess
 import hashlib
 from windows_policy_manager import WindowsPolicyManager
+from linux_policy_manager import LinuxPolicyManager
+from policy_cache import PolicyCache
 
 def is_admin():
     try: return ctypes.windll.shell32.IsUserAnAdmin()
@@ -16,11 +18,14 @@ def run_as_admin():
 def get_chrome_user_data_path():
     system = platform.system()
     if system == "Windows": return os.path.join(os.environ['LOCALAPPDATA'], 'Google', 'Chrome', 'User Data')
+    if system == "Linux": return os.path.join(os.path.expanduser("~"), '.config', 'google-chrome')
     return None
 
 def get_policy_manager():
     if platform.system() == "Windows":
-        return WindowsPolicyManager()
+        return PolicyCache(WindowsPolicyManager())
+    if platform.system() == "Linux":
+        return PolicyCache(LinuxPolicyManager())
     return None
 
 def get_hardware_id():
@@ -1,15 +1,73 @@
 import subprocess
 import os # Added os import for consistency, though not strictly used in current snippet
+import tempfile
+try:
+    import winreg
+except ImportError: # Not on Windows
+    winreg = None
+from policy_snapshot import parse_reg_query_output, PolicySnapshot
+from registry_worker import RegistryWorker
+from policy_backend import PolicyBackend
 
-class WindowsPolicyManager:
-    def __init__(self): self.POLICY_BASE_KEY = r"SOFTWARE\Policies\Google\Chrome"
+def _reg_file_string(text):
+    return '"' + str(text).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _reg_file_hex(type_tag, data):
+    return f"{type_tag}:" + ",".join(f"{b:02x}" for b in data)
+
+def _reg_file_value(value_type, value_data):
+    """The right-hand side of a .reg value line; raises ValueError for types reg import cannot take from us."""
+    if value_type == "REG_DWORD": return f"dword:{int(value_data) & 0xFFFFFFFF:08x}"
+    if value_type == "REG_QWORD": return _reg_file_hex("hex(b)", (int(value_data) & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little'))
+    if value_type == "REG_MULTI_SZ": # UTF-16 strings, each NUL-terminated, then an empty one
+        items = [value_data] if isinstance(value_data, str) else list(value_data or [])
+        return _reg_file_hex("hex(7)", "".join(f"{item}\0" for item in items).encode('utf-16-le') + b"\0\0")
+    if value_type == "REG_BINARY":
+        return _reg_file_hex("hex", bytes.fromhex(value_data) if isinstance(value_data, str) else bytes(value_data or b""))
+    if value_type == "REG_EXPAND_SZ": return _reg_file_hex("hex(2)", f"{value_data}\0".encode('utf-16-le'))
+    if value_type == "REG_SZ":
+        text = "" if value_data is None else str(value_data)
+        if "\n" in text or "\r" in text: return _reg_file_hex("hex(1)", f"{text}\0".encode('utf-16-le')) # Not representable as a quoted line
+        return _reg_file_string(text)
+    raise ValueError(f"{value_type} values cannot be written by this tool.")
+
+def build_reg_file(base_key, ops):
+    """Renders PolicyOps as the text of a .reg file (Registry Editor 5.00 format), grouped by key."""
+    by_key = {}
+    for op in ops:
+        by_key.setdefault(op.key_name, []).append(op)
+    lines = ["Windows Registry Editor Version 5.00", ""]
+    for key_name, key_ops in by_key.items():
+        lines.append(f"[HKEY_LOCAL_MACHINE\\{base_key}\\{key_name}]" if key_name else f"[HKEY_LOCAL_MACHINE\\{base_key}]")
+        for op in key_ops:
+            name = _reg_file_string(op.value_name)
+            if op.op == "remove": lines.append(f"{name}=-")
+            else: lines.append(f"{name}={_reg_file_value(op.value_type, op.value_data)}")
+        lines.append("")
+    return "\r\n".join(lines) + "\r\n"
+
+class WindowsPolicyManager(PolicyBackend):
+    LOCATION = "Windows Registry"
+    def __init__(self, worker=None):
+        self.POLICY_BASE_KEY = r"SOFTWARE\Policies\Google\Chrome"
+        self._worker = worker or RegistryWorker() # One long-lived PowerShell host for all reg.exe calls
+    def prewarm(self):
+        """Starts the registry worker in the background (called once at app start)."""
+        self._worker.prewarm()
     def _run_reg_command(self, args):
+        stdout, stderr, exit_code = self._worker.run(f"reg {args}")
+        if stdout is None and stderr and stderr.startswith("Registry worker failed"):
+            return self._run_reg_command_spawn(args) # Worker unusable, fall back to one process per call
+        if exit_code and "ERROR" not in (stderr or ""): # A failing reg.exe must not read as success
+            stderr = ((stderr or "") + f"\nERROR: reg exited with code {exit_code}.").strip()
+        return stdout, stderr
+    def _run_reg_command_spawn(self, args):
         try:
             full_command = ['powershell', '-Command', f"reg {args}"]
             startupinfo = subprocess.STARTUPINFO(); startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW; startupinfo.wShowWindow = subprocess.SW_HIDE
             result = subprocess.run(full_command, capture_output=True, text=True, check=True, startupinfo=startupinfo, encoding='utf-8', errors='ignore')
             return result.stdout, result.stderr
-        except subprocess.CalledProcessError as e: return e.stdout, e.stderr
+        except subprocess.CalledProcessError as e: return e.stdout, (e.stderr if e.stderr and "ERROR" in e.stderr else f"{e.stderr or ''}\nERROR: reg exited with code {e.returncode}.".strip())
         except FileNotFoundError: return None, "PowerShell or reg.exe not found."
     def set_policy(self, key_name, value_name, value_data, value_type="REG_DWORD"):
         full_key = f"HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}\\{key_name}" if key_name else f"HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}"
@@ -26,41 +84,55 @@ class WindowsPolicyManager:
         if "Access is denied" in stderr: return False, "Access Denied."
         if stderr and "was not found" not in stderr and "ERROR:" in stderr : return False, stderr
         return True, "Policy removed successfully."
-    def add_extension(self, ext_id, log_callback):
-        current_extensions = self.get_forced_extensions(lambda msg: None)
-        if ext_id in current_extensions: return True, f"Extension {ext_id} is already in the policy list."
-        next_index = 1
-        current_indices = [int(idx) for idx in current_extensions.values() if idx.isdigit()]
-        if current_indices: next_index = max(current_indices) + 1
-        value_data = f"{ext_id};https://clients2.google.com/service/update2/crx"
-        log_callback(f"Adding policy for {ext_id} at index {next_index}...")
-        return self.set_policy("ExtensionInstallForcelist", str(next_index), value_data, "REG_SZ")
-    def remove_extension(self, index, log_callback):
-        log_callback(f"Removing policy at index {index}...")
-        return self.remove_policy("ExtensionInstallForcelist", str(index))
-    def get_policy_value(self, key_name, value_name):
-        full_key = f"HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}\\{key_name}" if key_name else f"HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}"
-        args = f'query "{full_key}" /v "{value_name}"'
-        stdout, stderr = self._run_reg_command(args)
-        if stderr: return None
+    def apply_batch(self, ops):
+        """Writes all ops with a single `reg import` of a generated .reg file.
+
+        Ops whose value cannot be encoded fail on their own with the reason; the rest are imported.
+        """
+        rejected = {}
+        for op in ops:
+            if op.op != "set": continue
+            try: _reg_file_value(op.value_type, op.value_data)
+            except (ValueError, TypeError) as e: rejected[id(op)] = f"{op.key_name or op.value_name}: {e}"
+        valid = [op for op in ops if id(op) not in rejected]
+        if not valid: return [(op, False, rejected[id(op)]) for op in ops]
+        fd, reg_path = tempfile.mkstemp(suffix=".reg", prefix="chrome_policies_")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-16', newline='') as f: # reg import expects UTF-16 LE with BOM
+                f.write(build_reg_file(self.POLICY_BASE_KEY, valid))
+            _, stderr = self._run_reg_command(f'import "{reg_path}"')
+        finally:
+            try: os.remove(reg_path)
+            except OSError: pass
+        if stderr and "Access is denied" in stderr: success, msg = False, "Access Denied."
+        elif stderr and "successfully" not in stderr and "ERROR" in stderr: success, msg = False, stderr
+        else: success, msg = True, "Policy set successfully."
+        return [(op, False, rejected[id(op)]) if id(op) in rejected else (op, success, msg) for op in ops] # reg import is all-or-nothing
+    def get_change_token(self):
+        """Last-write times of the policy key and all its subkeys, read in-process through winreg."""
+        if winreg is None: return None
+        def _walk(path, token):
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
+                subkey_count, value_count, last_write = winreg.QueryInfoKey(key)
+                token.append((path, value_count, last_write))
+                subkeys = [winreg.EnumKey(key, i) for i in range(subkey_count)]
+            for subkey in subkeys:
+                _walk(f"{path}\\{subkey}", token)
+        token = []
         try:
-            last_line = stdout.strip().split('\n')[-1]
-            parts = [p.strip() for p in last_line.split('    ') if p.strip()]
-            return parts[-1]
-        except: return None
-    def get_forced_extensions(self, log_callback):
-        log_callback("Reading extension policies from Windows Registry...")
-        args = f'query HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}\\ExtensionInstallForcelist'
-        stdout, stderr = self._run_reg_command(args)
-        if "unable to find the specified registry key" in stderr: return {}
-        if "Access is denied" in stderr: return {"_error": "access_denied"}
-        if stderr: return {}
-        extensions = {}
-        for line in stdout.strip().split('\n'):
-            if not line.strip() or line.startswith("HKEY_LOCAL_MACHINE"): continue
-            try:
-                parts = [p.strip() for p in line.split('    ') if p.strip()]
-                value_data, index = parts[-1], parts[0]
-                extensions[value_data.split(';')[0]] = index
-            except IndexError: log_callback(f"Could not parse line: {line}")
-        return extensions
+            _walk(self.POLICY_BASE_KEY, token)
+        except FileNotFoundError:
+            return ("missing",)
+        except OSError:
+            return None
+        return tuple(token)
+    def get_policy_snapshot(self):
+        """Reads the whole policy tree (base key and all subkeys) with a single `reg query /s`."""
+        base_key = f"HKEY_LOCAL_MACHINE\\{self.POLICY_BASE_KEY}"
+        stdout, stderr = self._run_reg_command(f'query "{base_key}" /s')
+        if stderr and "Access is denied" in stderr: return PolicySnapshot(error="access_denied")
+        if stderr and not stdout:
+            if "unable to find" in stderr: return PolicySnapshot() # Key does not exist yet, nothing configured
+            print(f"Error reading the policy tree: {stderr.strip()}") # Timeout, dead worker, reg failure: not "no policies"
+            return PolicySnapshot(error=stderr.strip())
+        return parse_reg_query_output(stdout, base_key)